@@ -1,17 +1,47 @@
+import os
+import time
 import streamlit as st
-import json
 from pathlib import Path
+from typing import Dict
 
 from config.languages import LANGUAGES
-from utils.json_loader import load_json_config
-from utils.folder_loader import parse_folder_list, build_config_from_folders
-from utils.mask import check_masks_available
+from config.constants import (
+    PDF_DEFAULT_DPI,
+    DATASET_EXPORT_DEFAULT_VOLUME,
+    ADMIN_VIEW_ENABLED,
+)
+from utils.folder_loader import parse_folder_list
 from services.crop_manager import migrate_crop_data_if_needed
-from services.pdf_export import generate_pdf_from_current_view
+from services.config_cache import (
+    get_upload_digest,
+    get_folder_manifest_digest,
+    get_manifest_digest,
+    get_json_config,
+    get_upload_has_masks,
+    get_folder_config,
+    get_manifest_config,
+)
 from ui.styles import apply_custom_styles
 from ui.sidebar import render_sidebar
 from ui.main_view import render_main_view
 from ui.crop_editor import render_crop_editor
+from ui.zoom_viewer import render_zoom_viewer
+from ui.integrity_panel import render_integrity_panel
+from ui.export_button import render_export_button, render_dataset_export
+from ui.memory_panel import begin_session_run, track_session_memory, render_memory_admin
+from ui.timing_panel import start_rerun_timings, render_timing_panel
+from ui.profiler_panel import start_rerun_profile, stop_rerun_profile, render_profiler_panel
+from services.metrics_exporter import start_metrics_exporter
+from utils.metrics import observe
+from utils.timing import stop_timings
+
+
+def show_load_errors(stats: Dict, lang: Dict):
+    """显示加载配置时的错误（错误格式: "错误键" 或 "错误键|路径"）"""
+    for error in stats.get("errors", []):
+        key, _, detail = error.partition("|")
+        message = lang.get(key, key)
+        st.error(f"{message}: {detail}" if detail else message)
 
 
 def main():
@@ -23,6 +53,9 @@ def main():
 
     st.set_page_config(page_title=lang["page_title"], page_icon="🖼️", layout="wide")
 
+    # 运行期间本 session 的数据不会被内存预算释放（运行结束时统计）
+    begin_session_run()
+
     # 初始化 session state
     if "selected_sample_idx" not in st.session_state:
         st.session_state.selected_sample_idx = 0
@@ -48,6 +81,9 @@ def main():
         st.session_state.show_edit_crop_button = True
     if "crop_data" not in st.session_state:
         st.session_state.crop_data = {}
+    if "row_images" not in st.session_state:
+        # 主视图各行已准备好的图片（按影响图片的选项缓存，只保留当前页）
+        st.session_state.row_images = {}
     if "current_cropping_sample" not in st.session_state:
         st.session_state.current_cropping_sample = None
     if "cropper_reference_method" not in st.session_state:
@@ -58,12 +94,42 @@ def main():
         st.session_state.next_crop_id_counter = 0
     if "config_hash" not in st.session_state:
         st.session_state.config_hash = None
+    if "upload_digest" not in st.session_state:
+        st.session_state.upload_digest = None
+    if "pdf_image_format" not in st.session_state:
+        st.session_state.pdf_image_format = "jpeg"
+    if "pdf_image_dpi" not in st.session_state:
+        st.session_state.pdf_image_dpi = PDF_DEFAULT_DPI
+    if "dataset_export_scope" not in st.session_state:
+        st.session_state.dataset_export_scope = "filtered"
+    if "dataset_export_format" not in st.session_state:
+        st.session_state.dataset_export_format = "pdf"
+    if "mosaic_image_format" not in st.session_state:
+        st.session_state.mosaic_image_format = "png"
+    if "mosaic_samples_per_image" not in st.session_state:
+        st.session_state.mosaic_samples_per_image = 1
+    if "dataset_export_volume" not in st.session_state:
+        st.session_state.dataset_export_volume = DATASET_EXPORT_DEFAULT_VOLUME
+    if "dataset_export_workers" not in st.session_state:
+        st.session_state.dataset_export_workers = os.cpu_count() or 1
     if "text_size" not in st.session_state:
         st.session_state.text_size = 16
     if "method_text_size" not in st.session_state:
         st.session_state.method_text_size = 18
     if "preserve_aspect_ratio" not in st.session_state:
         st.session_state.preserve_aspect_ratio = True
+    # 合成行显示（每行拼成一张图片）
+    if "composite_rows" not in st.session_state:
+        st.session_state.composite_rows = False
+    # 深度缩放查看器（打开的样本、缩放倍数、视口中心百分比）
+    if "zoom_sample" not in st.session_state:
+        st.session_state.zoom_sample = None
+    if "zoom_factor" not in st.session_state:
+        st.session_state.zoom_factor = 1
+    if "zoom_x" not in st.session_state:
+        st.session_state.zoom_x = 50.0
+    if "zoom_y" not in st.session_state:
+        st.session_state.zoom_y = 50.0
 
     # Mask session state
     if "use_mask" not in st.session_state:
@@ -71,8 +137,32 @@ def main():
     if "darken_factor" not in st.session_state:
         st.session_state.darken_factor = 1.0
 
+    # Integrity scan session state
+    if "integrity_level" not in st.session_state:
+        st.session_state.integrity_level = "header"
+
+    # 计时面板（关闭时不计时）
+    if "timing_enabled" not in st.session_state:
+        st.session_state.timing_enabled = False
+    if "timing_export_fingerprint" not in st.session_state:
+        st.session_state.timing_export_fingerprint = None
+    start_rerun_timings()
+
+    # 剖析面板：待剖析的对象（rerun / export）、剖析中的导出任务、最近一次结果
+    if "profile_target" not in st.session_state:
+        st.session_state.profile_target = "rerun"
+    if "profile_pending" not in st.session_state:
+        st.session_state.profile_pending = None
+    if "profile_export_fingerprint" not in st.session_state:
+        st.session_state.profile_export_fingerprint = None
+    if "profile_result" not in st.session_state:
+        st.session_state.profile_result = None
+    if "profile_busy" not in st.session_state:
+        st.session_state.profile_busy = False
+    start_rerun_profile()
+
     # 迁移旧的crop数据格式到新格式
-    migrate_crop_data_if_needed()
+    migrate_crop_data_if_needed(st.session_state.crop_data)
 
     # 固定图片宽度
     image_width = 800
@@ -94,10 +184,8 @@ def main():
         # 输入模式选择
         input_mode = st.radio(
             lang["input_mode_label"],
-            options=["json", "folders"],
-            format_func=lambda x: lang["input_mode_json"]
-            if x == "json"
-            else lang["input_mode_folders"],
+            options=["json", "folders", "manifest"],
+            format_func=lambda x: lang[f"input_mode_{x}"],
             key="input_mode",
             horizontal=True,
         )
@@ -105,12 +193,20 @@ def main():
         # 根据输入模式显示不同的输入控件
         uploaded_file = None
         folder_text = None
+        manifest_text = None
 
         if st.session_state.input_mode == "json":
             # JSON 文件上传
             uploaded_file = st.file_uploader(
                 lang["upload_label"], type=["json"], help=lang["upload_help"]
             )
+        elif st.session_state.input_mode == "manifest":
+            # JSONL / CSV 清单路径（服务器本地文件，按需读取）
+            manifest_text = st.text_input(
+                lang["manifest_path_label"],
+                help=lang["manifest_path_help"],
+                placeholder=lang["manifest_path_placeholder"],
+            )
         else:
             # 文件夹列表输入
             folder_text = st.text_area(
@@ -125,6 +221,10 @@ def main():
         st.session_state.input_mode == "json" and uploaded_file is not None
     ) or (
         st.session_state.input_mode == "folders" and folder_text and folder_text.strip()
+    ) or (
+        st.session_state.input_mode == "manifest"
+        and manifest_text
+        and manifest_text.strip()
     )
 
     if not has_input:
@@ -160,6 +260,25 @@ def main():
 }""",
                     language="json",
                 )
+        elif st.session_state.input_mode == "manifest":
+            st.info(lang["no_manifest_msg"])
+            # 显示清单格式示例
+            with st.expander(lang["manifest_example_title"]):
+                st.code(
+                    """# samples.jsonl（第一行为可选表头）
+{"base_dir": "./images", "methods": [{"name": "方法A"}, {"name": "方法B"}]}
+{"name": "样本1", "text": "样本1的文本说明", "images": {"方法A": "a/1.jpg", "方法B": "b/1.jpg"}}
+{"name": "样本2", "images": {"方法A": "a/2.jpg", "方法B": "b/2.jpg"}}""",
+                    language="json",
+                )
+                st.code(
+                    """# samples.csv（name/text/mask/reference 以外的列为方法）
+name,text,mask,方法A,方法B
+样本1,样本1的文本说明,masks/1.png,a/1.jpg,b/1.jpg
+样本2,,,a/2.jpg,b/2.jpg""",
+                    language="text",
+                )
+                st.markdown(lang["manifest_side_file_hint"])
         else:
             st.info(lang["no_folder_msg"])
             # 显示文件夹列表示例
@@ -210,14 +329,29 @@ def main():
                 )
         return
 
-    # 加载配置
+    # 加载配置（按上传内容/文件夹清单的摘要在进程内缓存，rerun 时不再解析）
     config = None
     stats = None
+    config_digest = None
 
     if st.session_state.input_mode == "json":
         # JSON 模式
-        config = load_json_config(uploaded_file)
+        config_digest = get_upload_digest(uploaded_file)
+        config, json_stats = get_json_config(config_digest, uploaded_file.getvalue())
         if config is None:
+            show_load_errors(json_stats, lang)
+            return
+    elif st.session_state.input_mode == "manifest":
+        # JSONL / CSV 清单模式
+        manifest_path = Path(manifest_text.strip()).expanduser()
+        if not manifest_path.is_absolute():
+            manifest_path = Path.cwd() / manifest_path
+        manifest_path = manifest_path.resolve()
+
+        config_digest = get_manifest_digest(manifest_path)
+        config, stats = get_manifest_config(config_digest, manifest_path)
+        if config is None:
+            show_load_errors(stats, lang)
             return
     else:
         # Folder List 模式
@@ -227,19 +361,12 @@ def main():
 
         try:
             folders = parse_folder_list(folder_text)
-            config, stats = build_config_from_folders(folders)
+            config_digest = get_folder_manifest_digest(folders)
+            config, stats = get_folder_config(config_digest, folders)
 
             # 处理错误
             if config is None and stats and stats.get("errors"):
-                for error in stats["errors"]:
-                    if error == "error_no_folders":
-                        st.error(lang["error_no_folders"])
-                    elif error.startswith("error_folder_not_exist|"):
-                        folder_path = error.split("|", 1)[1]
-                        st.error(f"{lang['error_folder_not_exist']}: {folder_path}")
-                    elif error.startswith("error_no_images_in_folder|"):
-                        folder_path = error.split("|", 1)[1]
-                        st.error(f"{lang['error_no_images_in_folder']}: {folder_path}")
+                show_load_errors(stats, lang)
                 return
         except Exception as e:
             st.error(f"Error parsing folder list: {e}")
@@ -252,8 +379,8 @@ def main():
     methods = config["methods"]
     samples = config["samples"]
 
-    # 显示加载摘要（仅Folder List模式）
-    if st.session_state.input_mode == "folders" and stats:
+    # 显示加载摘要（Folder List / 清单模式）
+    if st.session_state.input_mode in ("folders", "manifest") and stats:
         with st.sidebar:
             st.markdown("---")
             with st.expander(lang["loading_summary_title"], expanded=True):
@@ -262,7 +389,10 @@ def main():
                     st.metric(lang["num_methods_label"], stats["num_methods"])
                     st.metric(lang["num_samples_label"], stats["num_samples"])
                 with col2:
-                    if stats["num_missing"] > 0:
+                    if "num_missing" not in stats:
+                        # 清单模式不预先扫描图片
+                        pass
+                    elif stats["num_missing"] > 0:
                         st.metric(
                             lang["num_missing_label"],
                             stats["num_missing"],
@@ -272,85 +402,73 @@ def main():
                     else:
                         st.metric(lang["num_missing_label"], "0 ✓")
 
-    # Check if any sample has mask images available
-    has_masks = check_masks_available(samples, base_dir)
-
     # Check if config has changed (clear crops if new config)
-    current_config_hash = hash(json.dumps(config, sort_keys=True))
-    if st.session_state.config_hash != current_config_hash:
-        st.session_state.config_hash = current_config_hash
+    # 配置指纹直接使用加载时计算的摘要
+    if st.session_state.config_hash != config_digest:
+        st.session_state.config_hash = config_digest
         st.session_state.crop_data = {}
         st.session_state.current_cropping_sample = None
+        st.session_state.zoom_sample = None
+
+    # Check if any sample has mask images available
+    # 上传的 JSON 每次上传时在本 session 中检查；文件夹 / 清单加载时已检查并随配置缓存
+    if st.session_state.input_mode == "json":
+        has_masks = get_upload_has_masks(uploaded_file, config)
+    else:
+        has_masks = config["has_masks"]
 
     # 渲染侧边栏（返回用户配置）
     sidebar_config = render_sidebar(
-        lang=lang, samples=samples, methods=methods, has_masks=has_masks
+        lang=lang,
+        samples=samples,
+        methods=methods,
+        has_masks=has_masks,
+        config_digest=config_digest,
     )
     num_rows = sidebar_config["num_rows"]
+    # 筛选后的样本视图（分页、显示和导出都基于视图，crop 数据仍按原始索引）
+    view = sidebar_config["samples"]
+
+    # 数据集完整性报告（加载时并行检查，按配置摘要缓存）
+    render_integrity_panel(
+        samples=samples,
+        methods=methods,
+        base_dir=base_dir,
+        config_digest=config_digest,
+        lang=lang,
+        view=view,
+    )
+
+    # 完整数据集导出（进程池并行处理图片）
+    render_dataset_export(
+        samples=view,
+        all_samples=samples,
+        methods=methods,
+        base_dir=base_dir,
+        config_digest=config_digest,
+        image_width=image_width,
+        lang=lang,
+    )
+
+    # 内存管理视图（IMAGE_VIEWER_ADMIN=1 时显示）
+    if ADMIN_VIEW_ENABLED:
+        render_memory_admin(lang)
 
     # 应用自定义样式
     apply_custom_styles()
 
-    # 右上角添加保存PDF按钮
+    # 右上角添加保存PDF按钮（点击后在后台生成，结果按视图状态缓存）
     header_col1, header_col2 = st.columns([0.9, 0.1])
     with header_col2:
-        # 检查是否正在编辑crop
-        is_editing_crop = st.session_state.current_cropping_sample is not None
-
-        if is_editing_crop:
-            # 正在编辑时禁用按钮
-            st.button(
-                "📥 Export",
-                disabled=True,
-                help=lang["save_pdf_disabled_tooltip"],
-                key="save_pdf_btn",
-            )
-        else:
-            # 生成PDF
-            try:
-                pdf_bytes = generate_pdf_from_current_view(
-                    samples=samples,
-                    methods=methods,
-                    base_dir=base_dir,
-                    start_idx=st.session_state.selected_sample_idx,
-                    num_rows=num_rows,
-                    show_method_name=st.session_state.show_method_name,
-                    show_text=st.session_state.show_text,
-                    show_sample_name=st.session_state.show_sample_name,
-                    show_descriptions=st.session_state.show_descriptions,
-                    close_view_enabled=st.session_state.close_view_enabled,
-                    crop_data=st.session_state.crop_data,
-                    preserve_aspect_ratio=st.session_state.preserve_aspect_ratio,
-                    lang=lang,
-                    use_mask=st.session_state.use_mask,
-                    darken_factor=st.session_state.darken_factor,
-                    image_width=image_width,
-                    visible_methods=st.session_state.visible_methods,
-                )
-
-                # 生成文件名
-                sample_name = (
-                    samples[st.session_state.selected_sample_idx]["name"]
-                    if samples
-                    else "export"
-                )
-                safe_name = "".join(
-                    c for c in sample_name if c.isalnum() or c in (" ", "-", "_")
-                ).strip()
-                filename = f"{lang['save_pdf_filename']}_{safe_name}.pdf"
-
-                st.download_button(
-                    label="📥 Export",
-                    data=pdf_bytes,
-                    file_name=filename,
-                    mime="application/pdf",
-                    help=lang["save_pdf_tooltip"],
-                    key="save_pdf_btn",
-                )
-            except Exception as e:
-                st.button(
-                    "📥", disabled=True, help=f"Error: {str(e)}", key="save_pdf_btn"
-                )
+        render_export_button(
+            samples=view,
+            methods=methods,
+            base_dir=base_dir,
+            config_digest=config_digest,
+            num_rows=num_rows,
+            image_width=image_width,
+            lang=lang,
+        )
 
     # Crop 编辑界面
     if st.session_state.current_cropping_sample is not None:
@@ -362,9 +480,19 @@ def main():
             lang=lang,
         )
 
+    # 深度缩放查看器
+    if st.session_state.zoom_sample is not None:
+        render_zoom_viewer(
+            samples=samples,
+            methods=methods,
+            base_dir=base_dir,
+            image_width=image_width,
+            lang=lang,
+        )
+
     # 主视图
     render_main_view(
-        samples=samples,
+        samples=view,
         methods=methods,
         base_dir=base_dir,
         start_idx=st.session_state.selected_sample_idx,
@@ -373,6 +501,22 @@ def main():
         lang=lang,
     )
 
+    # 计时面板（侧边栏末尾，显示本次运行的耗时）
+    render_timing_panel(lang)
+
+    # 剖析面板（结束本次运行的剖析并显示结果）
+    render_profiler_panel(lang)
+
 
 if __name__ == "__main__":
-    main()
+    # 配置了指标输出时启动 /metrics 端点或指标文件（每个进程一次）
+    start_metrics_exporter()
+    rerun_started = time.perf_counter()
+    try:
+        main()
+    finally:
+        # 提前返回或 rerun 时结束计时；统计本 session 的内存并执行预算
+        stop_timings()
+        stop_rerun_profile()
+        track_session_memory()
+        observe("image_viewer_rerun_duration_seconds", time.perf_counter() - rerun_started)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+PDF 导出基准：对比不同图片嵌入方式下的文件大小和导出耗时
+
+生成合成数据集（平滑的类照片图片，PNG 和 JPEG 两种源格式），
+导出 rows × methods 的当前视图。
+
+用法:
+    python benchmarks/bench_pdf_export.py --rows 5 --methods 8 --size 1024
+"""
+
+import argparse
+import inspect
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.languages import LANGUAGES  # noqa: E402
+from services.pdf_export import generate_pdf_from_current_view  # noqa: E402
+
+
+def make_image(size: int, seed: int) -> Image.Image:
+    """生成平滑的类照片图片（低频噪声 + 渐变），压缩特性接近真实结果图"""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (size // 32, size // 32, 3), dtype=np.uint8)
+    img = Image.fromarray(small).resize((size, size), Image.Resampling.BICUBIC)
+    return img.filter(ImageFilter.GaussianBlur(2))
+
+
+def build_dataset(root: Path, rows: int, methods: int, size: int, ext: str):
+    """生成数据集，返回 (samples, methods)"""
+    method_list = [{"name": f"method_{m}", "description": ""} for m in range(methods)]
+    samples = []
+    for i in range(rows):
+        images = {}
+        for m in range(methods):
+            rel = f"method_{m}/sample_{i}.{ext}"
+            path = root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            make_image(size, i * methods + m).save(path, quality=92)
+            images[f"method_{m}"] = rel
+        samples.append({"name": f"sample_{i}", "text": "", "images": images})
+    return samples, method_list
+
+
+def export(samples, methods, base_dir, rows, **options):
+    """导出一次，返回 (字节数, 耗时秒)"""
+    from services.image_prep import get_image_cache
+
+    get_image_cache().clear()
+    supported = inspect.signature(generate_pdf_from_current_view).parameters
+    options = {k: v for k, v in options.items() if k in supported}
+    start = time.perf_counter()
+    data = generate_pdf_from_current_view(
+        samples=samples,
+        methods=methods,
+        base_dir=base_dir,
+        start_idx=0,
+        num_rows=rows,
+        show_method_name=True,
+        show_text=False,
+        show_sample_name=True,
+        show_descriptions=False,
+        close_view_enabled=False,
+        crop_data={},
+        preserve_aspect_ratio=False,
+        lang=LANGUAGES["en"],
+        image_width=800,
+        **options,
+    )
+    return len(data), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5)
+    parser.add_argument("--methods", type=int, default=8)
+    parser.add_argument("--size", type=int, default=1024, help="源图片边长（像素）")
+    args = parser.parse_args()
+
+    modes = [
+        ("lossless", None),
+        ("lossless", 200),
+        ("jpeg", 200),
+        ("jpeg", 150),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in ("png", "jpg"):
+            root = Path(tmp) / ext
+            samples, methods = build_dataset(
+                root, args.rows, args.methods, args.size, ext
+            )
+            print(f"\n源格式 {ext.upper()}，{args.rows} 行 × {args.methods} 个方法")
+            print(f"{'模式':<12}{'DPI':>6}{'大小 (MB)':>12}{'耗时 (s)':>10}")
+            for image_format, dpi in modes:
+                size, elapsed = export(
+                    samples,
+                    methods,
+                    root,
+                    args.rows,
+                    image_format=image_format,
+                    image_dpi=dpi,
+                )
+                print(
+                    f"{image_format:<12}{dpi or '-':>6}"
+                    f"{size / 1024 / 1024:>12.2f}{elapsed:>10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+SampleStore 内存基准：对比字典列表与紧凑列式存储的内存占用
+
+用法:
+    python benchmarks/bench_sample_store.py --samples 500000 --methods 10
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.sample_store import SampleStore  # noqa: E402
+
+
+def build_config_text(num_samples: int, num_methods: int) -> str:
+    """生成与真实评测结果结构相近的 JSON 配置文本"""
+    methods = [f"method_{m:02d}" for m in range(num_methods)]
+    samples = []
+    for i in range(num_samples):
+        samples.append(
+            {
+                "name": f"sample_{i:07d}",
+                "text": "",
+                "mask": f"masks/subset_{i % 20:02d}/sample_{i:07d}.png",
+                "images": {
+                    name: f"results/{name}/subset_{i % 20:02d}/sample_{i:07d}.png"
+                    for name in methods
+                },
+            }
+        )
+    config = {
+        "base_dir": "./data",
+        "methods": [{"name": name, "description": ""} for name in methods],
+        "samples": samples,
+    }
+    return json.dumps(config)
+
+
+def measure(func):
+    """返回 (结果, 新增常驻字节, 耗时秒)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=100_000)
+    parser.add_argument("--methods", type=int, default=10)
+    args = parser.parse_args()
+
+    text = build_config_text(args.samples, args.methods)
+
+    samples, dict_bytes, parse_time = measure(lambda: json.loads(text)["samples"])
+    store, store_bytes, build_time = measure(lambda: SampleStore.from_samples(samples))
+
+    # 验证访问结果一致
+    for idx in (0, len(samples) // 2, len(samples) - 1):
+        assert store[idx].to_dict() == samples[idx]
+
+    print(f"samples × methods : {args.samples} × {args.methods}")
+    print(f"list[dict]        : {dict_bytes / 2**20:10.1f} MiB (json.loads {parse_time:.2f}s)")
+    print(
+        f"SampleStore       : {store_bytes / 2**20:10.1f} MiB "
+        f"(build {build_time:.2f}s, columns {store.nbytes / 2**20:.1f} MiB)"
+    )
+    print(f"ratio             : {dict_bytes / max(store_bytes, 1):10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
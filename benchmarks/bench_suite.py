@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+基准测试套件：在合成数据集上测量加载、图片处理、crop 和 PDF 导出的吞吐量和峰值内存
+
+每个用例在新的子进程中运行（峰值 RSS 互不影响，包括 PIL 在 Python 堆外分配的像素），
+结果写入 JSON，可与其他提交的结果对比。
+
+用法:
+    python benchmarks/bench_suite.py --samples 50 --methods 4 --output results.json
+    python benchmarks/bench_suite.py --data-dir /tmp/synthetic --cases load_and_process_image \
+        --compare baseline.json
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic import add_dataset_arguments, dataset_kwargs, prepare_dataset  # noqa: E402
+
+# 图片处理宽度（与网页主视图相同）
+IMAGE_WIDTH = 800
+# PDF 导出每页的行数
+PDF_ROWS = 5
+# 结果文件格式版本
+RESULTS_VERSION = 1
+
+
+def _load_config(info: Dict) -> Dict:
+    from utils.json_loader import parse_json_config
+
+    config, error = parse_json_config(Path(info["config_path"]).read_bytes())
+    if config is None:
+        raise RuntimeError(error)
+    return config
+
+
+def _existing_images(config: Dict) -> List[Path]:
+    base_dir = Path(config["base_dir"])
+    paths = []
+    for sample in config["samples"]:
+        for rel in sample["images"].values():
+            if rel is not None and (base_dir / rel).is_file():
+                paths.append(base_dir / rel)
+    return paths
+
+
+# ---- 用例：setup(info) -> state（不计时），run(state) -> 处理的数量 ----
+
+
+def setup_folders(info: Dict):
+    return [Path(folder) for folder in info["folders"]]
+
+
+def run_folders(folders) -> int:
+    from utils.folder_loader import build_config_from_folders
+
+    config, stats = build_config_from_folders(folders)
+    return stats["num_samples"]
+
+
+def setup_json(info: Dict):
+    return Path(info["config_path"]).read_bytes()
+
+
+def run_json(content: bytes) -> int:
+    from utils.json_loader import parse_json_config
+
+    config, _ = parse_json_config(content)
+    return len(config["samples"])
+
+
+def setup_images(info: Dict):
+    return _existing_images(_load_config(info))
+
+
+def run_images(paths: List[Path]) -> int:
+    from utils.image_processing import load_and_process_image
+
+    for path in paths:
+        load_and_process_image(path, IMAGE_WIDTH, False)
+    return len(paths)
+
+
+def setup_masks(info: Dict):
+    from utils.image_processing import load_and_process_image
+    from utils.mask import load_mask
+
+    config = _load_config(info)
+    base_dir = Path(config["base_dir"])
+    pairs = []
+    for sample in config["samples"]:
+        if not sample.get("mask"):
+            continue
+        for rel in sample["images"].values():
+            if rel is not None and (base_dir / rel).is_file():
+                image, _, _ = load_and_process_image(base_dir / rel, IMAGE_WIDTH, False)
+                pairs.append((image, load_mask(base_dir / sample["mask"], image.size)))
+    return pairs
+
+
+def run_masks(pairs) -> int:
+    from utils.mask import apply_mask_to_image
+
+    for image, mask in pairs:
+        apply_mask_to_image(image, mask, 0.5)
+    return len(pairs)
+
+
+def setup_crops(info: Dict):
+    from PIL import Image
+
+    config = _load_config(info)
+    base_dir = Path(config["base_dir"])
+    boxes = []
+    for sample in config["samples"]:
+        first = next(iter(sample["images"].values()))
+        with Image.open(base_dir / first) as img:
+            width, height = img.size
+        # 中心四分之一区域
+        boxes.append((width // 4, height // 4, width * 3 // 4, height * 3 // 4))
+    return config, boxes
+
+
+def run_crops(state) -> int:
+    from services.crop_manager import save_crop_for_sample
+
+    config, boxes = state
+    crop_data = {}
+    for idx, box in enumerate(boxes):
+        save_crop_for_sample(
+            crop_data,
+            idx,
+            box,
+            config["samples"],
+            config["methods"],
+            Path(config["base_dir"]),
+            IMAGE_WIDTH,
+            crop_id="bench",
+            color="#00ff00",
+        )
+    return len(boxes)
+
+
+def setup_pdf(info: Dict):
+    from config.languages import LANGUAGES
+
+    return _load_config(info), LANGUAGES["en"]
+
+
+def run_pdf(state) -> int:
+    from services.image_prep import get_image_cache
+    from services.pdf_export import generate_pdf_from_current_view
+
+    config, lang = state
+    samples = config["samples"]
+    # 每次都从解码开始，不复用上一轮的缓存
+    get_image_cache().clear()
+    for start in range(0, len(samples), PDF_ROWS):
+        generate_pdf_from_current_view(
+            samples=samples,
+            methods=config["methods"],
+            base_dir=Path(config["base_dir"]),
+            start_idx=start,
+            num_rows=PDF_ROWS,
+            show_method_name=True,
+            show_text=True,
+            show_sample_name=True,
+            show_descriptions=False,
+            close_view_enabled=False,
+            crop_data={},
+            preserve_aspect_ratio=False,
+            lang=lang,
+            use_mask=True,
+            image_width=IMAGE_WIDTH,
+        )
+    return len(samples)
+
+
+# 用例名称 -> (setup, run, 单位)
+CASES: Dict[str, Tuple[Callable, Callable, str]] = {
+    "build_config_from_folders": (setup_folders, run_folders, "samples"),
+    "parse_json_config": (setup_json, run_json, "samples"),
+    "load_and_process_image": (setup_images, run_images, "images"),
+    "apply_mask_to_image": (setup_masks, run_masks, "images"),
+    "save_crop_for_sample": (setup_crops, run_crops, "samples"),
+    "generate_pdf_from_current_view": (setup_pdf, run_pdf, "samples"),
+}
+
+
+def _peak_rss() -> int:
+    """
+    进程峰值 RSS（字节）
+    Linux 上读取 VmHWM（exec 后重新计算，不包含父进程）；其他平台使用 ru_maxrss
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _reset_peak_rss() -> bool:
+    """把峰值 RSS 重置为当前值（Linux），使峰值不包含 setup 阶段"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _current_rss() -> int:
+    """当前 RSS（字节），不支持时返回峰值"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return _peak_rss()
+
+
+def run_case(name: str, info: Dict, repeat: int) -> Dict:
+    """在子进程中运行一个用例"""
+    setup, run, unit = CASES[name]
+    state = setup(info)
+    gc.collect()
+    rss_before = _current_rss()
+    peak_reset = _reset_peak_rss()
+
+    times = []
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = run(state)
+        times.append(time.perf_counter() - start)
+
+    median = statistics.median(times)
+    peak = _peak_rss()
+    return {
+        "case": name,
+        "unit": unit,
+        "count": count,
+        "times_s": [round(t, 6) for t in times],
+        "median_s": round(median, 6),
+        "throughput": round(count / median, 3) if median else None,
+        "peak_rss_mb": round(peak / 2**20, 1),
+        "rss_growth_mb": round(max(0, peak - rss_before) / 2**20, 1),
+        # False 时峰值包含 setup 阶段
+        "peak_excludes_setup": peak_reset,
+    }
+
+
+def _git_revision() -> Dict:
+    def git(*args) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(status) if status is not None else None}
+
+
+def collect_metadata(args: argparse.Namespace, info: Dict) -> Dict:
+    return {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        **_git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "image_width": IMAGE_WIDTH,
+        "dataset": {
+            "samples": args.samples,
+            "methods": args.methods,
+            "sizes": args.sizes,
+            "formats": args.formats,
+            "mask_ratio": args.mask_ratio,
+            "missing_ratio": args.missing_ratio,
+            "seed": args.seed,
+            "num_images": info["num_images"],
+            "num_masks": info["num_masks"],
+            "num_missing": info["num_missing"],
+        },
+    }
+
+
+def print_results(results: List[Dict], baseline: Optional[Dict] = None):
+    """打印结果表；给出基准结果时显示吞吐量比值和峰值内存变化"""
+    base = {r["case"]: r for r in baseline["results"]} if baseline else {}
+    header = f"{'case':<32}{'median (s)':>12}{'throughput':>21}{'peak RSS (MB)':>15}"
+    if base:
+        header += f"{'vs base':>10}{'Δ peak (MB)':>13}"
+    print(header)
+    for r in results:
+        line = (
+            f"{r['case']:<32}{r['median_s']:>12.3f}"
+            f"{(r['throughput'] or 0):>12.1f} {r['unit'] + '/s':<8}{r['peak_rss_mb']:>15.1f}"
+        )
+        old = base.get(r["case"])
+        if old and old.get("throughput") and r["throughput"]:
+            line += f"{r['throughput'] / old['throughput']:>9.2f}x"
+            line += f"{r['peak_rss_mb'] - old['peak_rss_mb']:>+13.1f}"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_dataset_arguments(parser)
+    parser.add_argument("--data-dir", type=Path, help="数据集目录（保留并在参数相同时复用），默认使用临时目录")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例的重复次数（取中位数）")
+    parser.add_argument("--output", type=Path, help="结果 JSON 文件")
+    parser.add_argument("--compare", type=Path, help="与之前的结果 JSON 对比")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # --data-dir 中已有相同参数的数据集时直接复用
+        info = prepare_dataset(args.data_dir or Path(tmp) / "synthetic", **dataset_kwargs(args))
+        results = []
+        for name in args.cases:
+            print(f"运行 {name} ...", file=sys.stderr)
+            # 每个用例一个新进程：峰值 RSS 只包含该用例
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                results.append(executor.submit(run_case, name, info, args.repeat).result())
+
+    report = {"meta": collect_metadata(args, info), "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    print_results(results, baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+启动性能报告：各模块的导入耗时和首次渲染耗时
+
+每次测量都在新的解释器中进行（python -X importtime），多次运行取中位数。
+报告按顶层包汇总自身耗时，列出累计耗时最多的模块，并检查重型依赖
+（ReportLab、streamlit_cropper、NumPy）是否在启动时被加载。
+
+用法:
+    python benchmarks/import_time.py                       # 导入 app
+    python benchmarks/import_time.py app cli --repeat 7 --top 30
+    python benchmarks/import_time.py --first-render --output startup.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_suite import _git_revision  # noqa: E402
+
+# 应在第一次使用时才加载的重型依赖
+HEAVY_PACKAGES = ("reportlab", "streamlit_cropper", "numpy", "pandas")
+# 本项目的顶层包（报告中标出）
+PROJECT_PACKAGES = ("app", "cli", "config", "utils", "services", "ui")
+
+# 首次渲染：在新的解释器中用 AppTest 运行一次页面（包含导入 app 的时间）
+FIRST_RENDER_CODE = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+print(time.perf_counter() - start)
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """
+    解析 -X importtime 的输出
+    返回: {模块: (自身耗时 us, 累计耗时 us)}
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            # 表头行
+            continue
+        modules[parts[2].strip()] = (self_us, cumulative_us)
+    return modules
+
+
+def measure_imports(target: str) -> Dict[str, Tuple[int, int]]:
+    """在新的解释器中导入一个模块，返回各模块的导入耗时"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {target} 失败:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def measure_first_render() -> float:
+    """在新的解释器中完成第一次页面渲染的耗时（秒）"""
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_RENDER_CODE],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"首次渲染失败:\n{result.stderr[-2000:]}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def summarize_imports(target: str, runs: List[Dict[str, Tuple[int, int]]], top: int) -> Dict:
+    """多次运行取中位数，汇总为报告"""
+    names = set().union(*runs)
+    self_ms = {}
+    cumulative_ms = {}
+    for name in names:
+        samples = [run[name] for run in runs if name in run]
+        self_ms[name] = statistics.median(s for s, _ in samples) / 1000
+        cumulative_ms[name] = statistics.median(c for _, c in samples) / 1000
+
+    packages = defaultdict(float)
+    for name, ms in self_ms.items():
+        packages[name.split(".")[0]] += ms
+
+    return {
+        "target": target,
+        "total_ms": round(cumulative_ms.get(target, 0.0), 1),
+        "num_modules": len(names),
+        "heavy_loaded": [name for name in HEAVY_PACKAGES if name in names],
+        "packages": {
+            name: round(ms, 1)
+            for name, ms in sorted(packages.items(), key=lambda item: -item[1])
+        },
+        "modules": [
+            {"module": name, "cumulative_ms": round(cumulative_ms[name], 1), "self_ms": round(self_ms[name], 1)}
+            for name in sorted(names, key=lambda n: -cumulative_ms[n])[:top]
+        ],
+    }
+
+
+def print_report(report: Dict, top_packages: int = 15):
+    for entry in report["imports"]:
+        print(f"== import {entry['target']}: {entry['total_ms']:.1f} ms（{entry['num_modules']} 个模块）")
+        heavy = ", ".join(entry["heavy_loaded"]) or "无"
+        print(f"启动时加载的重型依赖: {heavy}")
+
+        print(f"\n{'package':<32}{'self (ms)':>12}")
+        for name, ms in list(entry["packages"].items())[:top_packages]:
+            marker = " *" if name in PROJECT_PACKAGES else ""
+            print(f"{name:<32}{ms:>12.1f}{marker}")
+
+        print(f"\n{'module':<56}{'cumulative (ms)':>16}{'self (ms)':>12}")
+        for module in entry["modules"]:
+            print(f"{module['module']:<56}{module['cumulative_ms']:>16.1f}{module['self_ms']:>12.1f}")
+        print()
+
+    first_render = report.get("first_render")
+    if first_render:
+        print(
+            f"首次渲染: 中位数 {first_render['median_s'] * 1000:.0f} ms"
+            f"（{', '.join(f'{t * 1000:.0f}' for t in first_render['times_s'])} ms）"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("targets", nargs="*", default=["app"], help="要导入的模块（默认 app）")
+    parser.add_argument("--repeat", type=int, default=5, help="每项测量的运行次数（取中位数）")
+    parser.add_argument("--top", type=int, default=25, help="列出累计耗时最多的模块数")
+    parser.add_argument("--first-render", action="store_true", help="同时测量首次页面渲染的耗时（AppTest）")
+    parser.add_argument("--output", type=Path, help="结果 JSON 文件")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            **_git_revision(),
+            "python": sys.version.split()[0],
+            "repeat": args.repeat,
+        },
+        "imports": [],
+    }
+    for target in args.targets:
+        print(f"测量 import {target} ...", file=sys.stderr)
+        runs = [measure_imports(target) for _ in range(args.repeat)]
+        report["imports"].append(summarize_imports(target, runs, args.top))
+
+    if args.first_render:
+        print("测量首次渲染 ...", file=sys.stderr)
+        times = [measure_first_render() for _ in range(args.repeat)]
+        report["first_render"] = {
+            "times_s": [round(t, 4) for t in times],
+            "median_s": round(statistics.median(times), 4),
+        }
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+多 session 负载测试：在一个进程中用 Streamlit AppTest 并发驱动 N 个模拟 session
+
+所有 session 与真实服务一样共享进程内的配置缓存、图片缓存和导出任务。
+每个 session 先打开合成数据集（JSONL 清单模式），再按脚本随机执行操作：
+翻页、切换 mask、添加 Close View、导出 PDF。记录每种操作的延迟分位数，
+以及整个进程的 CPU 时间和 RSS，用于衡量服务容量的回归。
+
+说明:
+    - AppTest 不支持多个线程同时运行脚本（各实例共享同一个 Runtime，并发运行会抛出
+      "Runtime hasn't been created!" 等错误），所有 session 的脚本运行由一个锁串行执行；
+      等待锁的时间单独统计，不计入操作延迟。后台导出任务和共享缓存仍然并发
+    - 添加 Close View 时裁剪框编辑器（自定义组件）无法在 AppTest 中操作，
+      改为直接调用 save_crop_for_sample 写入 session 后重新运行，计时包含两者
+    - 导出的延迟为点击到后台任务完成的时间；当前视图已有完成的导出时记为 export_cached，
+      其他 session 正在导出同一视图时等待该任务完成，记为 export_shared
+    - 应用抛出的异常（AppTest 中显示的错误）计入 errors，测试脚本自身的异常
+      （找不到控件、超时等）单独计入 harness_errors，两者都不计入延迟分位数
+
+用法:
+    python benchmarks/load_test.py --sessions 10 --steps 20 --script review --output load.json
+    python benchmarks/load_test.py --sessions 10 --steps 20 --compare load.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from config.constants import MAX_CROPS_PER_SAMPLE  # noqa: E402
+from config.languages import LANGUAGES  # noqa: E402
+from utils.manifest_loader import load_manifest  # noqa: E402
+from services.crop_manager import save_crop_for_sample  # noqa: E402
+from services.export_jobs import JOB_RUNNING, get_export_registry  # noqa: E402
+from synthetic import add_dataset_arguments, dataset_kwargs, prepare_dataset  # noqa: E402
+from bench_suite import _git_revision  # noqa: E402
+
+APP_PATH = ROOT / "app.py"
+# 界面语言（按标签查找没有 key 的控件）
+LANG = LANGUAGES["zh"]
+# 操作脚本：操作 -> 权重
+SCRIPTS = {
+    "browse": {"page_forward": 1},
+    "review": {"page_forward": 6, "toggle_mask": 1, "add_crop": 2, "export": 1},
+    "export": {"page_forward": 1, "export": 1},
+}
+# RSS 采样间隔（秒）
+RSS_SAMPLE_INTERVAL = 0.2
+PERCENTILES = (50, 90, 95, 99)
+RESULTS_VERSION = 2
+# 导出状态轮询间隔（秒）
+EXPORT_POLL_INTERVAL = 0.05
+
+# AppTest 的脚本运行锁（进程内所有模拟 session 共享）
+_APP_LOCK = threading.Lock()
+
+
+def _current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class RssMonitor(threading.Thread):
+    """后台定时采样进程 RSS"""
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples: List[int] = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.samples.append(_current_rss())
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class SimulatedSession:
+    """一个模拟用户：持有自己的 AppTest（独立的 session_state）"""
+
+    def __init__(self, number: int, dataset: Dict, config: Dict, args: argparse.Namespace):
+        self.number = number
+        self.dataset = dataset
+        self.config = config
+        self.args = args
+        self.rng = random.Random(args.seed * 1000 + number)
+        self.records: List[Dict] = []
+        self.at: Optional[AppTest] = None
+        self._lock_wait = 0.0
+
+    @contextmanager
+    def _app(self):
+        """持有脚本运行锁操作 AppTest；等待锁的时间记入当前操作的 lock_wait"""
+        start = time.perf_counter()
+        with _APP_LOCK:
+            self._lock_wait += time.perf_counter() - start
+            yield
+
+    def _record(self, action: str, func: Callable[[], Optional[str]]):
+        """
+        执行并记录一个操作
+        func 可以返回实际的操作名（如导出命中已有结果时），否则使用 action
+        """
+        self._lock_wait = 0.0
+        start = time.perf_counter()
+        error = None
+        harness_error = None
+        try:
+            action = func() or action
+            if self.at is not None and len(self.at.exception):
+                error = self.at.exception[0].value
+        except Exception as e:  # 记录后继续，负载测试不因单个操作失败而中止
+            harness_error = f"{type(e).__name__}: {e}"
+        self.records.append(
+            {
+                "session": self.number,
+                "action": action,
+                "seconds": time.perf_counter() - start - self._lock_wait,
+                "lock_wait": self._lock_wait,
+                "error": error,
+                "harness_error": harness_error,
+            }
+        )
+
+    def _widget(self, widgets, label: str):
+        return next(w for w in widgets if w.label == label)
+
+    # ---- 操作 ----
+
+    def open(self):
+        with self._app():
+            self.at = AppTest.from_file(str(APP_PATH), default_timeout=self.args.timeout)
+            self.at.run()
+            self.at.radio(key="input_mode").set_value("manifest").run()
+            self._widget(self.at.text_input, LANG["manifest_path_label"]).input(
+                self.dataset["manifest_path"]
+            ).run()
+            if self.args.rows > 1:
+                self._widget(self.at.number_input, LANG["num_rows_label"]).set_value(
+                    self.args.rows
+                ).run()
+
+    def page_forward(self):
+        with self._app():
+            next_btn = self.at.button(key="next_btn")
+            if next_btn.disabled:
+                # 到达末尾时回到第一页
+                self.at.session_state.selected_sample_idx = 0
+                self.at.run()
+            else:
+                next_btn.click().run()
+
+    def toggle_mask(self):
+        with self._app():
+            checkbox = self.at.checkbox(key="use_mask_checkbox")
+            checkbox.set_value(not checkbox.value).run()
+
+    def add_crop(self):
+        with self._app():
+            if not self.at.session_state.close_view_enabled:
+                self._widget(self.at.checkbox, LANG["close_view"]).check().run()
+            sample_idx = self.at.session_state.selected_sample_idx
+            crop_data = self.at.session_state.crop_data
+            crops = crop_data.get(sample_idx, {}).get("crops", [])
+            if len(crops) >= MAX_CROPS_PER_SAMPLE:
+                crop_data.pop(sample_idx)
+                crops = []
+            # 原图坐标中的随机裁剪框（合成图片至少 256 像素）
+            left, top = self.rng.randrange(0, 128), self.rng.randrange(0, 128)
+            size = self.rng.randrange(64, 128)
+            counter = self.at.session_state.next_crop_id_counter
+            save_crop_for_sample(
+                crop_data,
+                sample_idx,
+                (left, top, left + size, top + size),
+                self.config["samples"],
+                self.config["methods"],
+                Path(self.config["base_dir"]),
+                800,
+                crop_id=f"load_{self.number}_{counter}",
+                color="#00ff00",
+            )
+            self.at.session_state.crop_data = crop_data
+            self.at.session_state.next_crop_id_counter = counter + 1
+            self.at.run()
+
+    def _export_state(self) -> str:
+        """
+        当前视图的导出按钮状态:
+            ready: 可以开始导出 / disabled: 按钮禁用（正在编辑 crop）
+            done: 已有完成的导出（显示下载按钮） / running: 导出进行中（显示进度）
+        """
+        if any(w.key == "save_pdf_btn" for w in self.at.get("download_button")):
+            return "done"
+        buttons = [b for b in self.at.button if b.key == "save_pdf_btn"]
+        if not buttons:
+            return "running"
+        return "disabled" if buttons[0].disabled else "ready"
+
+    def export(self) -> Optional[str]:
+        with self._app():
+            state = self._export_state()
+            if state == "ready":
+                self.at.button(key="save_pdf_btn").click().run()
+                fingerprint = self.at.session_state.timing_export_fingerprint
+        if state == "done":
+            return "export_cached"
+        if state == "disabled":
+            raise RuntimeError("export button is disabled")
+
+        deadline = time.monotonic() + self.args.timeout
+        if state == "ready":
+            # 自己提交的任务：直接查询任务注册表，不占用脚本运行锁
+            registry = get_export_registry()
+            while time.monotonic() < deadline:
+                job = registry.get(fingerprint) if fingerprint else None
+                if job is None or job["status"] != JOB_RUNNING:
+                    return None
+                time.sleep(EXPORT_POLL_INTERVAL)
+        else:
+            # 其他 session 正在导出同一视图：重新运行直到显示下载按钮或导出按钮
+            while time.monotonic() < deadline:
+                time.sleep(EXPORT_POLL_INTERVAL)
+                with self._app():
+                    self.at.run()
+                    if self._export_state() != "running":
+                        return "export_shared"
+        raise TimeoutError("export did not finish")
+
+    # ---- 脚本 ----
+
+    def run(self, start_barrier: threading.Barrier):
+        start_barrier.wait()
+        time.sleep(self.number * self.args.ramp_up / max(1, self.args.sessions))
+        self._record("open", self.open)
+        if self.records[-1]["error"] or self.records[-1]["harness_error"]:
+            return
+
+        weights = SCRIPTS[self.args.script]
+        actions = list(weights)
+        for _ in range(self.args.steps):
+            if self.args.think_time > 0:
+                time.sleep(self.rng.expovariate(1 / self.args.think_time))
+            action = self.rng.choices(actions, weights=[weights[a] for a in actions])[0]
+            self._record(action, getattr(self, action))
+
+
+def percentile(values: List[float], p: float) -> float:
+    """最近秩法分位数"""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+def summarize(records: List[Dict]) -> Dict[str, Dict]:
+    """按操作汇总延迟（毫秒）"""
+    by_action: Dict[str, List[Dict]] = {}
+    for record in records:
+        by_action.setdefault(record["action"], []).append(record)
+
+    summary = {}
+    for action, items in by_action.items():
+        ok = [r["seconds"] * 1000 for r in items if not r["error"] and not r["harness_error"]]
+        errors = [r["error"] for r in items if r["error"]]
+        harness_errors = [r["harness_error"] for r in items if r["harness_error"]]
+        summary[action] = {
+            "count": len(items),
+            "errors": len(errors),
+            "first_error": errors[0] if errors else None,
+            "harness_errors": len(harness_errors),
+            "first_harness_error": harness_errors[0] if harness_errors else None,
+            "lock_wait_mean_ms": round(statistics.fmean(r["lock_wait"] for r in items) * 1000, 1),
+            "mean_ms": round(statistics.fmean(ok), 1) if ok else None,
+            **{f"p{p}_ms": round(percentile(ok, p), 1) if ok else None for p in PERCENTILES},
+            "max_ms": round(max(ok), 1) if ok else None,
+        }
+    return summary
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    """打印结果表；给出基准结果时显示 p95 比值"""
+    base = baseline["actions"] if baseline else {}
+    header = f"{'action':<14}{'count':>7}{'err':>5}{'h.err':>7}" + "".join(
+        f"{'p' + str(p) + ' (ms)':>11}" for p in PERCENTILES
+    ) + f"{'max (ms)':>11}"
+    if base:
+        header += f"{'p95 vs base':>13}"
+    print(header)
+    for action, row in sorted(report["actions"].items()):
+        line = f"{action:<14}{row['count']:>7}{row['errors']:>5}{row.get('harness_errors', 0):>7}" + "".join(
+            f"{row[f'p{p}_ms'] or 0:>11.1f}" for p in PERCENTILES
+        ) + f"{row['max_ms'] or 0:>11.1f}"
+        old = base.get(action)
+        if old and old.get("p95_ms") and row["p95_ms"]:
+            line += f"{row['p95_ms'] / old['p95_ms']:>12.2f}x"
+        print(line)
+        if row["first_error"]:
+            print(f"    error: {row['first_error']}")
+        if row.get("first_harness_error"):
+            print(f"    harness error: {row['first_harness_error']}")
+
+    process = report["process"]
+    print(
+        f"\nwall {process['wall_s']:.1f}s, CPU {process['cpu_s']:.1f}s "
+        f"({process['cpu_utilization']:.2f} cores), "
+        f"{process['actions_per_s']:.2f} actions/s, "
+        f"script lock wait {process['lock_wait_s']:.1f}s"
+    )
+    print(
+        f"RSS start {process['rss_start_mb']:.0f} MB, peak {process['rss_peak_mb']:.0f} MB, "
+        f"end {process['rss_end_mb']:.0f} MB"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_dataset_arguments(parser)
+    parser.set_defaults(samples=40, methods=4, sizes=["512x512"])
+    parser.add_argument("--data-dir", type=Path, help="数据集目录（保留并在参数相同时复用），默认使用临时目录")
+    parser.add_argument("--sessions", type=int, default=10, help="并发 session 数")
+    parser.add_argument("--steps", type=int, default=20, help="每个 session 的操作数（不含打开）")
+    parser.add_argument("--script", choices=sorted(SCRIPTS), default="review")
+    parser.add_argument("--rows", type=int, default=2, help="每页显示的行数")
+    parser.add_argument("--think-time", type=float, default=0.2, help="操作间平均间隔（秒，指数分布）")
+    parser.add_argument("--ramp-up", type=float, default=1.0, help="所有 session 依次启动的总时长（秒）")
+    parser.add_argument("--timeout", type=float, default=120.0, help="单次运行/导出的超时（秒）")
+    parser.add_argument("--output", type=Path, help="结果 JSON 文件")
+    parser.add_argument("--compare", type=Path, help="与之前的结果 JSON 对比")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = prepare_dataset(args.data_dir or Path(tmp) / "synthetic", **dataset_kwargs(args))
+        config, stats = load_manifest(Path(dataset["manifest_path"]))
+        if config is None:
+            raise SystemExit(f"无法加载清单: {stats.get('errors')}")
+
+        sessions = [SimulatedSession(i, dataset, config, args) for i in range(args.sessions)]
+        barrier = threading.Barrier(len(sessions))
+        threads = [
+            threading.Thread(target=s.run, args=(barrier,), name=f"session-{s.number}")
+            for s in sessions
+        ]
+
+        monitor = RssMonitor()
+        rss_start = _current_rss()
+        cpu_start = _cpu_seconds()
+        wall_start = time.perf_counter()
+        monitor.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - wall_start
+        cpu = _cpu_seconds() - cpu_start
+        monitor.stop()
+
+    records = [record for s in sessions for record in s.records]
+    report = {
+        "meta": {
+            "version": RESULTS_VERSION,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            **_git_revision(),
+            "cpu_count": os.cpu_count(),
+            "sessions": args.sessions,
+            "steps": args.steps,
+            "script": args.script,
+            "rows": args.rows,
+            "think_time": args.think_time,
+            "dataset": {
+                "samples": args.samples,
+                "methods": args.methods,
+                "sizes": args.sizes,
+                "formats": args.formats,
+                "mask_ratio": args.mask_ratio,
+            },
+        },
+        "actions": summarize(records),
+        "process": {
+            "wall_s": round(wall, 3),
+            "cpu_s": round(cpu, 3),
+            "cpu_utilization": round(cpu / wall, 3) if wall else None,
+            "actions_per_s": round(len(records) / wall, 3) if wall else None,
+            "lock_wait_s": round(sum(r["lock_wait"] for r in records), 3),
+            "rss_start_mb": round(rss_start / 2**20, 1),
+            "rss_peak_mb": round(max(monitor.samples + [rss_start]) / 2**20, 1),
+            "rss_end_mb": round(_current_rss() / 2**20, 1),
+        },
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    print_report(report, baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+合成数据集生成器（基准测试用）
+
+按 样本 × 方法 × 分辨率 × 格式 生成图片，可带 mask 和缺失文件，
+同时输出三种布局（引用同一批图片）：
+    <root>/results/<方法>/<样本>.<格式>   文件夹列表模式（每个方法一个文件夹）
+    <root>/config.json                    JSON 配置模式（含 mask 和文本）
+    <root>/manifest.jsonl                 JSONL 清单模式（第一行为表头，含 mask 和文本）
+
+用法:
+    python benchmarks/synthetic.py --out /tmp/synthetic --samples 200 --methods 6 \
+        --sizes 1024x1024 1920x1080 --formats png jpg webp --mask-ratio 0.5 --missing-ratio 0.05
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+# 数据集布局版本（布局变化后不再复用旧目录中的数据集）
+DATASET_VERSION = 2
+
+# 格式 -> (PIL 格式, 保存参数)
+SAVE_OPTIONS = {
+    "png": ("PNG", {"compress_level": 1}),
+    "jpg": ("JPEG", {"quality": 92}),
+    "webp": ("WEBP", {"quality": 90}),
+}
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    """解析 "宽x高" 或单个边长"""
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height or width)
+
+
+def make_image(size: Tuple[int, int], seed: int) -> Image.Image:
+    """生成平滑的类照片图片（低频噪声 + 模糊），压缩特性接近真实结果图"""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    small = rng.integers(
+        0, 256, (max(2, height // 32), max(2, width // 32), 3), dtype=np.uint8
+    )
+    img = Image.fromarray(small).resize((width, height), Image.Resampling.BICUBIC)
+    return img.filter(ImageFilter.GaussianBlur(2))
+
+
+def make_mask(size: Tuple[int, int], seed: int) -> Image.Image:
+    """生成前景为椭圆的灰度 mask"""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    cx, cy = rng.uniform(0.3, 0.7) * width, rng.uniform(0.3, 0.7) * height
+    rx, ry = rng.uniform(0.15, 0.3) * width, rng.uniform(0.15, 0.3) * height
+    mask = Image.new("L", size, 0)
+    ImageDraw.Draw(mask).ellipse((cx - rx, cy - ry, cx + rx, cy + ry), fill=255)
+    return mask
+
+
+def generate_dataset(
+    root: Path,
+    num_samples: int,
+    num_methods: int,
+    sizes: Sequence[Tuple[int, int]] = ((1024, 1024),),
+    formats: Sequence[str] = ("png",),
+    mask_ratio: float = 0.0,
+    missing_ratio: float = 0.0,
+    seed: int = 0,
+) -> Dict:
+    """
+    生成合成数据集
+    参数:
+        root: 输出目录
+        sizes: 分辨率列表，样本依次循环使用
+        formats: 图片格式列表（png / jpg / webp），样本依次循环使用
+        mask_ratio: 带 mask 的样本比例
+        missing_ratio: 缺少一张方法图片的样本比例（不缺第一个方法，文件夹模式以它为准）
+    返回:
+        {"root", "config_path", "manifest_path", "folders", "num_samples", "num_methods", "num_images",
+         "num_masks", "num_missing"}
+    """
+    root = Path(root)
+    rng = np.random.default_rng(seed)
+    method_names = [f"method_{m:02d}" for m in range(num_methods)]
+    folders = [root / "results" / name for name in method_names]
+    for folder in folders:
+        folder.mkdir(parents=True, exist_ok=True)
+    (root / "masks").mkdir(parents=True, exist_ok=True)
+
+    samples = []
+    num_images = num_masks = num_missing = 0
+    for i in range(num_samples):
+        name = f"sample_{i:06d}"
+        size = sizes[i % len(sizes)]
+        ext = formats[i % len(formats)]
+        pil_format, save_kwargs = SAVE_OPTIONS[ext]
+
+        missing_method = None
+        if num_methods > 1 and rng.random() < missing_ratio:
+            missing_method = int(rng.integers(1, num_methods))
+            num_missing += 1
+
+        images = {}
+        for m, method_name in enumerate(method_names):
+            rel = f"results/{method_name}/{name}.{ext}"
+            images[method_name] = rel
+            if m == missing_method:
+                continue
+            make_image(size, seed * 1_000_003 + i * num_methods + m).save(
+                root / rel, pil_format, **save_kwargs
+            )
+            num_images += 1
+
+        sample = {"name": name, "text": f"synthetic sample {i} {size[0]}x{size[1]} {ext}", "images": images}
+        if rng.random() < mask_ratio:
+            sample["mask"] = f"masks/{name}.png"
+            make_mask(size, seed + i).save(root / sample["mask"])
+            num_masks += 1
+        samples.append(sample)
+
+    config = {
+        "base_dir": str(root.resolve()),
+        "methods": [{"name": name, "description": f"synthetic {name}"} for name in method_names],
+        "samples": samples,
+    }
+    config_path = root / "config.json"
+    config_path.write_text(json.dumps(config, ensure_ascii=False), encoding="utf-8")
+
+    manifest_path = root / "manifest.jsonl"
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        header = {"base_dir": config["base_dir"], "methods": config["methods"]}
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for sample in samples:
+            f.write(json.dumps(sample, ensure_ascii=False) + "\n")
+
+    return {
+        "root": str(root),
+        "config_path": str(config_path),
+        "manifest_path": str(manifest_path),
+        "folders": [str(folder) for folder in folders],
+        "num_samples": num_samples,
+        "num_methods": num_methods,
+        "num_images": num_images,
+        "num_masks": num_masks,
+        "num_missing": num_missing,
+    }
+
+
+def prepare_dataset(root: Path, **kwargs) -> Dict:
+    """生成数据集；目录中已有相同参数生成的数据集时直接复用（参数见 generate_dataset）"""
+    root = Path(root)
+    params = json.dumps(
+        {
+            **kwargs,
+            "sizes": [list(size) for size in kwargs.get("sizes", ())],
+            "version": DATASET_VERSION,
+        },
+        sort_keys=True,
+    )
+    info_path = root / "dataset.json"
+    if info_path.is_file():
+        saved = json.loads(info_path.read_text(encoding="utf-8"))
+        if saved.get("params") == params:
+            print(f"复用数据集 {root}", file=sys.stderr)
+            return saved["info"]
+
+    print(f"生成数据集 {root} ...", file=sys.stderr)
+    info = generate_dataset(root, **kwargs)
+    info_path.write_text(json.dumps({"params": params, "info": info}), encoding="utf-8")
+    return info
+
+
+def add_dataset_arguments(parser: argparse.ArgumentParser):
+    """数据集参数（生成器和基准套件共用）"""
+    group = parser.add_argument_group("合成数据集")
+    group.add_argument("--samples", type=int, default=50)
+    group.add_argument("--methods", type=int, default=4)
+    group.add_argument("--sizes", nargs="+", default=["1024x1024"], help="分辨率，如 1024x1024 1920x1080")
+    group.add_argument("--formats", nargs="+", choices=sorted(SAVE_OPTIONS), default=["png", "jpg"])
+    group.add_argument("--mask-ratio", type=float, default=0.5)
+    group.add_argument("--missing-ratio", type=float, default=0.05)
+    group.add_argument("--seed", type=int, default=0)
+
+
+def dataset_kwargs(args: argparse.Namespace) -> Dict:
+    return dict(
+        num_samples=args.samples,
+        num_methods=args.methods,
+        sizes=[parse_size(s) for s in args.sizes],
+        formats=args.formats,
+        mask_ratio=args.mask_ratio,
+        missing_ratio=args.missing_ratio,
+        seed=args.seed,
+    )
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", type=Path, required=True, help="输出目录")
+    add_dataset_arguments(parser)
+    args = parser.parse_args(argv)
+    info = generate_dataset(args.out, **dataset_kwargs(args))
+    print(json.dumps(info, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+命令行批量导出（无界面，不导入 streamlit）
+
+示例:
+    python cli.py --folders /data/gt /data/ours /data/baseline -o review.pdf
+    python cli.py --json config.json --filter "夜景" --methods GT Ours --mask -o night.pdf
+    python cli.py --manifest samples.jsonl --start 100 --count 500 --volume 100 -o batch.zip
+    python cli.py --folders /data/gt /data/ours --format html -o gallery/
+    python cli.py --json config.json --format mosaic --mosaic-format webp -o slides/
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from itertools import cycle
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config.constants import (
+    CROP_COLORS,
+    EXPORT_FORMATS,
+    MOSAIC_IMAGE_FORMATS,
+    MAX_CROPS_PER_SAMPLE,
+    PDF_DEFAULT_DPI,
+    PDF_DPI_OPTIONS,
+    PDF_IMAGE_FORMATS,
+)
+from config.languages import LANGUAGES
+from utils.folder_loader import build_config_from_folders
+from utils.json_loader import parse_json_config
+from utils.manifest_loader import load_manifest
+from utils.sample_filter import FilteredSamples, SampleFilterIndex
+from utils.sample_index import SampleNameIndex
+from services.dataset_export import export_dataset_pdf
+from services.html_export import export_html_gallery
+from services.mosaic_export import export_mosaics
+
+
+class CliError(Exception):
+    """参数或配置错误（退出码 2）"""
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="多方法图片对比批量导出（无界面）",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+
+    source = parser.add_argument_group("数据来源（三选一）").add_mutually_exclusive_group(
+        required=True
+    )
+    source.add_argument(
+        "--json", type=Path, help="JSON 配置文件（相对 base_dir 相对于该文件所在目录）"
+    )
+    source.add_argument("--folders", type=Path, nargs="+", help="文件夹列表，每个文件夹为一个方法")
+    source.add_argument("--manifest", type=Path, help="JSONL / CSV 清单文件")
+
+    selection = parser.add_argument_group("样本与方法")
+    selection.add_argument("--filter", default="", help="按文本/名称关键词筛选（空格分隔，全部匹配）")
+    selection.add_argument("--name", default="", help="样本名称通配符，如 'scene_*'")
+    selection.add_argument("--has-mask", action="store_true", help="只导出带 mask 的样本")
+    selection.add_argument("--has-missing", action="store_true", help="只导出缺少图片的样本")
+    selection.add_argument("--start", type=int, default=0, help="起始位置（筛选后，从 0 开始）")
+    selection.add_argument("--count", type=int, default=0, help="导出的样本数，0 表示到末尾")
+    selection.add_argument("--methods", nargs="+", help="只导出这些方法（按名称）")
+
+    display = parser.add_argument_group("显示选项")
+    display.add_argument("--mask", action="store_true", help="应用 mask（背景变暗）")
+    display.add_argument("--darken", type=float, default=0.5, help="mask 背景变暗系数 (0-1)")
+    display.add_argument(
+        "--crops",
+        type=Path,
+        help="Close View 裁剪框 JSON：{样本名称: [{\"box\": [l, t, r, b], \"color\": \"#ff0000\"}]}",
+    )
+    display.add_argument("--image-width", type=int, default=800, help="图片处理宽度（像素）")
+    display.add_argument("--preserve-aspect-ratio", action="store_true", help="保持原始宽高比")
+    display.add_argument("--no-method-name", action="store_true", help="不显示方法名称")
+    display.add_argument("--no-sample-name", action="store_true", help="不显示样本名称")
+    display.add_argument("--no-text", action="store_true", help="不显示样本文本")
+    display.add_argument("--no-descriptions", action="store_true", help="不显示方法描述")
+    display.add_argument("--lang", choices=sorted(LANGUAGES), default="zh", help="文档语言")
+
+    output = parser.add_argument_group("输出")
+    output.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        required=True,
+        help="输出路径：PDF 文件；HTML 画廊和拼图为目录（须不存在或为空），以 .zip 结尾时打包",
+    )
+    output.add_argument("--format", choices=EXPORT_FORMATS, default="pdf", help="导出格式")
+    output.add_argument(
+        "--image-format", choices=PDF_IMAGE_FORMATS, default="jpeg", help="PDF 图片嵌入格式"
+    )
+    output.add_argument(
+        "--dpi",
+        type=int,
+        choices=PDF_DPI_OPTIONS,
+        default=PDF_DEFAULT_DPI,
+        help="PDF 图片分辨率",
+    )
+    output.add_argument("--volume", type=int, default=0, help="PDF 每卷样本数，分卷时输出 zip")
+    output.add_argument(
+        "--link-originals",
+        action="store_true",
+        help="HTML 画廊链接到原图的绝对路径，不复制原图",
+    )
+    output.add_argument(
+        "--mosaic-format", choices=MOSAIC_IMAGE_FORMATS, default="png", help="拼图图片格式"
+    )
+    output.add_argument(
+        "--samples-per-image", type=int, default=1, help="每张拼图包含的样本数"
+    )
+    output.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="图片处理进程数"
+    )
+    output.add_argument("-q", "--quiet", action="store_true", help="不输出进度")
+    return parser
+
+
+def load_config(args: argparse.Namespace, lang: Dict) -> Dict:
+    """按数据来源加载配置，加载失败时抛出 CliError"""
+    if args.json is not None:
+        try:
+            content = args.json.read_bytes()
+        except OSError as e:
+            raise CliError(str(e))
+        # 相对 base_dir 相对于 JSON 文件所在目录解析（与命令行的工作目录无关）
+        config, error = parse_json_config(content, args.json.expanduser().resolve().parent)
+        if config is None:
+            raise CliError(error)
+        return config
+
+    if args.folders is not None:
+        config, stats = build_config_from_folders([p.expanduser().resolve() for p in args.folders])
+    else:
+        config, stats = load_manifest(args.manifest.expanduser().resolve())
+    if config is None:
+        messages = []
+        for error in stats.get("errors", []):
+            key, _, detail = error.partition("|")
+            message = lang.get(key, key)
+            messages.append(f"{message}: {detail}" if detail else message)
+        raise CliError("\n".join(messages))
+    return config
+
+
+def select_samples(
+    samples: Sequence, methods: List[Dict], args: argparse.Namespace
+) -> Sequence:
+    """按筛选条件和位置范围选择样本，返回 FilteredSamples 视图（保留原始索引）"""
+    if args.filter.strip() or args.name.strip() or args.has_mask or args.has_missing:
+        indices = SampleFilterIndex(samples, methods).filter(
+            keywords=args.filter,
+            name_pattern=args.name,
+            require_mask=args.has_mask,
+            require_missing=args.has_missing,
+        )
+    else:
+        indices = np.arange(len(samples), dtype=np.int64)
+
+    if args.start < 0 or args.count < 0:
+        raise CliError("--start / --count 不能为负数")
+    stop = args.start + args.count if args.count else None
+    return FilteredSamples(samples, indices[args.start:stop])
+
+
+def load_crop_data(crops_path: Path, samples: FilteredSamples) -> Dict[int, Dict]:
+    """
+    读取 Close View 裁剪框，转换为按原始样本索引的 crop_data
+    样本名称通过名称索引查找（顺序读取一遍名称，不逐个按位置读取样本），
+    只保留所选范围内的样本；裁剪图片在导出时按需生成
+    """
+    try:
+        raw = json.loads(crops_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        raise CliError(f"{crops_path}: {e}")
+    if not isinstance(raw, dict):
+        raise CliError(f"{crops_path}: 应为 {{样本名称: [crop, ...]}}")
+
+    name_index = SampleNameIndex(sample["name"] for sample in samples.source)
+    crop_data = {}
+    for name, crops in raw.items():
+        if not isinstance(crops, list):
+            raise CliError(f"{crops_path}: {name} 的值应为裁剪框列表")
+        source_idx = name_index.lookup(name)
+        if source_idx is None or samples.position_of(source_idx) is None:
+            continue
+        colors = cycle(CROP_COLORS)
+        entries = []
+        for i, crop in enumerate(crops[:MAX_CROPS_PER_SAMPLE]):
+            box = crop.get("box") if isinstance(crop, dict) else crop
+            if (
+                not isinstance(box, (list, tuple))
+                or len(box) != 4
+                or not all(isinstance(v, (int, float)) for v in box)
+            ):
+                raise CliError(f"{crops_path}: {name} 的裁剪框格式错误")
+            color = next(colors)
+            entries.append(
+                {
+                    "id": f"cli_{i}",
+                    "color": crop.get("color", color) if isinstance(crop, dict) else color,
+                    "box": tuple(int(v) for v in box),
+                }
+            )
+        if entries:
+            crop_data[source_idx] = {"crops": entries}
+    return crop_data
+
+
+def make_progress_printer(quiet: bool):
+    """在 stderr 上输出进度和处理速度"""
+    if quiet:
+        return None
+    started = time.time()
+
+    def report(done: int, total: int):
+        elapsed = max(1e-6, time.time() - started)
+        sys.stderr.write(
+            f"\r{done}/{total} ({done / elapsed:.1f} samples/s)"
+            + ("\n" if done == total else "")
+        )
+        sys.stderr.flush()
+
+    return report
+
+
+def run(args: argparse.Namespace) -> Path:
+    lang = LANGUAGES[args.lang]
+    config = load_config(args, lang)
+    base_dir = Path(config["base_dir"])
+    methods = config["methods"]
+
+    if args.methods:
+        known = {m["name"] for m in methods}
+        unknown = [name for name in args.methods if name not in known]
+        if unknown:
+            raise CliError(f"未知的方法: {', '.join(unknown)}")
+
+    samples = select_samples(config["samples"], methods, args)
+    if len(samples) == 0:
+        raise CliError(lang["filter_no_results"])
+
+    crop_data = load_crop_data(args.crops, samples) if args.crops else {}
+
+    export_kwargs = dict(
+        samples=samples,
+        methods=methods,
+        base_dir=base_dir,
+        show_method_name=not args.no_method_name,
+        show_text=not args.no_text,
+        show_sample_name=not args.no_sample_name,
+        close_view_enabled=bool(crop_data),
+        crop_data=crop_data,
+        preserve_aspect_ratio=args.preserve_aspect_ratio,
+        lang=lang,
+        use_mask=args.mask,
+        darken_factor=args.darken,
+        image_width=args.image_width,
+        visible_methods=args.methods,
+        max_workers=max(1, args.workers),
+        progress_callback=make_progress_printer(args.quiet),
+    )
+    if args.format == "mosaic":
+        return export_mosaics(
+            output_path=args.output,
+            image_format=args.mosaic_format,
+            samples_per_image=args.samples_per_image,
+            **export_kwargs,
+        )
+    if args.format == "html":
+        return export_html_gallery(
+            output_path=args.output,
+            show_descriptions=not args.no_descriptions,
+            copy_originals=not args.link_originals,
+            **export_kwargs,
+        )
+    return export_dataset_pdf(
+        output_path=args.output.with_suffix(".pdf"),
+        show_descriptions=not args.no_descriptions,
+        image_format=args.image_format,
+        image_dpi=args.dpi,
+        samples_per_volume=args.volume,
+        **export_kwargs,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        result = run(args)
+    except (CliError, FileExistsError) as e:
+        # FileExistsError: 输出目录已存在且不为空（不会删除已有文件）
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    print(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
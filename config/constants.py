@@ -1,3 +1,6 @@
+import os
+from pathlib import Path
+
 # Color palette for multiple close views
 CROP_COLORS = [
     '#00ff00',  # Green
@@ -8,3 +11,81 @@ CROP_COLORS = [
 ]
 
 MAX_CROPS_PER_SAMPLE = 5
+
+# 样本搜索最多显示的结果数
+SAMPLE_SEARCH_MAX_RESULTS = 10
+
+# 清单模式下检测 mask 是否可用时检查的样本数
+MANIFEST_MASK_PROBE_SAMPLES = 200
+
+# 本地缓存目录（编译后的配置 sidecar 等），可通过环境变量 IMAGE_VIEWER_CACHE_DIR 覆盖
+CACHE_DIR = Path(
+    os.environ.get("IMAGE_VIEWER_CACHE_DIR", Path.home() / ".cache" / "image_viewer")
+)
+
+# 后台导出：缓存的导出结果数、并行任务数、进度刷新间隔（秒）
+EXPORT_CACHE_MAX_ENTRIES = 8
+EXPORT_MAX_WORKERS = 2
+EXPORT_POLL_INTERVAL = 0.5
+
+# 后台完整性检查：并行检查任务数（每个任务内部再用线程池检查文件）、缓存的报告数
+# （与导出任务分开，检查不会占用导出线程或挤掉导出结果）
+INTEGRITY_MAX_WORKERS = 1
+INTEGRITY_CACHE_MAX_ENTRIES = 4
+
+# 合成行模式：每行（及每个 Close View）拼成一张图片的最大宽度和列间距（像素）。
+# Streamlit 会把宽于 1460 像素（730 CSS 像素 × 2）的图片再缩小，直接按该宽度合成
+COMPOSITE_MAX_WIDTH = 1460
+COMPOSITE_GAP = 8
+
+# 深度缩放查看：瓦片金字塔的瓦片边长（像素）、瓦片 JPEG 质量、磁盘缓存目录和上限（字节），
+# 最大放大倍数（原图 1 像素最多显示为几个屏幕像素）
+TILE_SIZE = 256
+TILE_JPEG_QUALITY = 90
+TILE_CACHE_DIR = CACHE_DIR / "tiles"
+TILE_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+ZOOM_MAX_PIXEL_SCALE = 4
+
+# 处理后图片的进程内缓存上限（字节），网页显示和 PDF 导出共用
+IMAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# PDF 导出的图片嵌入方式：jpeg（有损压缩）或 lossless（无损）
+PDF_IMAGE_FORMATS = ("jpeg", "lossless")
+# 按实际绘制尺寸降采样的目标分辨率（DPI）可选值
+PDF_DPI_OPTIONS = (96, 150, 200, 300)
+PDF_DEFAULT_DPI = 200
+PDF_JPEG_QUALITY = 90
+
+# 完整数据集导出：输出目录、默认每卷样本数（0 表示单个文件）
+EXPORT_DIR = CACHE_DIR / "exports"
+DATASET_EXPORT_DEFAULT_VOLUME = 0
+
+# HTML 画廊导出：页面内容最大宽度（CSS 像素）、缩略图 WebP 质量
+HTML_GALLERY_PAGE_WIDTH = 1600
+HTML_THUMB_QUALITY = 80
+# 导出格式（界面和命令行）
+EXPORT_FORMATS = ("pdf", "html", "mosaic")
+
+# 拼图导出：输出图片格式、间距（像素）；标注字体可通过环境变量 IMAGE_VIEWER_FONT
+# 指定（需要显示中文时请指向 CJK 字体），默认使用 Pillow 内置字体
+MOSAIC_IMAGE_FORMATS = ("png", "webp", "jpeg")
+MOSAIC_GAP = 8
+MOSAIC_FONT_PATH = os.environ.get("IMAGE_VIEWER_FONT")
+
+# Session 内存预算（字节）：单个 session、全部 session 合计；超出时释放可重新计算的数据。
+# 可通过环境变量 IMAGE_VIEWER_SESSION_BUDGET_MB / IMAGE_VIEWER_GLOBAL_BUDGET_MB 覆盖
+SESSION_MEMORY_BUDGET = int(os.environ.get("IMAGE_VIEWER_SESSION_BUDGET_MB", 512)) * 1024 * 1024
+GLOBAL_MEMORY_BUDGET = int(os.environ.get("IMAGE_VIEWER_GLOBAL_BUDGET_MB", 2048)) * 1024 * 1024
+# 空闲超过该时间（秒）的 session 释放可重新计算的数据
+SESSION_IDLE_TIMEOUT = 30 * 60
+# 设置环境变量 IMAGE_VIEWER_ADMIN=1 时在侧边栏显示内存管理视图
+ADMIN_VIEW_ENABLED = os.environ.get("IMAGE_VIEWER_ADMIN") == "1"
+
+# 监控指标（Prometheus 文本格式），两种输出方式可同时启用：
+# IMAGE_VIEWER_METRICS_PORT：在后台线程中提供 http://<host>:<port>/metrics（默认只监听本机，
+# 可用 IMAGE_VIEWER_METRICS_HOST 修改）；IMAGE_VIEWER_METRICS_FILE：定期写入文件
+# （如 node_exporter 的 textfile 目录），间隔 METRICS_FILE_INTERVAL 秒
+METRICS_PORT = int(os.environ["IMAGE_VIEWER_METRICS_PORT"]) if os.environ.get("IMAGE_VIEWER_METRICS_PORT") else None
+METRICS_HOST = os.environ.get("IMAGE_VIEWER_METRICS_HOST", "127.0.0.1")
+METRICS_FILE = Path(os.environ["IMAGE_VIEWER_METRICS_FILE"]) if os.environ.get("IMAGE_VIEWER_METRICS_FILE") else None
+METRICS_FILE_INTERVAL = 15
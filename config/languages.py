@@ -6,6 +6,19 @@ LANGUAGES = {
         "input_mode_label": "输入模式",
         "input_mode_json": "JSON 配置文件",
         "input_mode_folders": "文件夹列表",
+        "input_mode_manifest": "JSONL/CSV 清单",
+        "manifest_path_label": "清单文件路径（服务器本地）",
+        "manifest_path_help": "JSONL 或 CSV 清单，每行一个样本；只读取当前页需要的行",
+        "manifest_path_placeholder": "例如：./results/samples.jsonl",
+        "no_manifest_msg": "👈 请在左侧输入 JSONL/CSV 清单文件路径开始使用",
+        "manifest_example_title": "📄 查看清单格式示例",
+        "manifest_side_file_hint": "也可以在清单旁放置 `<清单名>.methods.json`（包含 `base_dir` 和 `methods`），相对路径相对于清单所在目录解析。",
+        "error_json_invalid": "JSON 配置无效",
+        "error_manifest_not_exist": "清单文件不存在",
+        "error_manifest_unsupported": "不支持的清单格式（仅支持 .jsonl / .csv）",
+        "error_manifest_empty": "清单中没有样本",
+        "error_manifest_invalid": "清单格式错误",
+        "error_manifest_no_methods": "无法从清单中确定方法列表",
         "upload_label": "上传 JSON 配置文件",
         "upload_help": "上传包含图片路径和方法信息的 JSON 文件",
         "folder_list_label": "输入文件夹路径（每行一个）",
@@ -27,6 +40,20 @@ LANGUAGES = {
         "num_rows_label": "显示行数",
         "num_rows_help": "选择同时显示多少行样本",
         "starting_sample": "起始样本",
+        "starting_sample_index": "起始样本序号",
+        "sample_search_label": "搜索样本",
+        "sample_search_placeholder": "输入样本名称（前缀或片段）",
+        "sample_search_no_results": "没有匹配的样本",
+        "filter_title": "🔎 筛选样本",
+        "filter_keywords_label": "文本关键词",
+        "filter_keywords_placeholder": "在样本文本中搜索（多个关键词同时匹配）",
+        "filter_name_label": "名称模式",
+        "filter_name_placeholder": "例如：cat_* 或 片段",
+        "filter_has_mask": "只显示有 mask 的样本",
+        "filter_has_missing": "只显示缺少方法图片的样本",
+        "filter_result_count": "匹配 {n}/{total} 个样本",
+        "filter_clear": "清除筛选",
+        "filter_no_results": "没有样本符合筛选条件",
         "prev_button": "上一个",
         "next_button": "下一个",
         "current_label": "📍 当前",
@@ -50,6 +77,20 @@ LANGUAGES = {
         "delete_crop": "🗑️ Delete",
         "add_crop": "➕ Add Crop",
         "max_crops_msg": "最多支持 {n} 个Close Views",
+        "deep_zoom": "🔭 Deep Zoom",
+        "deep_zoom_help": "在同步的视口中平移缩放所有方法的原图，只读取视口内的图片瓦片",
+        "zoom_title": "🔭 Deep Zoom: {name}",
+        "zoom_factor_label": "缩放倍数",
+        "zoom_x_label": "水平位置 (%)",
+        "zoom_y_label": "垂直位置 (%)",
+        "zoom_in_help": "放大一倍",
+        "zoom_out_help": "缩小一倍",
+        "zoom_pan_help": "平移半个视口",
+        "zoom_reset": "⟲ 重置",
+        "zoom_close": "✖ 关闭",
+        "zoom_caption": "{zoom}× · 显示原图 {full_width}×{full_height} 中 {width}×{height} 像素的区域 · 首次查看某一缩放级别时生成瓦片",
+        "zoom_no_images": "该样本没有可用的图片",
+        "zoom_image_error": "读取图片 {path} 时出错: {error}",
         "method_desc_title": "方法说明",
         "aspect_ratio_warning": "⚠️ 宽高比警告 - 点击查看详情",
         "aspect_ratio_msg": "检测到部分图片宽高比存在差异：",
@@ -68,14 +109,123 @@ LANGUAGES = {
         "method_text_size_help": "调整方法名称和说明显示大小（10-24px）",
         "preserve_aspect_ratio": "保持原始比例",
         "preserve_aspect_ratio_help": "不裁剪为正方形，完整显示图片",
+        "composite_rows": "合成行显示",
+        "composite_rows_help": "每行样本（以及每个 Close View）在服务器上拼成一张图片显示，页面元素和图片请求大幅减少，方法较多时翻页更快；每列的分辨率不超过页面宽度",
         "save_pdf_tooltip": "保存当前页面为PDF",
         "save_pdf_disabled_tooltip": "请先完成裁剪编辑",
         "save_pdf_generating": "正在生成PDF...",
+        "save_pdf_start_tooltip": "在后台生成当前页面的PDF，完成后即可下载",
+        "pdf_export_options": "PDF 导出",
+        "timing_title": "⏱️ 性能计时",
+        "timing_enable": "记录每次运行的耗时",
+        "timing_help": "按阶段和 (样本, 方法) 统计本次运行的耗时，以及之后 PDF 导出的耗时；关闭时不计时",
+        "timing_rerun_label": "本次运行",
+        "timing_image_cache_label": "图片缓存命中率",
+        "timing_row_cache_label": "行缓存命中率",
+        "timing_hits_help": "命中 {hits} 次，未命中 {misses} 次",
+        "timing_col_stage": "阶段",
+        "timing_col_calls": "次数",
+        "timing_col_ms": "耗时 (ms)",
+        "timing_col_sample": "样本",
+        "timing_col_method": "方法",
+        "timing_items_caption": "耗时最多的 {n} 张图片（ms）",
+        "timing_export_caption": "最近一次 PDF 导出：{ms:.0f} ms",
+        "profile_title": "🔬 性能剖析",
+        "profile_help": "用 cProfile 剖析下一次运行或下一次导出任务，显示最耗时的函数和按模块汇总的耗时，并可下载 .prof 文件",
+        "profile_target_label": "剖析对象",
+        "profile_target_rerun": "下一次运行",
+        "profile_target_export": "下一次导出",
+        "profile_capture": "开始剖析",
+        "profile_pending_rerun": "已就绪：下一次操作（翻页、切换选项等）引起的运行将被剖析",
+        "profile_pending_export": "已就绪：下一次开始的导出任务将被剖析（已有结果的导出不会重新运行）",
+        "profile_export_running": "正在剖析导出任务…",
+        "profile_busy": "剖析器正忙：其他会话或导出任务正在剖析，本次没有剖析，请稍后重新开始",
+        "profile_busy_now": "其他会话或导出任务正在剖析，结束前开始的剖析会被跳过",
+        "profile_result_caption": "{target}（{time}），剖析耗时 {ms:.0f} ms",
+        "profile_groups_caption": "按分组汇总的自身耗时（C 函数计入调用方）",
+        "profile_modules_caption": "项目模块的自身耗时",
+        "profile_functions_caption": "自身耗时最多的 {n} 个函数",
+        "profile_col_group": "分组",
+        "profile_col_module": "模块",
+        "profile_col_function": "函数",
+        "profile_col_calls": "调用次数",
+        "profile_col_self_ms": "自身 (ms)",
+        "profile_col_cumulative_ms": "累计 (ms)",
+        "profile_download": "下载 .prof 文件",
+        "profile_download_help": "可用 python -m pstats 或 snakeviz 打开",
+        "profile_clear": "清除结果",
+        "memory_admin_title": "🧮 内存管理",
+        "memory_session_label": "本 session",
+        "memory_all_sessions_label": "全部 session（{n} 个）",
+        "memory_image_cache_label": "图片缓存",
+        "memory_export_label": "导出结果（{n} 个）",
+        "memory_budget_help": "预算 {budget}，超出时先释放行缓存和裁剪图片（需要时重新计算）",
+        "memory_over_budget": "本 session 释放可重新计算的数据后仍超出预算",
+        "memory_col_session": "Session",
+        "memory_col_size": "占用",
+        "memory_col_top_keys": "主要数据",
+        "memory_col_idle": "空闲（秒）",
+        "memory_col_evictions": "释放次数",
+        "dataset_export_title": "📚 导出完整数据集",
+        "dataset_export_scope_label": "导出范围",
+        "dataset_export_scope_filtered": "当前筛选结果（{n} 个样本）",
+        "dataset_export_scope_all": "全部样本（{n} 个）",
+        "dataset_export_format_label": "导出格式",
+        "dataset_export_format_pdf": "PDF",
+        "dataset_export_format_html": "HTML 画廊",
+        "dataset_export_format_mosaic": "拼图",
+        "mosaic_image_format_label": "图片格式",
+        "mosaic_samples_per_image_label": "每张图片的样本数",
+        "mosaic_samples_per_image_help": "1 表示每个样本输出一张图片（适合幻灯片）",
+        "dataset_export_volume_label": "每卷样本数",
+        "dataset_export_volume_help": "按卷拆分为多个 PDF 并打包为 zip，0 表示输出单个文件。单个 PDF 在保存前会占用与文件大小相当的内存，大型数据集建议分卷",
+        "dataset_export_workers_label": "并行进程数",
+        "dataset_export_workers_help": "用于处理图片的进程数",
+        "dataset_export_start": "开始导出",
+        "dataset_export_progress": "{done}/{total} 个样本 · {rate:.1f} 个/秒",
+        "dataset_export_done": "已导出 {n} 个样本，{size:.1f} MB，用时 {elapsed:.0f} 秒（{rate:.1f} 个/秒）",
+        "dataset_export_download": "📥 下载",
+        "gallery_text_label": "文本:",
+        "pdf_image_format_label": "图片嵌入方式",
+        "pdf_image_format_jpeg": "JPEG（体积小）",
+        "pdf_image_format_lossless": "无损",
+        "pdf_image_format_help": "JPEG 文件小、生成快；未经裁剪或处理的 JPEG 原图会直接嵌入，不重新编码",
+        "pdf_image_dpi_label": "图片分辨率 (DPI)",
+        "pdf_image_dpi_help": "按图片在 PDF 中的实际尺寸降采样到该分辨率，打印建议 300",
+        "save_pdf_failed": "导出失败：{error}（点击重试）",
         "save_pdf_filename": "图片查看器导出",
         "use_mask": "使用 Mask",
         "use_mask_help": "对图片应用 mask 效果：mask > 0 的区域正常显示，其余区域变暗",
         "darken_factor_label": "变暗系数",
         "darken_factor_help": "mask = 0 区域变暗的系数",
+        "integrity_title": "🩺 数据完整性检查",
+        "integrity_level_label": "检查级别",
+        "integrity_level_help": "加载配置时在后台并行检查所有图片和 mask，不阻塞浏览；完整解码最慢但能发现截断文件，需点击开始检查",
+        "integrity_level_off": "关闭",
+        "integrity_level_stat": "仅检查文件存在",
+        "integrity_level_header": "检查文件头",
+        "integrity_level_decode": "完整解码",
+        "integrity_scanning": "正在检查数据集...",
+        "integrity_run": "开始检查",
+        "integrity_rerun": "重新检查",
+        "integrity_manual_hint": "完整解码需要读取所有图片数据，点击开始检查",
+        "integrity_scan_progress": "已检查 {done}/{total} 个文件",
+        "integrity_scan_failed": "检查失败: {error}",
+        "integrity_files_label": "已检查文件",
+        "integrity_bad_samples_label": "问题样本",
+        "integrity_no_issues": "未发现缺失或损坏的图片",
+        "integrity_status_missing": "缺失",
+        "integrity_status_corrupt": "损坏",
+        "integrity_status_unreadable": "无法读取",
+        "integrity_status_filter": "问题类型",
+        "integrity_role_filter": "方法 / mask（留空表示全部）",
+        "integrity_filtered_count": "显示 {n}/{total} 个问题",
+        "integrity_sample_label": "样本",
+        "integrity_role_label": "方法",
+        "integrity_status_label": "问题",
+        "integrity_path_label": "路径",
+        "integrity_jump_label": "跳转到问题样本",
+        "integrity_jump_button": "跳转",
     },
     "en": {
         "page_title": "ImageViewer",
@@ -83,6 +233,19 @@ LANGUAGES = {
         "input_mode_label": "Input Mode",
         "input_mode_json": "JSON Configuration",
         "input_mode_folders": "Folder List",
+        "input_mode_manifest": "JSONL/CSV Manifest",
+        "manifest_path_label": "Manifest file path (on the server)",
+        "manifest_path_help": "JSONL or CSV manifest with one sample per line; only the lines for the current page are read",
+        "manifest_path_placeholder": "Example: ./results/samples.jsonl",
+        "no_manifest_msg": "👈 Please enter a JSONL/CSV manifest path in the sidebar",
+        "manifest_example_title": "📄 View Manifest Format Example",
+        "manifest_side_file_hint": "You can also place `<manifest name>.methods.json` (with `base_dir` and `methods`) next to the manifest; relative paths are resolved against the manifest's directory.",
+        "error_json_invalid": "Invalid JSON config",
+        "error_manifest_not_exist": "Manifest file does not exist",
+        "error_manifest_unsupported": "Unsupported manifest format (only .jsonl / .csv)",
+        "error_manifest_empty": "No samples found in manifest",
+        "error_manifest_invalid": "Invalid manifest format",
+        "error_manifest_no_methods": "Could not determine methods from manifest",
         "upload_label": "Upload JSON Configuration",
         "upload_help": "Upload a JSON file containing image paths and method information",
         "folder_list_label": "Enter folder paths (one per line)",
@@ -104,6 +267,20 @@ LANGUAGES = {
         "num_rows_label": "Number of Rows",
         "num_rows_help": "Select how many rows of samples to display simultaneously",
         "starting_sample": "Starting Sample",
+        "starting_sample_index": "Starting Sample Index",
+        "sample_search_label": "Search samples",
+        "sample_search_placeholder": "Type a sample name (prefix or substring)",
+        "sample_search_no_results": "No matching samples",
+        "filter_title": "🔎 Filter Samples",
+        "filter_keywords_label": "Text keywords",
+        "filter_keywords_placeholder": "Search sample text (all keywords must match)",
+        "filter_name_label": "Name pattern",
+        "filter_name_placeholder": "e.g. cat_* or a substring",
+        "filter_has_mask": "Only samples with a mask",
+        "filter_has_missing": "Only samples missing a method image",
+        "filter_result_count": "{n}/{total} samples match",
+        "filter_clear": "Clear filter",
+        "filter_no_results": "No samples match the filter",
         "prev_button": "Previous",
         "next_button": "Next",
         "current_label": "📍 Current",
@@ -127,6 +304,20 @@ LANGUAGES = {
         "delete_crop": "🗑️ Delete",
         "add_crop": "➕ Add Crop",
         "max_crops_msg": "Maximum {n} Close Views supported",
+        "deep_zoom": "🔭 Deep Zoom",
+        "deep_zoom_help": "Pan and zoom the original images of all methods in synchronized panes; only tiles in view are read",
+        "zoom_title": "🔭 Deep Zoom: {name}",
+        "zoom_factor_label": "Zoom",
+        "zoom_x_label": "Horizontal position (%)",
+        "zoom_y_label": "Vertical position (%)",
+        "zoom_in_help": "Zoom in 2×",
+        "zoom_out_help": "Zoom out 2×",
+        "zoom_pan_help": "Pan by half a view",
+        "zoom_reset": "⟲ Reset",
+        "zoom_close": "✖ Close",
+        "zoom_caption": "{zoom}× · showing a {width}×{height} px region of the {full_width}×{full_height} original · tiles are generated the first time a zoom level is viewed",
+        "zoom_no_images": "No images available for this sample",
+        "zoom_image_error": "Error reading image {path}: {error}",
         "method_desc_title": "Method Descriptions",
         "aspect_ratio_warning": "⚠️ Aspect Ratio Warning - Click for details",
         "aspect_ratio_msg": "Detected aspect ratio differences in some images:",
@@ -145,13 +336,122 @@ LANGUAGES = {
         "method_text_size_help": "Adjust method name and description display size (10-24px)",
         "preserve_aspect_ratio": "Preserve aspect ratio",
         "preserve_aspect_ratio_help": "Display full image without cropping to square",
+        "composite_rows": "Composite rows",
+        "composite_rows_help": "Compose each sample row (and each Close View) into a single image on the server: far fewer page elements and image requests, so paging is faster with many methods; column resolution is limited to the page width",
         "save_pdf_tooltip": "Save current page as PDF",
         "save_pdf_disabled_tooltip": "Please finish crop editing first",
         "save_pdf_generating": "Generating PDF...",
+        "save_pdf_start_tooltip": "Generate a PDF of the current page in the background; download it when ready",
+        "pdf_export_options": "PDF Export",
+        "timing_title": "⏱️ Timing",
+        "timing_enable": "Record timings for each rerun",
+        "timing_help": "Break down this rerun by stage and by (sample, method), plus subsequent PDF exports; nothing is timed while off",
+        "timing_rerun_label": "This rerun",
+        "timing_image_cache_label": "Image cache hit rate",
+        "timing_row_cache_label": "Row cache hit rate",
+        "timing_hits_help": "{hits} hits, {misses} misses",
+        "timing_col_stage": "Stage",
+        "timing_col_calls": "Calls",
+        "timing_col_ms": "Time (ms)",
+        "timing_col_sample": "Sample",
+        "timing_col_method": "Method",
+        "timing_items_caption": "Slowest {n} images (ms)",
+        "timing_export_caption": "Last PDF export: {ms:.0f} ms",
+        "profile_title": "🔬 Profiler",
+        "profile_help": "Profile the next rerun or the next export job with cProfile: hottest functions, time aggregated by module, and a downloadable .prof file",
+        "profile_target_label": "Profile",
+        "profile_target_rerun": "Next rerun",
+        "profile_target_export": "Next export",
+        "profile_capture": "Arm profiler",
+        "profile_pending_rerun": "Armed: the rerun caused by your next interaction (paging, toggling options, ...) will be profiled",
+        "profile_pending_export": "Armed: the next export job that starts will be profiled (exports with an existing result are not rerun)",
+        "profile_export_running": "Profiling export job…",
+        "profile_busy": "Profiler busy: another session or export job was being profiled, so nothing was captured. Arm the profiler again later",
+        "profile_busy_now": "Another session or export job is being profiled; captures that start before it finishes are skipped",
+        "profile_result_caption": "{target} ({time}), {ms:.0f} ms profiled",
+        "profile_groups_caption": "Self time by group (C functions are charged to their callers)",
+        "profile_modules_caption": "Self time of project modules",
+        "profile_functions_caption": "Top {n} functions by self time",
+        "profile_col_group": "Group",
+        "profile_col_module": "Module",
+        "profile_col_function": "Function",
+        "profile_col_calls": "Calls",
+        "profile_col_self_ms": "Self (ms)",
+        "profile_col_cumulative_ms": "Cumulative (ms)",
+        "profile_download": "Download .prof file",
+        "profile_download_help": "Open with python -m pstats or snakeviz",
+        "profile_clear": "Clear result",
+        "memory_admin_title": "🧮 Memory",
+        "memory_session_label": "This session",
+        "memory_all_sessions_label": "All sessions ({n})",
+        "memory_image_cache_label": "Image cache",
+        "memory_export_label": "Export results ({n})",
+        "memory_budget_help": "Budget {budget}; row caches and cropped images are released first when exceeded (recomputed on demand)",
+        "memory_over_budget": "This session is still over budget after releasing recomputable data",
+        "memory_col_session": "Session",
+        "memory_col_size": "Size",
+        "memory_col_top_keys": "Largest keys",
+        "memory_col_idle": "Idle (s)",
+        "memory_col_evictions": "Evictions",
+        "dataset_export_title": "📚 Export Full Dataset",
+        "dataset_export_scope_label": "Scope",
+        "dataset_export_scope_filtered": "Current filter results ({n} samples)",
+        "dataset_export_scope_all": "All samples ({n})",
+        "dataset_export_format_label": "Format",
+        "dataset_export_format_pdf": "PDF",
+        "dataset_export_format_html": "HTML gallery",
+        "dataset_export_format_mosaic": "Mosaic",
+        "mosaic_image_format_label": "Image format",
+        "mosaic_samples_per_image_label": "Samples per image",
+        "mosaic_samples_per_image_help": "1 writes one image per sample (for slides)",
+        "dataset_export_volume_label": "Samples per volume",
+        "dataset_export_volume_help": "Split into several PDFs packed in a zip; 0 writes a single file. A single PDF holds memory comparable to its file size until saved, so split large datasets into volumes",
+        "dataset_export_workers_label": "Worker processes",
+        "dataset_export_workers_help": "Number of processes used to prepare images",
+        "dataset_export_start": "Start export",
+        "dataset_export_progress": "{done}/{total} samples · {rate:.1f}/s",
+        "dataset_export_done": "Exported {n} samples, {size:.1f} MB in {elapsed:.0f}s ({rate:.1f} samples/s)",
+        "dataset_export_download": "📥 Download",
+        "gallery_text_label": "Text:",
+        "pdf_image_format_label": "Image embedding",
+        "pdf_image_format_jpeg": "JPEG (smaller)",
+        "pdf_image_format_lossless": "Lossless",
+        "pdf_image_format_help": "JPEG is smaller and faster; unmodified JPEG sources are embedded as-is without re-encoding",
+        "pdf_image_dpi_label": "Image resolution (DPI)",
+        "pdf_image_dpi_help": "Images are downsampled to this resolution at their printed size; 300 is recommended for print",
+        "save_pdf_failed": "Export failed: {error} (click to retry)",
         "save_pdf_filename": "image_viewer_export",
         "use_mask": "Use Mask",
         "use_mask_help": "Apply mask effect: show mask > 0 areas normally, darken others",
         "darken_factor_label": "Darken Factor",
         "darken_factor_help": "Darken factor for mask = 0 regions",
+        "integrity_title": "🩺 Dataset Integrity",
+        "integrity_level_label": "Check level",
+        "integrity_level_help": "Check all images and masks in parallel in the background when a config loads, without blocking browsing; full decode is slowest but catches truncated files and starts on Run check",
+        "integrity_level_off": "Off",
+        "integrity_level_stat": "File exists only",
+        "integrity_level_header": "Verify headers",
+        "integrity_level_decode": "Full decode",
+        "integrity_scanning": "Checking dataset...",
+        "integrity_run": "Run check",
+        "integrity_rerun": "Re-run check",
+        "integrity_manual_hint": "Full decode reads every image; click Run check to start",
+        "integrity_scan_progress": "Checked {done}/{total} files",
+        "integrity_scan_failed": "Check failed: {error}",
+        "integrity_files_label": "Files checked",
+        "integrity_bad_samples_label": "Bad samples",
+        "integrity_no_issues": "No missing or corrupt images found",
+        "integrity_status_missing": "Missing",
+        "integrity_status_corrupt": "Corrupt",
+        "integrity_status_unreadable": "Unreadable",
+        "integrity_status_filter": "Issue types",
+        "integrity_role_filter": "Methods / mask (empty = all)",
+        "integrity_filtered_count": "Showing {n}/{total} issues",
+        "integrity_sample_label": "Sample",
+        "integrity_role_label": "Method",
+        "integrity_status_label": "Issue",
+        "integrity_path_label": "Path",
+        "integrity_jump_label": "Jump to bad sample",
+        "integrity_jump_button": "Jump",
     },
 }
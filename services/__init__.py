@@ -1,19 +1,66 @@
-from .crop_manager import (
-    save_crop_for_sample,
-    get_crop_data,
-    migrate_crop_data_if_needed,
-    get_next_crop_color,
-    get_crop_by_id,
-    delete_crop_from_sample,
-)
-from .pdf_export import generate_pdf_from_current_view
-
-__all__ = [
-    'save_crop_for_sample',
-    'get_crop_data',
-    'migrate_crop_data_if_needed',
-    'get_next_crop_color',
-    'get_crop_by_id',
-    'delete_crop_from_sample',
-    'generate_pdf_from_current_view',
-]
+"""
+服务模块
+
+子模块按需导入（PEP 562）：命令行导出等无界面场景只会加载用到的模块，
+不会因为 config_cache / crop_manager 而导入 streamlit
+"""
+
+import importlib
+
+# 导出名称 -> 所在子模块
+_EXPORTS = {
+    'save_crop_for_sample': 'crop_manager',
+    'get_crop_data': 'crop_manager',
+    'migrate_crop_data_if_needed': 'crop_manager',
+    'get_next_crop_color': 'crop_manager',
+    'get_crop_by_id': 'crop_manager',
+    'delete_crop_from_sample': 'crop_manager',
+    'with_cropped_images': 'crop_manager',
+    'generate_pdf_from_current_view': 'pdf_export',
+    'get_upload_digest': 'config_cache',
+    'get_upload_has_masks': 'config_cache',
+    'get_folder_manifest_digest': 'config_cache',
+    'get_manifest_digest': 'config_cache',
+    'get_json_config': 'config_cache',
+    'get_folder_config': 'config_cache',
+    'get_manifest_config': 'config_cache',
+    'get_sample_name_index': 'config_cache',
+    'get_sample_filter_index': 'config_cache',
+    'scan_dataset_integrity': 'integrity_scan',
+    'check_image_file': 'integrity_scan',
+    'IntegrityScanRegistry': 'integrity_scan',
+    'get_integrity_registry': 'integrity_scan',
+    'ImageCache': 'image_prep',
+    'get_image_cache': 'image_prep',
+    'prepare_image': 'image_prep',
+    'export_dataset_pdf': 'dataset_export',
+    'export_html_gallery': 'html_export',
+    'export_mosaics': 'mosaic_export',
+    'ExportJobRegistry': 'export_jobs',
+    'get_export_registry': 'export_jobs',
+    'compute_view_fingerprint': 'export_jobs',
+    'snapshot_crop_data': 'export_jobs',
+    'SessionMemoryRegistry': 'session_memory',
+    'get_session_memory_registry': 'session_memory',
+    'estimate_size': 'session_memory',
+    'start_metrics_exporter': 'metrics_exporter',
+    'TilePyramid': 'tile_pyramid',
+    'get_pyramid': 'tile_pyramid',
+    'render_viewport': 'tile_pyramid',
+    'prune_tile_cache': 'tile_pyramid',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module_name}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,171 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from config.constants import CACHE_DIR, MANIFEST_MASK_PROBE_SAMPLES
+from utils.json_loader import parse_json_config
+from utils.config_sidecar import (
+    get_sidecar_path,
+    load_config_sidecar,
+    write_config_sidecar,
+)
+from utils.mask import check_masks_available
+from utils.folder_loader import build_config_from_folders
+from utils.sample_store import SampleStore
+from utils.sample_index import SampleNameIndex
+from utils.sample_filter import SampleFilterIndex
+
+
+# 进程内最多缓存的配置数量（所有 session 共享）
+CONFIG_CACHE_MAX_ENTRIES = 8
+
+
+def compute_digest(data: bytes) -> str:
+    """计算字节内容的摘要（用作缓存键和配置指纹）"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def get_upload_digest(uploaded_file) -> str:
+    """
+    获取上传文件的摘要
+    同一个上传文件（file_id 不变）只计算一次，结果保存在 session_state 中，
+    之后的 rerun 不再读取文件内容
+    """
+    cached = st.session_state.get("upload_digest")
+    if cached is not None and cached[0] == uploaded_file.file_id:
+        return cached[1]
+
+    digest = "json:" + compute_digest(uploaded_file.getvalue())
+    st.session_state.upload_digest = (uploaded_file.file_id, digest)
+    return digest
+
+
+def get_upload_has_masks(uploaded_file, config: Dict) -> bool:
+    """
+    检查上传的 JSON 配置是否有可用的 mask
+    mask 文件可能在生成 sidecar 或进程内缓存之后增删，因此不跨 session 缓存：
+    每个上传文件（file_id，重新上传也会变化）在本 session 中检查一次，
+    结果保存在 session_state 中，之后的 rerun 不再访问文件系统
+    """
+    cached = st.session_state.get("upload_has_masks")
+    if cached is not None and cached[0] == uploaded_file.file_id:
+        return cached[1]
+
+    has_masks = check_masks_available(config["samples"], Path(config["base_dir"]))
+    st.session_state.upload_has_masks = (uploaded_file.file_id, has_masks)
+    return has_masks
+
+
+def get_folder_manifest_digest(folders: List[Path]) -> str:
+    """
+    根据文件夹列表及其中每一级子目录的修改时间计算摘要
+    文件夹扫描是递归的，任意一级子目录中增删或重命名图片都会改变该目录的 mtime，
+    从而使缓存失效（只遍历目录，不读取图片）
+    """
+    parts = []
+    for folder in folders:
+        if not os.path.isdir(folder):
+            parts.append(f"{folder}\0-1")
+            continue
+        for root, dirs, _ in os.walk(folder):
+            # 固定遍历顺序，目录未变化时摘要不变
+            dirs.sort()
+            try:
+                mtime = os.stat(root).st_mtime_ns
+            except OSError:
+                mtime = -1
+            parts.append(f"{root}\0{mtime}")
+    return "folders:" + compute_digest("\n".join(parts).encode("utf-8"))
+
+
+def get_manifest_digest(manifest_path: Path) -> str:
+    """根据清单（及附属方法文件）的路径、大小和修改时间计算摘要"""
+    # 清单加载依赖 NumPy，只在使用清单模式时导入
+    from utils.manifest_loader import get_side_file_path
+
+    parts = []
+    for path in (manifest_path, get_side_file_path(manifest_path)):
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}\0-1")
+    return "manifest:" + compute_digest("\n".join(parts).encode("utf-8"))
+
+
+@st.cache_resource(max_entries=CONFIG_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_json_config(digest: str, _content: bytes) -> Tuple[Optional[Dict], Dict]:
+    """
+    解析并验证 JSON 配置，按摘要在进程内缓存
+    返回 (配置, {"errors": [...]})，错误格式与文件夹 / 清单加载相同
+    samples 转换为紧凑的只读 SampleStore，所有 session 共享
+    mask 是否可用不在这里检查（结果会被所有 session 复用），见 get_upload_has_masks
+
+    验证通过的配置会编译为二进制 sidecar 保存在缓存目录中（按内容摘要和工作目录区分），
+    服务重启后再次打开相同内容时直接 mmap 加载，跳过解析和验证
+    """
+    # 相对 base_dir 相对于当前工作目录解析，sidecar 同时按内容和工作目录区分
+    sidecar_digest = "json:" + compute_digest(f"{digest}\0{Path.cwd()}".encode("utf-8"))
+    sidecar_path = get_sidecar_path(CACHE_DIR / "configs", sidecar_digest)
+    config = load_config_sidecar(sidecar_path, sidecar_digest)
+    if config is None:
+        config, error = parse_json_config(_content)
+        if config is None:
+            return None, {"errors": [f"error_json_invalid|{error}"]}
+
+        config["samples"] = SampleStore.from_samples(config["samples"])
+        try:
+            write_config_sidecar(sidecar_path, sidecar_digest, config)
+        except OSError:
+            # 缓存目录不可写时不影响正常使用
+            pass
+    return config, {"errors": []}
+
+
+@st.cache_resource(max_entries=CONFIG_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_folder_config(
+    digest: str, _folders: List[Path]
+) -> Tuple[Optional[Dict], Dict]:
+    """扫描文件夹生成配置，按摘要在进程内缓存"""
+    config, stats = build_config_from_folders(_folders)
+    if config is not None:
+        config["samples"] = SampleStore.from_samples(config["samples"])
+        config["has_masks"] = check_masks_available(
+            config["samples"], Path(config["base_dir"])
+        )
+    return config, stats
+
+
+@st.cache_resource(max_entries=CONFIG_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_manifest_config(
+    digest: str, _manifest_path: Path
+) -> Tuple[Optional[Dict], Dict]:
+    """建立清单的行偏移索引，按摘要在进程内缓存（样本按需读取）"""
+    from utils.manifest_loader import load_manifest
+
+    config, stats = load_manifest(_manifest_path)
+    if config is not None:
+        # 清单按需读取样本，只检查前若干个样本
+        config["has_masks"] = check_masks_available(
+            config["samples"],
+            Path(config["base_dir"]),
+            limit=MANIFEST_MASK_PROBE_SAMPLES,
+        )
+    return config, stats
+
+
+@st.cache_resource(max_entries=CONFIG_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_sample_name_index(digest: str, _samples: List[Dict]) -> SampleNameIndex:
+    """构建样本名称搜索索引（首次搜索时构建），按配置摘要在进程内缓存"""
+    return SampleNameIndex(sample["name"] for sample in _samples)
+
+
+@st.cache_resource(max_entries=CONFIG_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_sample_filter_index(
+    digest: str, _samples: List[Dict], _methods: List[Dict]
+) -> SampleFilterIndex:
+    """构建样本筛选倒排索引（首次筛选时构建），按配置摘要在进程内缓存"""
+    return SampleFilterIndex(_samples, _methods)
@@ -1,19 +1,27 @@
+"""
+Crop 数据管理（不依赖界面）
+
+crop_data 结构: {样本索引: {'crops': [{'id', 'color', 'box', 'cropped_images', 'original_sizes'}, ...]}}
+界面把 st.session_state.crop_data 传入；出错时抛出异常，由调用方决定如何显示
+"""
+
 from pathlib import Path
-from PIL import Image
-import streamlit as st
 from typing import Dict, List, Tuple, Optional
 
 from config.constants import CROP_COLORS
-from utils.image_processing import apply_crop_to_image, check_image_exists, filter_visible_methods
+from utils.image_processing import crop_sample_images, filter_visible_methods
+from utils.metrics import inc
 
 
-def save_crop_for_sample(sample_idx: int, box: Tuple[int, int, int, int],
+def save_crop_for_sample(crop_data: Dict[int, Dict], sample_idx: int,
+                         box: Tuple[int, int, int, int],
                          samples: List[Dict], methods: List[Dict],
                          base_dir: Path, target_width: int,
-                         crop_id: str, color: str, visible_methods: Optional[List[str]] = None) -> bool:
+                         crop_id: str, color: str, visible_methods: Optional[List[str]] = None) -> Dict:
     """
     对样本的所有方法图片应用相同的裁剪框（支持多crop）
     参数:
+        crop_data: 所有样本的 crop 数据（原地更新）
         sample_idx: 样本索引
         box: 裁剪框坐标 (left, top, right, bottom)
         samples: 样本列表
@@ -24,102 +32,112 @@ def save_crop_for_sample(sample_idx: int, box: Tuple[int, int, int, int],
         color: crop的颜色
         visible_methods: 可见方法列表
     返回:
-        是否成功
+        保存的 crop；读取图片失败时抛出异常，crop_data 保持不变
     """
-    try:
-        sample = samples[sample_idx]
-        cropped_images = {}
-        original_sizes = {}
-
-        # 使用过滤后的方法列表
-        visible_methods_list = filter_visible_methods(methods, visible_methods) if visible_methods else methods
-
-        for method in visible_methods_list:
-            method_name = method["name"]
-
-            if method_name not in sample["images"]:
-                continue
-
-            image_rel_path = sample["images"][method_name]
-
-            # 跳过不存在的图片文件
-            if not check_image_exists(base_dir, image_rel_path):
-                continue
-
-            image_path = base_dir / image_rel_path
+    sample = samples[sample_idx]
 
-            # 加载原始图片
-            img = Image.open(image_path)
-            original_sizes[method_name] = img.size
+    # 使用过滤后的方法列表
+    visible_methods_list = filter_visible_methods(methods, visible_methods) if visible_methods else methods
 
-            # 应用裁剪
-            cropped = apply_crop_to_image(img, box, target_width)
-            cropped_images[method_name] = cropped
+    cropped_images, original_sizes = crop_sample_images(
+        sample, box, [m["name"] for m in visible_methods_list], base_dir, target_width
+    )
 
-        # 创建新的crop对象
-        new_crop = {
-            'id': crop_id,
-            'color': color,
-            'box': box,
-            'cropped_images': cropped_images,
-            'original_sizes': original_sizes
-        }
+    # 创建新的crop对象
+    new_crop = {
+        'id': crop_id,
+        'color': color,
+        'box': box,
+        'cropped_images': cropped_images,
+        'original_sizes': original_sizes
+    }
 
-        # 初始化或更新crop_data
-        if sample_idx not in st.session_state.crop_data:
-            st.session_state.crop_data[sample_idx] = {'crops': []}
+    # 初始化或更新crop_data
+    if sample_idx not in crop_data:
+        crop_data[sample_idx] = {'crops': []}
 
-        if 'crops' not in st.session_state.crop_data[sample_idx]:
-            st.session_state.crop_data[sample_idx]['crops'] = []
+    if 'crops' not in crop_data[sample_idx]:
+        crop_data[sample_idx]['crops'] = []
 
-        # 检查是否是更新已有crop
-        crop_list = st.session_state.crop_data[sample_idx]['crops']
-        crop_found = False
+    # 检查是否是更新已有crop
+    crop_list = crop_data[sample_idx]['crops']
+    crop_found = False
 
-        for i, crop in enumerate(crop_list):
-            if crop['id'] == crop_id:
-                # 更新已有crop
-                crop_list[i] = new_crop
-                crop_found = True
-                break
-
-        # 如果是新crop，添加到列表
-        if not crop_found:
-            crop_list.append(new_crop)
-
-        return True
-    except Exception as e:
-        st.error(f"保存裁剪数据时出错: {e}")
-        return False
+    for i, crop in enumerate(crop_list):
+        if crop['id'] == crop_id:
+            # 更新已有crop
+            crop_list[i] = new_crop
+            crop_found = True
+            break
+
+    # 如果是新crop，添加到列表
+    if not crop_found:
+        crop_list.append(new_crop)
+
+    inc("image_viewer_crops_saved_total")
+    return new_crop
+
+
+def with_cropped_images(
+    sample: Dict,
+    sample_crop_data: Optional[Dict],
+    method_names: List[str],
+    base_dir: Path,
+    target_width: int,
+) -> Optional[Dict]:
+    """
+    补全只有裁剪框、没有裁剪图片的 crop（命令行从文件读入的 crop，
+    或内存不足时被释放了裁剪图片的 crop）
+    不修改传入的数据：有需要补全的 crop 时返回新的容器，否则原样返回
+    """
+    if not sample_crop_data:
+        return sample_crop_data
+    crops = sample_crop_data.get("crops", [])
+    if all("cropped_images" in crop for crop in crops):
+        return sample_crop_data
+
+    restored = []
+    for crop in crops:
+        if "cropped_images" not in crop:
+            # 释放过的 crop 按原来裁剪的方法恢复
+            names = list(crop.get("original_sizes") or method_names)
+            cropped_images, original_sizes = crop_sample_images(
+                sample, tuple(crop["box"]), names, base_dir, target_width
+            )
+            crop = {
+                **crop,
+                "cropped_images": cropped_images,
+                "original_sizes": original_sizes,
+            }
+        restored.append(crop)
+    return {**sample_crop_data, "crops": restored}
 
 
-def get_crop_data(sample_idx: int) -> Optional[Dict]:
+def get_crop_data(crop_data: Dict[int, Dict], sample_idx: int) -> Optional[Dict]:
     """
     获取样本的裁剪数据
     参数:
+        crop_data: 所有样本的 crop 数据
         sample_idx: 样本索引
     返回:
         裁剪数据字典，如果不存在则返回None
     """
-    return st.session_state.crop_data.get(sample_idx, None)
+    return crop_data.get(sample_idx, None)
 
 
-def migrate_crop_data_if_needed():
+def migrate_crop_data_if_needed(crop_data: Dict[int, Dict]):
     """
-    将旧的单crop格式迁移到新的多crop格式
+    将旧的单crop格式迁移到新的多crop格式（原地更新）
     旧格式: {sample_idx: {'box': ..., 'cropped_images': {...}, 'original_sizes': {...}}}
     新格式: {sample_idx: {'crops': [{'id': ..., 'color': ..., 'box': ..., ...}, ...]}}
     """
-    if not hasattr(st.session_state, 'crop_data'):
-        return
-
-    for sample_idx in list(st.session_state.crop_data.keys()):
-        data = st.session_state.crop_data[sample_idx]
+    for sample_idx in list(crop_data.keys()):
+        data = crop_data[sample_idx]
 
         # 检查是否是旧格式（直接有'box'键，而不是'crops'）
         if 'box' in data and 'crops' not in data:
             # 迁移到新格式
-            st.session_state.crop_data[sample_idx] = {
+            crop_data[sample_idx] = {
                 'crops': [{
                     'id': 'crop_0',
                     'color': CROP_COLORS[0],  # Green
@@ -130,22 +148,23 @@ def migrate_crop_data_if_needed():
             }
 
 
-def get_next_crop_color(sample_idx: int) -> str:
+def get_next_crop_color(crop_data: Dict[int, Dict], sample_idx: int) -> str:
     """
     获取下一个可用的crop颜色
     参数:
+        crop_data: 所有样本的 crop 数据
         sample_idx: 样本索引
     返回:
         下一个可用的颜色（从CROP_COLORS中选择未使用的）
     """
-    crop_data = get_crop_data(sample_idx)
+    sample_crop_data = get_crop_data(crop_data, sample_idx)
 
-    if not crop_data or 'crops' not in crop_data:
+    if not sample_crop_data or 'crops' not in sample_crop_data:
         # 没有crops，返回第一个颜色
         return CROP_COLORS[0]
 
     # 获取已使用的颜色
-    used_colors = {crop['color'] for crop in crop_data['crops']}
+    used_colors = {crop['color'] for crop in sample_crop_data['crops']}
 
     # 找到第一个未使用的颜色
     for color in CROP_COLORS:
@@ -157,45 +176,47 @@ def get_next_crop_color(sample_idx: int) -> str:
     return CROP_COLORS[0]
 
 
-def get_crop_by_id(sample_idx: int, crop_id: str) -> Optional[Dict]:
+def get_crop_by_id(crop_data: Dict[int, Dict], sample_idx: int, crop_id: str) -> Optional[Dict]:
     """
     根据crop ID获取crop数据
     参数:
+        crop_data: 所有样本的 crop 数据
         sample_idx: 样本索引
         crop_id: crop ID
     返回:
         crop数据字典，如果不存在则返回None
     """
-    crop_data = get_crop_data(sample_idx)
+    sample_crop_data = get_crop_data(crop_data, sample_idx)
 
-    if not crop_data or 'crops' not in crop_data:
+    if not sample_crop_data or 'crops' not in sample_crop_data:
         return None
 
-    for crop in crop_data['crops']:
+    for crop in sample_crop_data['crops']:
         if crop['id'] == crop_id:
             return crop
 
     return None
 
 
-def delete_crop_from_sample(sample_idx: int, crop_id: str):
+def delete_crop_from_sample(crop_data: Dict[int, Dict], sample_idx: int, crop_id: str):
     """
-    从样本中删除指定的crop
+    从样本中删除指定的crop（原地更新）
     参数:
+        crop_data: 所有样本的 crop 数据
         sample_idx: 样本索引
         crop_id: 要删除的crop ID
     """
-    if sample_idx not in st.session_state.crop_data:
+    if sample_idx not in crop_data:
         return
 
-    crop_data = st.session_state.crop_data[sample_idx]
+    sample_crop_data = crop_data[sample_idx]
 
-    if 'crops' not in crop_data:
+    if 'crops' not in sample_crop_data:
         return
 
     # 过滤掉要删除的crop
-    crop_data['crops'] = [crop for crop in crop_data['crops'] if crop['id'] != crop_id]
+    sample_crop_data['crops'] = [crop for crop in sample_crop_data['crops'] if crop['id'] != crop_id]
 
     # 如果没有crops了，删除整个sample的crop_data
-    if not crop_data['crops']:
-        del st.session_state.crop_data[sample_idx]
+    if not sample_crop_data['crops']:
+        del crop_data[sample_idx]
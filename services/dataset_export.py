@@ -0,0 +1,287 @@
+"""
+完整数据集 PDF 导出
+
+- 图片的解码、缩放、mask、编码在进程池中并行完成，主进程只负责排版
+- flowable 按需生成：doc.build 每次从列表头部取出 flowable，只有缓冲不足时
+  才从进程池结果中补充，任一时刻只有少量样本的图片数据等待排版
+- 注意：reportlab 在文档保存前会把已排版页面的（压缩后的）图片对象保留在内存中，
+  因此单个文件的内存占用与输出文件大小相当；可以按卷拆分输出来限制内存
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from reportlab.lib.units import mm
+from reportlab.platypus import Flowable, Spacer
+
+from utils.image_processing import filter_visible_methods
+from utils.sample_filter import get_source_index
+from config.constants import PDF_DEFAULT_DPI
+from services.crop_manager import with_cropped_images
+from services.pdf_export import (
+    build_descriptions_flowables,
+    build_sample_flowables,
+    create_pdf_document,
+    create_pdf_styles,
+    encode_sample_images,
+    get_crop_boxes,
+    get_pdf_layout,
+)
+
+# 每个工作进程允许排队的样本数（限制等待排版的图片数据量）
+PREFETCH_PER_WORKER = 4
+# doc.build 缓冲区中至少保留的 flowable 数（满足 keepWithNext 的前瞻）
+MIN_FLOWABLE_BUFFER = 16
+
+
+class FlowableStream(list):
+    """
+    按需生成的 flowable 列表
+    doc.build 通过 del flowables[0] 逐个消费，删除时从生成器补充
+    """
+
+    def __init__(
+        self, chunks: Iterator[List[Flowable]], min_buffer: int = MIN_FLOWABLE_BUFFER
+    ):
+        super().__init__()
+        self._chunks = chunks
+        self._min_buffer = min_buffer
+        self._fill()
+
+    def _fill(self):
+        while self._chunks is not None and super().__len__() < self._min_buffer:
+            try:
+                self.extend(next(self._chunks))
+            except StopIteration:
+                self._chunks = None
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._fill()
+
+    def pop(self, index=-1):
+        item = super().pop(index)
+        self._fill()
+        return item
+
+
+def plain_sample(sample) -> Dict:
+    """转换为可 pickle 的普通字典（SampleRecord、清单行等）"""
+    return {
+        "name": sample["name"],
+        "text": sample.get("text"),
+        "mask": sample.get("mask"),
+        "images": dict(sample["images"]),
+    }
+
+
+def ordered_map(
+    executor: Optional[ProcessPoolExecutor],
+    func: Callable,
+    jobs: Iterable,
+    prefetch: int,
+) -> Iterator:
+    """
+    按提交顺序返回结果，最多 prefetch 个任务同时在途
+    executor 为 None 时在当前进程中依次执行
+    """
+    if executor is None:
+        for args in jobs:
+            yield func(*args)
+        return
+
+    pending = deque()
+    jobs = iter(jobs)
+    for args in islice(jobs, prefetch):
+        pending.append(executor.submit(func, *args))
+    while pending:
+        result = pending.popleft().result()
+        for args in islice(jobs, 1):
+            pending.append(executor.submit(func, *args))
+        yield result
+
+
+def make_staging_dir(output_path: Path) -> Path:
+    """
+    在输出文件所在目录中创建临时目录，存放打包前的文件（调用方负责删除）
+    不使用由输出路径推导的目录名，避免覆盖或删除用户已有的同名目录
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix=f".{output_path.stem}.", dir=output_path.parent))
+
+
+def create_output_dir(out_dir: Path):
+    """
+    创建导出目录；路径已存在且不是空目录时抛出 FileExistsError
+    导出不会删除或覆盖用户指定路径中已有的文件
+    """
+    if out_dir.exists() and (not out_dir.is_dir() or any(out_dir.iterdir())):
+        raise FileExistsError(f"输出路径已存在且不是空目录: {out_dir}")
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+
+def export_dataset_pdf(
+    samples: Sequence,
+    methods: List[Dict],
+    base_dir: Path,
+    output_path: Path,
+    show_method_name: bool,
+    show_text: bool,
+    show_sample_name: bool,
+    show_descriptions: bool,
+    close_view_enabled: bool,
+    crop_data: Dict,
+    preserve_aspect_ratio: bool,
+    lang: Dict,
+    use_mask: bool = False,
+    darken_factor: float = 0.5,
+    image_width: int = 800,
+    visible_methods: Optional[List[str]] = None,
+    image_format: str = "jpeg",
+    image_dpi: Optional[int] = PDF_DEFAULT_DPI,
+    samples_per_volume: int = 0,
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> Path:
+    """
+    将所有样本（或筛选后的视图）导出为 PDF
+    参数:
+        samples: 样本序列，可以是 FilteredSamples 视图（crop_data 按原始索引查找）
+        output_path: 输出文件路径（.pdf）；分卷时输出同名 .zip
+        samples_per_volume: 每卷的样本数，0 表示输出单个文件
+        max_workers: 图片处理进程数，默认为 CPU 核数；1 表示在当前进程处理
+        progress_callback: 进度回调 (已排版样本数, 总样本数)
+        其余参数与 generate_pdf_from_current_view 相同
+    返回:
+        输出文件路径（单个 PDF 或包含各卷 PDF 的 zip）
+    """
+    visible_methods_list = (
+        filter_visible_methods(methods, visible_methods) if visible_methods else methods
+    )
+    method_names = [m["name"] for m in visible_methods_list]
+    styles = create_pdf_styles()
+    layout = get_pdf_layout(len(visible_methods_list))
+
+    total = len(samples)
+    volume_size = samples_per_volume if samples_per_volume > 0 else max(1, total)
+    num_volumes = max(1, -(-total // volume_size))
+    max_workers = max_workers or os.cpu_count() or 1
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def crops_for(position: int) -> Optional[Dict]:
+        return crop_data.get(get_source_index(samples, position))
+
+    def encode_jobs():
+        for position in range(total):
+            yield (
+                plain_sample(samples[position]),
+                method_names,
+                base_dir,
+                image_width,
+                preserve_aspect_ratio,
+                use_mask,
+                darken_factor,
+                get_crop_boxes(crops_for(position), close_view_enabled),
+                layout["col_width"],
+                layout["max_img_height"],
+                image_format,
+                image_dpi,
+                False,  # 子进程中不使用图片缓存
+            )
+
+    executor = None
+    if max_workers > 1 and total > 1:
+        # spawn 避免在多线程的服务进程中 fork
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    done = 0
+    try:
+        encoded = ordered_map(
+            executor,
+            encode_sample_images,
+            encode_jobs(),
+            prefetch=max_workers * PREFETCH_PER_WORKER,
+        )
+
+        def volume_chunks(start: int, stop: int) -> Iterator[List[Flowable]]:
+            nonlocal done
+            for position in range(start, stop):
+                cells = next(encoded)
+                sample = samples[position]
+                elements = build_sample_flowables(
+                    sample,
+                    cells,
+                    visible_methods_list,
+                    (
+                        with_cropped_images(
+                            sample,
+                            crops_for(position),
+                            method_names,
+                            Path(base_dir),
+                            image_width,
+                        )
+                        if close_view_enabled
+                        else None
+                    ),
+                    styles,
+                    layout,
+                    is_first=position == start,
+                    show_method_name=show_method_name,
+                    show_sample_name=show_sample_name,
+                    show_text=show_text,
+                    close_view_enabled=close_view_enabled,
+                    image_format=image_format,
+                    image_dpi=image_dpi,
+                )
+                # 样本之间添加分隔
+                if position < stop - 1:
+                    elements.append(Spacer(1, 3 * mm))
+                yield elements
+
+                done += 1
+                if progress_callback is not None:
+                    progress_callback(done, total)
+
+            # 方法描述（每卷最后显示）
+            if show_descriptions:
+                yield build_descriptions_flowables(methods, lang, styles, layout)
+
+        if num_volumes == 1:
+            doc = create_pdf_document(str(output_path))
+            doc.build(FlowableStream(volume_chunks(0, total)))
+            return output_path
+
+        # 分卷：每卷单独保存后释放，最后打包（PDF 已压缩，zip 只存储不压缩）
+        zip_path = output_path.with_suffix(".zip")
+        volume_dir = make_staging_dir(zip_path)
+        try:
+            volume_paths = []
+            for volume in range(num_volumes):
+                start = volume * volume_size
+                stop = min(start + volume_size, total)
+                volume_path = volume_dir / f"{output_path.stem}_{volume + 1:03d}.pdf"
+                doc = create_pdf_document(str(volume_path))
+                doc.build(FlowableStream(volume_chunks(start, stop)))
+                volume_paths.append(volume_path)
+
+            with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+                for volume_path in volume_paths:
+                    zf.write(volume_path, volume_path.name)
+        finally:
+            shutil.rmtree(volume_dir, ignore_errors=True)
+        return zip_path
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,227 @@
+"""
+后台导出任务
+
+导出只在用户点击时计算：任务在线程池中运行并报告进度，
+结果按视图状态指纹缓存，同一视图再次下载时直接复用已生成的文件。
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+from config.constants import EXPORT_CACHE_MAX_ENTRIES, EXPORT_MAX_WORKERS
+from utils.metrics import inc, observe
+from utils.profiling import start_profiler, stop_profiler
+from utils.timing import collect_timings
+
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+def snapshot_crop_data(crop_data: Dict, sample_indices: Iterable[int]) -> Dict:
+    """
+    复制导出涉及的样本的 crop 数据
+    只复制容器（crop 更新时整体替换，不会原地修改），后台任务运行期间
+    用户继续编辑 crop 不会影响正在生成的文件
+    """
+    snapshot = {}
+    for idx in sample_indices:
+        data = crop_data.get(idx)
+        if data:
+            snapshot[idx] = {"crops": list(data.get("crops", []))}
+    return snapshot
+
+
+def compute_view_fingerprint(
+    config_digest: str, sample_indices: Iterable[int], options: Dict, crop_data: Dict
+) -> str:
+    """
+    计算视图状态指纹（样本范围、导出选项和 crop 框）
+    参数:
+        config_digest: 配置摘要
+        sample_indices: 导出的原始样本索引
+        options: 影响导出结果的选项（可 JSON 序列化）
+        crop_data: 导出涉及的样本的 crop 数据
+    """
+    sample_indices = [int(i) for i in sample_indices]
+    crops = {
+        str(idx): [
+            [
+                crop.get("id"),
+                crop.get("color"),
+                list(crop.get("box", ())),
+                sorted(crop.get("original_sizes", {})),
+            ]
+            for crop in crop_data[idx].get("crops", [])
+        ]
+        for idx in sample_indices
+        if idx in crop_data
+    }
+    payload = json.dumps(
+        [config_digest, sample_indices, options, crops],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ExportJobRegistry:
+    """
+    导出任务注册表（进程内共享）
+    每个指纹对应一个任务字典:
+        status: running / done / failed
+        progress: 0-1
+        done / total: 进度回调报告的已完成数和总数（用于计算吞吐量）
+        result: 导出结果（文件内容或文件路径）
+        error: 错误信息（失败时）
+        filename: 下载文件名
+        timings / profile: 计时结果、剖析结果（提交时要求计时或剖析才有；
+            要求剖析但其他剖析正在进行时 profile 为 None，profile_busy 为 True）
+    """
+
+    def __init__(
+        self,
+        max_entries: int = EXPORT_CACHE_MAX_ENTRIES,
+        max_workers: int = EXPORT_MAX_WORKERS,
+    ):
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="export"
+        )
+
+    def get(self, fingerprint: str) -> Optional[Dict]:
+        """获取任务（不存在返回 None）"""
+        with self._lock:
+            job = self._jobs.get(fingerprint)
+            if job is not None:
+                self._jobs.move_to_end(fingerprint)
+            return job
+
+    def submit(
+        self,
+        fingerprint: str,
+        filename: str,
+        func: Callable,
+        on_evict: Optional[Callable[[Dict], None]] = None,
+        timed: bool = False,
+        profiled: bool = False,
+        **kwargs,
+    ) -> Dict:
+        """
+        提交导出任务；同一指纹已有进行中或已完成的任务时直接返回该任务
+        func 以关键字参数调用，并额外传入 progress_callback(done, total)
+        on_evict: 任务被移出缓存时的清理回调（如删除输出文件）
+        timed: 在任务线程中按阶段计时，结果保存在 job['timings']
+        profiled: 用 cProfile 剖析任务线程，结果（.prof 字节）保存在 job['profile']
+        """
+        with self._lock:
+            job = self._jobs.get(fingerprint)
+            if job is not None and job["status"] != JOB_FAILED:
+                return job
+
+            job = {
+                "fingerprint": fingerprint,
+                "status": JOB_RUNNING,
+                "progress": 0.0,
+                "done": 0,
+                "total": 0,
+                "result": None,
+                "error": None,
+                "filename": filename,
+                "started": time.time(),
+                "finished": None,
+                "on_evict": on_evict,
+                "timed": timed,
+                "timings": None,
+                "profiled": profiled,
+                "profile": None,
+                "profile_busy": False,
+            }
+            self._jobs[fingerprint] = job
+            self._evict()
+
+        self._executor.submit(self._run, job, func, kwargs)
+        return job
+
+    def stats(self) -> Dict:
+        """任务数、进行中和失败的任务数、内存中结果的字节数（写入文件的结果不计）"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "jobs": len(jobs),
+            "running": sum(job["status"] == JOB_RUNNING for job in jobs),
+            "failed": sum(job["status"] == JOB_FAILED for job in jobs),
+            "result_bytes": sum(
+                len(job["result"]) for job in jobs if isinstance(job["result"], bytes)
+            ),
+        }
+
+    def _run(self, job: Dict, func: Callable, kwargs: Dict):
+        def progress_callback(done: int, total: int):
+            job["done"] = done
+            job["total"] = total
+            job["progress"] = min(1.0, done / total) if total else 1.0
+
+        profiler = start_profiler() if job["profiled"] else None
+        job["profile_busy"] = job["profiled"] and profiler is None
+        try:
+            if job["timed"]:
+                with collect_timings() as timings:
+                    job["timings"] = timings
+                    result = func(progress_callback=progress_callback, **kwargs)
+            else:
+                result = func(progress_callback=progress_callback, **kwargs)
+        except Exception as e:
+            job["error"] = str(e)
+            job["status"] = JOB_FAILED
+        else:
+            job["result"] = result
+            job["progress"] = 1.0
+            job["status"] = JOB_DONE
+        if profiler is not None:
+            job["profile"] = stop_profiler(profiler)
+        job["finished"] = time.time()
+
+        exporter = getattr(func, "__name__", "export")
+        inc("image_viewer_export_jobs_total", exporter=exporter, status=job["status"])
+        observe(
+            "image_viewer_export_duration_seconds",
+            job["finished"] - job["started"],
+            exporter=exporter,
+        )
+
+    def _evict(self):
+        """超出数量上限时移除最久未使用的已结束任务（进行中的任务保留）"""
+        excess = len(self._jobs) - self._max_entries
+        if excess <= 0:
+            return
+        for fingerprint in [
+            fp for fp, job in self._jobs.items() if job["status"] != JOB_RUNNING
+        ][:excess]:
+            job = self._jobs.pop(fingerprint)
+            inc("image_viewer_cache_evictions_total", cache="export_results")
+            if job["on_evict"] is not None:
+                try:
+                    job["on_evict"](job)
+                except OSError:
+                    pass
+
+
+_registry: Optional[ExportJobRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_export_registry() -> ExportJobRegistry:
+    """获取进程内共享的导出任务注册表"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ExportJobRegistry()
+        return _registry
@@ -0,0 +1,375 @@
+"""
+静态 HTML 画廊导出
+
+- 版式与网页主视图相同：每个样本一行、每个方法一列，包含 Close View 和文本
+- 缩略图按页面显示尺寸预先生成为 WebP，<img> 带 width/height 和原生懒加载，
+  每个样本区块使用 content-visibility，浏览器只加载和排版屏幕附近的内容
+- 缩略图点击打开原图（默认复制到画廊目录中，画廊可以整体拷贝或打包分享）
+- 缩略图在进程池中并行生成，子进程直接写文件，只返回文件名和尺寸
+"""
+
+import html
+import multiprocessing
+import os
+import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import quote
+
+from PIL import Image
+
+from config.constants import HTML_GALLERY_PAGE_WIDTH, HTML_THUMB_QUALITY
+from utils.image_processing import crop_sample_images, filter_visible_methods
+from utils.sample_filter import get_source_index
+from services.image_prep import prepare_image
+from services.pdf_export import get_crop_boxes
+from services.dataset_export import (
+    PREFETCH_PER_WORKER,
+    create_output_dir,
+    make_staging_dir,
+    ordered_map,
+    plain_sample,
+)
+
+GALLERY_CSS = """
+body { margin: 0; font-family: -apple-system, "Segoe UI", "PingFang SC", "Microsoft YaHei", sans-serif; color: #222; }
+main { max-width: %(page_width)dpx; margin: 0 auto; padding: 16px; }
+.sample { content-visibility: auto; contain-intrinsic-size: auto 480px; border-bottom: 1px solid #ddd; padding: 8px 0; }
+.sample:last-of-type { border-bottom: none; }
+.row { display: grid; grid-template-columns: repeat(%(num_cols)d, minmax(0, 1fr)); gap: 4px; }
+.row img { display: block; width: 100%%; height: auto; }
+.method-name { font-weight: bold; font-size: 14px; }
+.sample-name { font-weight: bold; margin: 4px 0; }
+.close-view { margin: 6px 0 2px; font-weight: bold; font-size: 13px; }
+.swatch { display: inline-block; width: 12px; height: 12px; border: 1px solid #333; margin-right: 6px; vertical-align: middle; }
+.cell-text { display: flex; align-items: center; justify-content: center; aspect-ratio: 1; background: #f0f0f0; color: #888; }
+.text { font-size: 14px; margin-top: 4px; }
+.descriptions .desc { color: gray; font-size: 13px; }
+"""
+
+
+def get_thumb_width(num_cols: int, image_width: int) -> int:
+    """缩略图宽度：页面中单列的显示宽度（不超过处理宽度）"""
+    return max(1, min(image_width, HTML_GALLERY_PAGE_WIDTH // max(1, num_cols)))
+
+
+def _save_thumb(img: Image.Image, out_dir: Path, name: str, width: int) -> Dict:
+    """缩放到显示宽度并保存为 WebP，返回单元格信息"""
+    if img.width > width:
+        img = img.resize(
+            (width, max(1, round(img.height * width / img.width))),
+            Image.Resampling.LANCZOS,
+        )
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGB")
+    img.save(out_dir / "thumbs" / name, "WEBP", quality=HTML_THUMB_QUALITY, method=4)
+    return {"thumb": f"thumbs/{name}", "width": img.width, "height": img.height}
+
+
+def render_sample_thumbnails(
+    sample: Dict,
+    position: int,
+    method_names: List[str],
+    base_dir: Path,
+    out_dir: Path,
+    thumb_width: int,
+    image_width: int,
+    preserve_aspect_ratio: bool,
+    use_mask: bool,
+    darken_factor: float,
+    crops: Optional[List[Dict]],
+    copy_originals: bool,
+) -> Dict:
+    """
+    生成一个样本的缩略图（可在子进程中运行，参数和返回值均可 pickle）
+    参数:
+        position: 样本在导出中的位置（用于文件命名）
+        crops: Close View 裁剪框（'box' 和 'color'），None 表示不显示
+        copy_originals: 是否把原图复制到画廊目录，否则链接到原图的绝对路径
+    返回:
+        {"cells": 每个方法一个单元格, "close_views": 每个 crop 一行单元格}
+        单元格为 {"thumb", "width", "height", "href"} 或 {"text"}
+    """
+    mask_path = base_dir / sample["mask"] if use_mask and sample.get("mask") else None
+
+    cells = []
+    for col, method_name in enumerate(method_names):
+        if method_name not in sample["images"]:
+            cells.append({"text": "N/A"})
+            continue
+
+        image_rel_path = sample["images"][method_name]
+        image_path = base_dir / image_rel_path if image_rel_path is not None else None
+        if image_path is None or not image_path.is_file():
+            cells.append({"text": "Missing"})
+            continue
+
+        prepared = prepare_image(
+            image_path,
+            image_width,
+            preserve_aspect_ratio,
+            mask_path=mask_path,
+            darken_factor=darken_factor,
+            crops=crops,
+            use_cache=False,
+        )
+        if prepared["error"] is not None:
+            cells.append({"text": "Error"})
+            continue
+
+        cell = _save_thumb(
+            prepared["image"], out_dir, f"{position:06d}_{col}.webp", thumb_width
+        )
+        if copy_originals:
+            original_name = f"{position:06d}_{col}{image_path.suffix.lower()}"
+            shutil.copyfile(image_path, out_dir / "originals" / original_name)
+            cell["href"] = f"originals/{quote(original_name)}"
+        else:
+            cell["href"] = image_path.resolve().as_uri()
+        cells.append(cell)
+
+    close_views = []
+    for crop_idx, crop in enumerate(crops or []):
+        cropped_images, _ = crop_sample_images(
+            sample, tuple(crop["box"]), method_names, base_dir, thumb_width
+        )
+        row = []
+        for col, method_name in enumerate(method_names):
+            cropped = cropped_images.get(method_name)
+            if cropped is None:
+                row.append({"text": "N/A"})
+                continue
+            cell = _save_thumb(
+                cropped, out_dir, f"{position:06d}_{col}_c{crop_idx}.webp", thumb_width
+            )
+            cell["href"] = cells[col].get("href")
+            row.append(cell)
+        close_views.append(row)
+
+    return {"cells": cells, "close_views": close_views}
+
+
+def _cell_html(cell: Dict) -> str:
+    if "text" in cell:
+        return f'<div class="cell-text">{html.escape(cell["text"])}</div>'
+    img = (
+        f'<img src="{cell["thumb"]}" width="{cell["width"]}" height="{cell["height"]}"'
+        ' loading="lazy" decoding="async" alt="">'
+    )
+    if cell.get("href"):
+        return f'<a href="{html.escape(cell["href"])}" target="_blank">{img}</a>'
+    return f"<div>{img}</div>"
+
+
+def build_sample_html(
+    sample: Dict,
+    rendered: Dict,
+    visible_methods_list: List[Dict],
+    crops: Optional[List[Dict]],
+    is_first: bool,
+    show_method_name: bool,
+    show_sample_name: bool,
+    show_text: bool,
+    lang: Dict,
+) -> str:
+    """生成一个样本的 HTML 区块"""
+    name = html.escape(str(sample["name"]))
+    parts = ['<section class="sample">']
+
+    if show_sample_name:
+        parts.append(f'<div class="sample-name">Sample: {name}</div>')
+
+    # 方法名称行（只在第一个样本显示）
+    if show_method_name and is_first:
+        parts.append('<div class="row">')
+        parts.extend(
+            f'<div class="method-name">{html.escape(m["name"])}</div>'
+            for m in visible_methods_list
+        )
+        parts.append("</div>")
+
+    parts.append('<div class="row">')
+    parts.extend(_cell_html(cell) for cell in rendered["cells"])
+    parts.append("</div>")
+
+    for crop_idx, (crop, row) in enumerate(zip(crops or [], rendered["close_views"])):
+        parts.append(
+            f'<div class="close-view"><span class="swatch" '
+            f'style="background-color: {html.escape(crop["color"])}"></span>'
+            f"Close View #{crop_idx + 1}</div>"
+        )
+        parts.append('<div class="row">')
+        parts.extend(_cell_html(cell) for cell in row)
+        parts.append("</div>")
+
+    if show_text and sample.get("text"):
+        text = html.escape(str(sample["text"]))
+        label = lang["gallery_text_label"]
+        if show_sample_name:
+            parts.append(f'<div class="text"><b>{name}</b> ｜ {label} {text}</div>')
+        else:
+            parts.append(f'<div class="text">{label} {text}</div>')
+
+    parts.append("</section>")
+    return "\n".join(parts)
+
+
+def build_descriptions_html(methods: List[Dict], lang: Dict) -> str:
+    """方法说明区块"""
+    parts = [
+        '<section class="descriptions">',
+        f'<div class="sample-name">{html.escape(lang["method_desc_title"])}</div>',
+        '<div class="row">',
+    ]
+    for method in methods:
+        parts.append(
+            f'<div><div class="method-name">{html.escape(method["name"])}</div>'
+            f'<div class="desc">{html.escape(method.get("description", ""))}</div></div>'
+        )
+    parts.append("</div></section>")
+    return "\n".join(parts)
+
+
+def export_html_gallery(
+    samples: Sequence,
+    methods: List[Dict],
+    base_dir: Path,
+    output_path: Path,
+    show_method_name: bool,
+    show_text: bool,
+    show_sample_name: bool,
+    show_descriptions: bool,
+    close_view_enabled: bool,
+    crop_data: Dict,
+    preserve_aspect_ratio: bool,
+    lang: Dict,
+    use_mask: bool = False,
+    darken_factor: float = 0.5,
+    image_width: int = 800,
+    visible_methods: Optional[List[str]] = None,
+    copy_originals: bool = True,
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> Path:
+    """
+    将样本导出为静态 HTML 画廊
+    参数:
+        samples: 样本序列，可以是 FilteredSamples 视图（crop_data 按原始索引查找）
+        output_path: 画廊目录（须不存在或为空目录，否则抛出 FileExistsError）；
+            以 .zip 结尾时在输出文件旁的临时目录中生成画廊后打包为 zip
+        copy_originals: 是否把原图复制到画廊中（否则链接到原图的绝对路径）
+        max_workers: 缩略图生成进程数，默认为 CPU 核数；1 表示在当前进程处理
+        progress_callback: 进度回调 (已完成样本数, 总样本数)
+        其余参数与 export_dataset_pdf 相同
+    返回:
+        index.html 路径，或打包后的 zip 路径
+    """
+    visible_methods_list = (
+        filter_visible_methods(methods, visible_methods) if visible_methods else methods
+    )
+    method_names = [m["name"] for m in visible_methods_list]
+    thumb_width = get_thumb_width(len(method_names), image_width)
+    base_dir = Path(base_dir)
+    total = len(samples)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    output_path = Path(output_path)
+    archive = output_path.suffix.lower() == ".zip"
+    if archive:
+        # 打包前的文件放在临时目录中，不使用由输出路径推导的目录（可能是用户已有的目录）
+        staging_dir = make_staging_dir(output_path)
+        out_dir = staging_dir / output_path.stem
+    else:
+        staging_dir = None
+        out_dir = output_path
+        create_output_dir(out_dir)
+
+    try:
+        (out_dir / "thumbs").mkdir(parents=True)
+        if copy_originals:
+            (out_dir / "originals").mkdir()
+
+        def crops_for(position: int) -> Optional[List[Dict]]:
+            return get_crop_boxes(
+                crop_data.get(get_source_index(samples, position)), close_view_enabled
+            )
+
+        def render_jobs():
+            for position in range(total):
+                yield (
+                    plain_sample(samples[position]),
+                    position,
+                    method_names,
+                    base_dir,
+                    out_dir,
+                    thumb_width,
+                    image_width,
+                    preserve_aspect_ratio,
+                    use_mask,
+                    darken_factor,
+                    crops_for(position),
+                    copy_originals,
+                )
+
+        executor = None
+        if max_workers > 1 and total > 1:
+            # spawn 避免在多线程的服务进程中 fork
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+        try:
+            rendered_samples = ordered_map(
+                executor,
+                render_sample_thumbnails,
+                render_jobs(),
+                prefetch=max_workers * PREFETCH_PER_WORKER,
+            )
+            with open(out_dir / "index.html", "w", encoding="utf-8") as f:
+                f.write(
+                    '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+                    '<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+                    f"<title>{html.escape(lang['page_title'])}</title>\n<style>"
+                    + GALLERY_CSS
+                    % {"page_width": HTML_GALLERY_PAGE_WIDTH, "num_cols": len(method_names)}
+                    + "</style>\n</head>\n<body>\n<main>\n"
+                )
+                for position, rendered in enumerate(rendered_samples):
+                    f.write(
+                        build_sample_html(
+                            samples[position],
+                            rendered,
+                            visible_methods_list,
+                            crops_for(position),
+                            is_first=position == 0,
+                            show_method_name=show_method_name,
+                            show_sample_name=show_sample_name,
+                            show_text=show_text,
+                            lang=lang,
+                        )
+                    )
+                    f.write("\n")
+                    if progress_callback is not None:
+                        progress_callback(position + 1, total)
+
+                if show_descriptions:
+                    f.write(build_descriptions_html(visible_methods_list, lang))
+                f.write("\n</main>\n</body>\n</html>\n")
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        if not archive:
+            return out_dir / "index.html"
+
+        # 缩略图和原图已是压缩格式，zip 只存储不压缩
+        with zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_STORED) as zf:
+            for path in sorted(out_dir.rglob("*")):
+                if path.is_file():
+                    zf.write(path, f"{out_dir.name}/{path.relative_to(out_dir).as_posix()}")
+        return output_path
+    finally:
+        if staging_dir is not None:
+            shutil.rmtree(staging_dir, ignore_errors=True)
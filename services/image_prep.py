@@ -0,0 +1,203 @@
+"""
+图片准备服务
+
+网页主视图和 PDF 导出以相同的参数处理同一批图片（解码、裁剪缩放、mask、
+crop 框）。两者都通过这里准备图片，结果放入进程内共享、按字节数限制的
+LRU 缓存，导出当前视图时直接复用网页已准备好的像素，只剩 PDF 排版工作。
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from PIL import Image
+
+from config.constants import IMAGE_CACHE_MAX_BYTES
+from utils.image_processing import (
+    create_placeholder_image,
+    draw_all_crop_boxes_on_image,
+    process_loaded_image,
+)
+from utils.mask import load_mask, apply_mask_to_image
+from utils.metrics import inc, record_file_read
+from utils.timing import count, timed_stage
+
+
+def _image_nbytes(image: Image.Image) -> int:
+    """估算图片占用的内存（像素数据）"""
+    width, height = image.size
+    return width * height * len(image.getbands())
+
+
+class ImageCache:
+    """按字节数限制的 LRU 图片缓存（线程安全）"""
+
+    def __init__(self, max_bytes: int = IMAGE_CACHE_MAX_BYTES):
+        self._entries: "OrderedDict[Hashable, Tuple[Dict, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                inc("image_viewer_cache_requests_total", cache="image", result="miss")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            inc("image_viewer_cache_requests_total", cache="image", result="hit")
+            return item[0]
+
+    def put(self, key: Hashable, entry: Dict):
+        nbytes = _image_nbytes(entry["image"])
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._entries[key] = (entry, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                inc("image_viewer_cache_evictions_total", cache="image")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+_image_cache = ImageCache()
+
+
+def get_image_cache() -> ImageCache:
+    """获取进程内共享的图片缓存"""
+    return _image_cache
+
+
+def _file_key(path: Path) -> Optional[Tuple[str, int, int]]:
+    """文件标识（路径、修改时间、大小），文件变化后缓存自动失效；不存在返回 None"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    if not path.is_file():
+        return None
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _placeholder(target_width: int, placeholder_text: str, error: Optional[str] = None) -> Dict:
+    return {
+        "image": create_placeholder_image(target_width, target_width, placeholder_text),
+        "original_ratio": 1.0,
+        "was_cropped": False,
+        "original_size": None,
+        "format": None,
+        "error": error,
+    }
+
+
+@timed_stage("prepare_image")
+def prepare_image(
+    image_path: Optional[Path],
+    target_width: int,
+    preserve_aspect_ratio: bool,
+    mask_path: Optional[Path] = None,
+    darken_factor: float = 0.5,
+    crops: Optional[List[Dict]] = None,
+    placeholder_text: str = "Image Missing",
+    use_cache: bool = True,
+) -> Dict:
+    """
+    准备用于显示/导出的图片
+    参数:
+        image_path: 图片路径（为 None 或文件不存在时返回占位符）
+        target_width: 目标宽度
+        preserve_aspect_ratio: 是否保持原始比例
+        mask_path: mask 路径（为 None 或文件不存在时不应用 mask）
+        darken_factor: mask 外区域的变暗程度
+        crops: 需要绘制的 crop 框列表（包含 'box' 和 'color'）
+        placeholder_text: 占位符文本
+        use_cache: 是否使用进程内缓存（导出子进程中只处理一次，不需要缓存）
+    返回:
+        {"image", "original_ratio", "was_cropped", "original_size", "format", "error"}
+        format 为源文件格式（如 "JPEG"）
+        返回的字典和图片在缓存中共享，调用方不能原地修改
+    """
+    if image_path is None:
+        return _placeholder(target_width, placeholder_text)
+
+    image_key = _file_key(image_path)
+    if image_key is None:
+        return _placeholder(target_width, placeholder_text)
+
+    cache = get_image_cache() if use_cache else None
+
+    # 第一层：解码、裁剪、缩放后的图片
+    base_key = ("base", image_key, target_width, preserve_aspect_ratio)
+    base = cache.get(base_key) if cache is not None else None
+    if cache is not None:
+        count("image_cache_miss" if base is None else "image_cache_hit")
+    if base is None:
+        try:
+            with Image.open(image_path) as img:
+                record_file_read("image", image_path, image_key[2])
+                original_size = img.size
+                source_format = img.format
+                processed, original_ratio, was_cropped = process_loaded_image(
+                    img, target_width, preserve_aspect_ratio
+                )
+        except Exception as e:
+            # 出错时生成占位符（不缓存，文件修复后可以重新加载）
+            return _placeholder(target_width, placeholder_text, error=str(e))
+        base = {
+            "image": processed,
+            "original_ratio": original_ratio,
+            "was_cropped": was_cropped,
+            "original_size": original_size,
+            "format": source_format,
+            "error": None,
+        }
+        if cache is not None:
+            cache.put(base_key, base)
+
+    mask_key = _file_key(mask_path) if mask_path is not None else None
+    crops_key = tuple((tuple(c["box"]), c["color"]) for c in crops or ())
+    if mask_key is None and not crops_key:
+        return base
+
+    # 第二层：应用 mask、绘制 crop 框后的图片
+    prepared_key = (
+        "prepared",
+        base_key,
+        mask_key,
+        darken_factor if mask_key else None,
+        crops_key,
+    )
+    prepared = cache.get(prepared_key) if cache is not None else None
+    if cache is not None:
+        count("image_cache_miss" if prepared is None else "image_cache_hit")
+    if prepared is None:
+        image = base["image"]
+        if mask_key is not None:
+            mask_img = load_mask(mask_path, image.size)
+            if mask_img is not None:
+                image = apply_mask_to_image(image, mask_img, darken_factor)
+        if crops_key:
+            image = draw_all_crop_boxes_on_image(
+                image, crops, base["original_size"], image.size
+            )
+        prepared = {**base, "image": image}
+        if cache is not None:
+            cache.put(prepared_key, prepared)
+    return prepared
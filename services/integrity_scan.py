@@ -0,0 +1,285 @@
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from config.constants import INTEGRITY_CACHE_MAX_ENTRIES, INTEGRITY_MAX_WORKERS
+from utils.metrics import inc
+
+
+# 检查级别：不检查 / 仅检查文件存在 / 读取文件头 / 完整解码
+SCAN_LEVELS = ("off", "stat", "header", "decode")
+
+# 问题类型
+STATUS_MISSING = "missing"
+STATUS_CORRUPT = "corrupt"
+STATUS_UNREADABLE = "unreadable"
+ISSUE_STATUSES = (STATUS_MISSING, STATUS_CORRUPT, STATUS_UNREADABLE)
+
+# mask / reference 在报告中使用的角色名
+ROLE_MASK = "mask"
+ROLE_REFERENCE = "reference"
+
+# 每个线程任务检查的文件数（减少任务调度开销）
+SCAN_BATCH_SIZE = 256
+
+# 后台检查任务状态
+SCAN_RUNNING = "running"
+SCAN_DONE = "done"
+SCAN_FAILED = "failed"
+
+
+def check_image_file(path: Path, level: str = "header") -> Optional[str]:
+    """
+    检查单个图片文件
+    参数:
+        path: 图片路径
+        level: 检查级别（stat / header / decode）
+    返回:
+        问题类型（missing / corrupt / unreadable），没有问题返回 None
+    """
+    try:
+        file_stat = os.stat(path)
+    except FileNotFoundError:
+        return STATUS_MISSING
+    except OSError:
+        return STATUS_UNREADABLE
+
+    if not stat.S_ISREG(file_stat.st_mode):
+        return STATUS_MISSING
+    if level == "stat":
+        return None
+
+    try:
+        with Image.open(path) as img:
+            if level == "decode":
+                img.load()
+    except PermissionError:
+        return STATUS_UNREADABLE
+    except Exception:
+        # UnidentifiedImageError / 截断文件 / 解码失败
+        return STATUS_CORRUPT
+    return None
+
+
+def _check_batch(paths: List[Path], level: str) -> List[Optional[str]]:
+    return [check_image_file(path, level) for path in paths]
+
+
+def scan_dataset_integrity(
+    samples: List[Dict],
+    methods: List[Dict],
+    base_dir: Path,
+    level: str = "header",
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> Dict:
+    """
+    并行检查数据集中引用的所有图片和 mask
+
+    参数:
+        samples: 样本列表
+        methods: 方法列表
+        base_dir: 图片基础路径
+        level: 检查级别（stat / header / decode）
+        max_workers: 线程数（默认由 ThreadPoolExecutor 决定）
+        progress_callback: 进度回调 (已检查文件数, 文件总数)
+    返回:
+        报告字典 {
+            'level': str,
+            'num_samples': int,
+            'num_files': int,
+            'issues': [{'sample_idx', 'sample_name', 'role', 'path', 'status'}, ...],
+            'counts': {role: {status: int}},
+            'bad_samples': [sample_idx, ...],
+        }
+    """
+    # 收集引用：路径 -> [(sample_idx, sample_name, role, rel_path)]
+    references: Dict[Path, List[Tuple[int, str, str, str]]] = {}
+    issues = []
+
+    def add_issue(sample_idx, sample_name, role, rel_path, status):
+        issues.append(
+            {
+                "sample_idx": sample_idx,
+                "sample_name": sample_name,
+                "role": role,
+                "path": rel_path,
+                "status": status,
+            }
+        )
+
+    num_samples = 0
+    for sample_idx, sample in enumerate(samples):
+        num_samples += 1
+        sample_name = sample["name"]
+        images = sample["images"]
+
+        for method in methods:
+            method_name = method["name"]
+            rel_path = images.get(method_name)
+            if rel_path is None:
+                # 配置中缺少该方法或路径为 None
+                add_issue(sample_idx, sample_name, method_name, None, STATUS_MISSING)
+                continue
+            references.setdefault(base_dir / rel_path, []).append(
+                (sample_idx, sample_name, method_name, rel_path)
+            )
+
+        for role in (ROLE_MASK, ROLE_REFERENCE):
+            rel_path = sample.get(role)
+            if rel_path:
+                references.setdefault(base_dir / rel_path, []).append(
+                    (sample_idx, sample_name, role, rel_path)
+                )
+
+    # 每个文件只检查一次（mask 等经常被多个样本共享）
+    paths = list(references.keys())
+    batches = [
+        paths[i : i + SCAN_BATCH_SIZE] for i in range(0, len(paths), SCAN_BATCH_SIZE)
+    ]
+
+    checked = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda batch: _check_batch(batch, level), batches)
+        for batch, statuses in zip(batches, results):
+            for path, status in zip(batch, statuses):
+                if status is None:
+                    continue
+                for sample_idx, sample_name, role, rel_path in references[path]:
+                    add_issue(sample_idx, sample_name, role, rel_path, status)
+            checked += len(batch)
+            if progress_callback:
+                progress_callback(checked, len(paths))
+
+    issues.sort(key=lambda issue: (issue["sample_idx"], issue["role"]))
+
+    counts: Dict[str, Dict[str, int]] = {}
+    for issue in issues:
+        role_counts = counts.setdefault(issue["role"], {})
+        role_counts[issue["status"]] = role_counts.get(issue["status"], 0) + 1
+
+    return {
+        "level": level,
+        "num_samples": num_samples,
+        "num_files": len(paths),
+        "issues": issues,
+        "counts": counts,
+        "bad_samples": sorted({issue["sample_idx"] for issue in issues}),
+    }
+
+
+class IntegrityScanRegistry:
+    """
+    后台完整性检查任务（进程内共享，使用独立的线程池和报告缓存）
+    每个键（配置摘要 + 检查级别）对应一个任务字典:
+        status: running / done / failed
+        progress: 0-1
+        done / total: 已检查文件数和文件总数
+        result: 检查报告（见 scan_dataset_integrity）
+        error: 错误信息（失败时）
+    """
+
+    def __init__(
+        self,
+        max_entries: int = INTEGRITY_CACHE_MAX_ENTRIES,
+        max_workers: int = INTEGRITY_MAX_WORKERS,
+    ):
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="integrity"
+        )
+
+    def get(self, key: str) -> Optional[Dict]:
+        """获取任务（不存在返回 None）"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                self._jobs.move_to_end(key)
+            return job
+
+    def submit(
+        self,
+        key: str,
+        samples: List[Dict],
+        methods: List[Dict],
+        base_dir: Path,
+        level: str,
+        force: bool = False,
+    ) -> Dict:
+        """
+        提交检查任务；同一个键已有进行中或已完成的任务时直接返回该任务
+        force: 重新检查（替换已完成或失败的任务，进行中的任务不重复提交）
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and (
+                job["status"] == SCAN_RUNNING or (job["status"] == SCAN_DONE and not force)
+            ):
+                return job
+
+            job = {
+                "status": SCAN_RUNNING,
+                "progress": 0.0,
+                "done": 0,
+                "total": 0,
+                "result": None,
+                "error": None,
+                "started": time.time(),
+                "finished": None,
+            }
+            self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            self._evict()
+
+        self._executor.submit(self._run, job, samples, methods, base_dir, level)
+        return job
+
+    def _run(self, job: Dict, samples, methods, base_dir, level):
+        def progress_callback(done: int, total: int):
+            job["done"] = done
+            job["total"] = total
+            job["progress"] = min(1.0, done / total) if total else 1.0
+
+        try:
+            result = scan_dataset_integrity(
+                samples, methods, base_dir, level=level, progress_callback=progress_callback
+            )
+        except Exception as e:
+            job["error"] = str(e)
+            job["status"] = SCAN_FAILED
+        else:
+            job["result"] = result
+            job["progress"] = 1.0
+            job["status"] = SCAN_DONE
+        job["finished"] = time.time()
+
+    def _evict(self):
+        """超出数量上限时移除最久未使用的已结束任务（进行中的任务保留）"""
+        excess = len(self._jobs) - self._max_entries
+        if excess <= 0:
+            return
+        for key in [k for k, job in self._jobs.items() if job["status"] != SCAN_RUNNING][:excess]:
+            self._jobs.pop(key)
+            inc("image_viewer_cache_evictions_total", cache="integrity_reports")
+
+
+_registry: Optional[IntegrityScanRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_integrity_registry() -> IntegrityScanRegistry:
+    """获取进程内共享的完整性检查任务注册表"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = IntegrityScanRegistry()
+        return _registry
@@ -0,0 +1,135 @@
+"""
+监控指标输出（不依赖界面）
+
+启用后在后台线程中提供 HTTP /metrics 端点和/或定期写入指标文件，每个进程只启动一次。
+会话数、图片缓存和导出任务等当前值在输出时从各注册表读取。
+"""
+
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from config.constants import (
+    METRICS_FILE,
+    METRICS_FILE_INTERVAL,
+    METRICS_HOST,
+    METRICS_PORT,
+    SESSION_IDLE_TIMEOUT,
+)
+from services.export_jobs import JOB_DONE, JOB_FAILED, JOB_RUNNING, get_export_registry
+from services.image_prep import get_image_cache
+from services.session_memory import get_session_memory_registry
+from utils.metrics import get_metrics_registry
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def collect_service_gauges() -> Iterable[Tuple[str, Dict[str, str], float]]:
+    """读取会话、图片缓存和导出任务的当前值"""
+    now = time.time()
+    sessions = get_session_memory_registry().snapshot()
+    yield (
+        "image_viewer_active_sessions",
+        {},
+        sum(row["running"] or now - row["last_seen"] < SESSION_IDLE_TIMEOUT for row in sessions),
+    )
+    yield "image_viewer_session_memory_bytes", {}, sum(row["bytes"] for row in sessions)
+
+    cache = get_image_cache()
+    yield "image_viewer_image_cache_bytes", {}, cache.nbytes
+    yield "image_viewer_image_cache_entries", {}, len(cache)
+
+    stats = get_export_registry().stats()
+    yield "image_viewer_export_jobs", {"status": JOB_RUNNING}, stats["running"]
+    yield "image_viewer_export_jobs", {"status": JOB_FAILED}, stats["failed"]
+    yield (
+        "image_viewer_export_jobs",
+        {"status": JOB_DONE},
+        stats["jobs"] - stats["running"] - stats["failed"],
+    )
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics_registry().render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 不在服务日志中记录每次抓取
+        pass
+
+
+def write_metrics_file(path: Path):
+    """写入指标文件（先写临时文件再替换，读取方不会看到写了一半的内容）"""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(get_metrics_registry().render(), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _file_writer_loop(path: Path, interval: float):
+    while True:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_metrics_file(path)
+        except OSError as e:
+            print(f"写入指标文件失败: {e}", file=sys.stderr)
+        time.sleep(interval)
+
+
+_started = False
+_server: Optional[ThreadingHTTPServer] = None
+_start_lock = threading.Lock()
+
+
+def start_metrics_exporter(
+    port: Optional[int] = METRICS_PORT,
+    host: str = METRICS_HOST,
+    path: Optional[Path] = METRICS_FILE,
+    interval: float = METRICS_FILE_INTERVAL,
+) -> bool:
+    """
+    按配置启动指标输出（每个进程只启动一次，之后的调用直接返回）
+    参数:
+        port: HTTP 端口（None 表示不启动 HTTP 端点）
+        path: 指标文件路径（None 表示不写文件）
+    返回:
+        是否启用了指标
+    """
+    global _started, _server
+    registry = get_metrics_registry()
+    with _start_lock:
+        if _started:
+            return registry.enabled
+        _started = True
+        if port is None and path is None:
+            return False
+
+        registry.add_collector(collect_service_gauges)
+        registry.enabled = True
+        if port is not None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                # 端口被占用等情况不影响应用本身
+                print(f"指标端点启动失败 ({host}:{port}): {e}", file=sys.stderr)
+            else:
+                _server.daemon_threads = True
+                threading.Thread(
+                    target=_server.serve_forever, name="metrics-http", daemon=True
+                ).start()
+        if path is not None:
+            threading.Thread(
+                target=_file_writer_loop, args=(path, interval), name="metrics-file", daemon=True
+            ).start()
+        return True
@@ -0,0 +1,375 @@
+"""
+拼图（contact sheet）导出
+
+每张输出图片包含一个或多个样本：方法并排、Close View 在下方、标注在上方，
+版式选项与 PDF 导出相同。先准备所有图块并计算版面，再一次性分配整张画布，
+图块直接粘贴到画布上，不生成中间拼接结果。多张图片在进程池中并行渲染。
+"""
+
+import multiprocessing
+import os
+import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from config.constants import CROP_COLORS, MOSAIC_FONT_PATH, MOSAIC_GAP
+from utils.image_processing import crop_sample_images, filter_visible_methods
+from utils.sample_filter import get_source_index
+from services.image_prep import prepare_image
+from services.pdf_export import get_crop_boxes
+from services.dataset_export import (
+    PREFETCH_PER_WORKER,
+    create_output_dir,
+    make_staging_dir,
+    ordered_map,
+    plain_sample,
+)
+
+# 输出格式 -> (PIL 格式, 文件后缀, 保存参数)
+MOSAIC_SAVE_OPTIONS = {
+    "png": ("PNG", ".png", {"compress_level": 6}),
+    "webp": ("WEBP", ".webp", {"quality": 90, "method": 4}),
+    "jpeg": ("JPEG", ".jpg", {"quality": 90, "subsampling": 0}),
+}
+
+BACKGROUND = (255, 255, 255)
+PLACEHOLDER = (220, 220, 220)
+TEXT_COLOR = (0, 0, 0)
+MUTED_COLOR = (120, 120, 120)
+
+
+@lru_cache(maxsize=8)
+def get_font(size: int) -> ImageFont.ImageFont:
+    """标注字体（优先使用 IMAGE_VIEWER_FONT 指定的字体文件）"""
+    if MOSAIC_FONT_PATH:
+        try:
+            return ImageFont.truetype(MOSAIC_FONT_PATH, size)
+        except OSError:
+            pass
+    return ImageFont.load_default(size=size)
+
+
+def _wrap_text(text: str, font: ImageFont.ImageFont, width: int) -> List[str]:
+    """按像素宽度折行（逐字符，兼容中文）"""
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        line = ""
+        for char in paragraph:
+            if line and font.getlength(line + char) > width:
+                lines.append(line)
+                line = char
+            else:
+                line += char
+        lines.append(line)
+    return lines
+
+
+def _load_tiles(
+    sample: Dict,
+    method_names: List[str],
+    base_dir: Path,
+    image_width: int,
+    preserve_aspect_ratio: bool,
+    use_mask: bool,
+    darken_factor: float,
+    crops: Optional[List[Dict]],
+) -> Tuple[List, List[List]]:
+    """
+    准备一个样本的主图片和 Close View 图块
+    返回: (主图片行, 每个 crop 一行)；图块为 PIL 图片或占位文本
+    """
+    mask_path = base_dir / sample["mask"] if use_mask and sample.get("mask") else None
+
+    main_row = []
+    for method_name in method_names:
+        if method_name not in sample["images"]:
+            main_row.append("N/A")
+            continue
+        image_rel_path = sample["images"][method_name]
+        image_path = base_dir / image_rel_path if image_rel_path is not None else None
+        if image_path is None or not image_path.is_file():
+            main_row.append("Missing")
+            continue
+        prepared = prepare_image(
+            image_path,
+            image_width,
+            preserve_aspect_ratio,
+            mask_path=mask_path,
+            darken_factor=darken_factor,
+            crops=crops,
+            use_cache=False,
+        )
+        main_row.append("Error" if prepared["error"] is not None else prepared["image"])
+
+    crop_rows = []
+    for crop in crops or []:
+        cropped_images, _ = crop_sample_images(
+            sample, tuple(crop["box"]), method_names, base_dir, image_width
+        )
+        crop_rows.append([cropped_images.get(name, "N/A") for name in method_names])
+    return main_row, crop_rows
+
+
+def _row_height(row: List, image_width: int) -> int:
+    heights = [tile.height for tile in row if isinstance(tile, Image.Image)]
+    return max(heights) if heights else image_width
+
+
+def render_mosaic(
+    samples: List[Dict],
+    sample_crops: List[Optional[List[Dict]]],
+    output_file: Path,
+    method_names: List[str],
+    base_dir: Path,
+    image_width: int,
+    preserve_aspect_ratio: bool,
+    use_mask: bool,
+    darken_factor: float,
+    show_method_name: bool,
+    show_sample_name: bool,
+    show_text: bool,
+    text_label: str,
+    image_format: str,
+) -> Tuple[str, int, int]:
+    """
+    渲染一张拼图并保存（可在子进程中运行，参数和返回值均可 pickle）
+    参数:
+        samples: 该图片包含的样本
+        sample_crops: 每个样本的 Close View 裁剪框（'box' 和 'color'），None 表示不显示
+        text_label: 样本文本前的标签（如 "Text:"）
+        image_format: 输出格式，见 MOSAIC_SAVE_OPTIONS
+    返回:
+        (文件名, 宽度, 高度)
+    """
+    num_cols = len(method_names)
+    gap = MOSAIC_GAP
+    font_size = max(14, image_width // 28)
+    font = get_font(font_size)
+    bold_font = get_font(font_size + 2)
+    line_height = int(font_size * 1.4)
+    canvas_width = num_cols * image_width + (num_cols + 1) * gap
+    text_width = canvas_width - 2 * gap
+
+    # 第一遍：准备图块、计算每个区块的高度
+    blocks = []
+    height = gap
+    for sample_idx, (sample, crops) in enumerate(zip(samples, sample_crops)):
+        main_row, crop_rows = _load_tiles(
+            sample,
+            method_names,
+            base_dir,
+            image_width,
+            preserve_aspect_ratio,
+            use_mask,
+            darken_factor,
+            crops,
+        )
+        text_lines = []
+        if show_text and sample.get("text"):
+            prefix = f"{sample['name']} | " if show_sample_name else ""
+            text_lines = _wrap_text(f"{prefix}{text_label} {sample['text']}", font, text_width)
+
+        block = {
+            "sample": sample,
+            "crops": crops or [],
+            "main_row": main_row,
+            "crop_rows": crop_rows,
+            "text_lines": text_lines,
+            "show_methods": show_method_name and sample_idx == 0,
+        }
+        blocks.append(block)
+        if show_sample_name:
+            height += line_height
+        if block["show_methods"]:
+            height += line_height
+        height += _row_height(main_row, image_width) + gap
+        for row in crop_rows:
+            height += line_height + _row_height(row, image_width) + gap
+        height += len(text_lines) * line_height + gap
+
+    # 第二遍：一次分配画布，图块直接粘贴到最终位置
+    canvas = Image.new("RGB", (canvas_width, height), BACKGROUND)
+    draw = ImageDraw.Draw(canvas)
+
+    def col_x(col: int) -> int:
+        return gap + col * (image_width + gap)
+
+    def paste_row(row: List, y: int) -> int:
+        row_height = _row_height(row, image_width)
+        for col, tile in enumerate(row):
+            x = col_x(col)
+            if isinstance(tile, Image.Image):
+                canvas.paste(tile, (x, y))
+            else:
+                draw.rectangle(
+                    (x, y, x + image_width - 1, y + row_height - 1), fill=PLACEHOLDER
+                )
+                tw = draw.textlength(tile, font=font)
+                draw.text(
+                    (x + (image_width - tw) / 2, y + (row_height - font_size) / 2),
+                    tile,
+                    fill=MUTED_COLOR,
+                    font=font,
+                )
+        return y + row_height + gap
+
+    y = gap
+    for block in blocks:
+        if show_sample_name:
+            draw.text((gap, y), f"Sample: {block['sample']['name']}", fill=TEXT_COLOR, font=bold_font)
+            y += line_height
+        if block["show_methods"]:
+            for col, name in enumerate(method_names):
+                draw.text((col_x(col), y), name, fill=TEXT_COLOR, font=bold_font)
+            y += line_height
+        y = paste_row(block["main_row"], y)
+
+        for crop_idx, (crop, row) in enumerate(zip(block["crops"], block["crop_rows"])):
+            color = crop.get("color") or CROP_COLORS[crop_idx % len(CROP_COLORS)]
+            square = font_size
+            draw.rectangle(
+                (gap, y + 2, gap + square, y + 2 + square), fill=color, outline=TEXT_COLOR
+            )
+            draw.text(
+                (gap + square + 6, y), f"Close View #{crop_idx + 1}", fill=TEXT_COLOR, font=font
+            )
+            y = paste_row(row, y + line_height)
+
+        for line in block["text_lines"]:
+            draw.text((gap, y), line, fill=TEXT_COLOR, font=font)
+            y += line_height
+        y += gap
+
+    pil_format, _, save_kwargs = MOSAIC_SAVE_OPTIONS[image_format]
+    canvas.save(output_file, pil_format, **save_kwargs)
+    return output_file.name, canvas_width, height
+
+
+def _safe_name(name: str) -> str:
+    return "".join(c for c in str(name) if c.isalnum() or c in "-_")[:64]
+
+
+def export_mosaics(
+    samples: Sequence,
+    methods: List[Dict],
+    base_dir: Path,
+    output_path: Path,
+    show_method_name: bool,
+    show_text: bool,
+    show_sample_name: bool,
+    close_view_enabled: bool,
+    crop_data: Dict,
+    preserve_aspect_ratio: bool,
+    lang: Dict,
+    use_mask: bool = False,
+    darken_factor: float = 0.5,
+    image_width: int = 800,
+    visible_methods: Optional[List[str]] = None,
+    image_format: str = "png",
+    samples_per_image: int = 1,
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> Path:
+    """
+    将样本导出为拼图图片
+    参数:
+        samples: 样本序列，可以是 FilteredSamples 视图（crop_data 按原始索引查找）
+        output_path: 输出目录（须不存在或为空目录，否则抛出 FileExistsError）；
+            以 .zip 结尾时在输出文件旁的临时目录中渲染后打包为 zip
+        image_format: png / webp / jpeg
+        samples_per_image: 每张图片包含的样本数（1 表示每个样本一张）
+        max_workers: 渲染进程数，默认为 CPU 核数；1 表示在当前进程处理
+        progress_callback: 进度回调 (已完成样本数, 总样本数)
+        其余参数与 export_dataset_pdf 相同
+    返回:
+        输出目录，或打包后的 zip 路径
+    """
+    visible_methods_list = (
+        filter_visible_methods(methods, visible_methods) if visible_methods else methods
+    )
+    method_names = [m["name"] for m in visible_methods_list]
+    base_dir = Path(base_dir)
+    total = len(samples)
+    per_image = max(1, samples_per_image)
+    max_workers = max_workers or os.cpu_count() or 1
+    suffix = MOSAIC_SAVE_OPTIONS[image_format][1]
+
+    output_path = Path(output_path)
+    archive = output_path.suffix.lower() == ".zip"
+    if archive:
+        # 打包前的图片放在临时目录中，不使用由输出路径推导的目录（可能是用户已有的目录）
+        staging_dir = make_staging_dir(output_path)
+        out_dir = staging_dir / output_path.stem
+        out_dir.mkdir()
+    else:
+        staging_dir = None
+        out_dir = output_path
+        create_output_dir(out_dir)
+
+    try:
+
+        def render_jobs():
+            for start in range(0, total, per_image):
+                positions = range(start, min(start + per_image, total))
+                first_name = _safe_name(samples[start]["name"])
+                yield (
+                    [plain_sample(samples[pos]) for pos in positions],
+                    [
+                        get_crop_boxes(
+                            crop_data.get(get_source_index(samples, pos)), close_view_enabled
+                        )
+                        for pos in positions
+                    ],
+                    out_dir / f"{start // per_image:05d}_{first_name}{suffix}",
+                    method_names,
+                    base_dir,
+                    image_width,
+                    preserve_aspect_ratio,
+                    use_mask,
+                    darken_factor,
+                    show_method_name,
+                    show_sample_name,
+                    show_text,
+                    lang["gallery_text_label"],
+                    image_format,
+                )
+
+        num_images = -(-total // per_image)
+        executor = None
+        if max_workers > 1 and num_images > 1:
+            # spawn 避免在多线程的服务进程中 fork
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+        try:
+            for image_idx, _ in enumerate(
+                ordered_map(
+                    executor,
+                    render_mosaic,
+                    render_jobs(),
+                    prefetch=max_workers * PREFETCH_PER_WORKER,
+                )
+            ):
+                if progress_callback is not None:
+                    progress_callback(min((image_idx + 1) * per_image, total), total)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        if not archive:
+            return out_dir
+
+        # 图片已是压缩格式，zip 只存储不压缩
+        with zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_STORED) as zf:
+            for path in sorted(out_dir.iterdir()):
+                zf.write(path, f"{out_dir.name}/{path.name}")
+        return output_path
+    finally:
+        if staging_dir is not None:
+            shutil.rmtree(staging_dir, ignore_errors=True)
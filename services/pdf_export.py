@@ -1,8 +1,10 @@
 import io
+import math
 from pathlib import Path
 from PIL import Image
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.units import mm
 from reportlab.platypus import (
@@ -17,48 +19,218 @@ from reportlab.platypus import (
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 
-from utils.image_processing import (
-    load_and_process_image,
-    check_image_exists,
-    get_aspect_ratio,
-    draw_all_crop_boxes_on_image,
-    filter_visible_methods,
-)
-from utils.mask import load_mask, apply_mask_to_image
+from utils.image_processing import filter_visible_methods
+from utils.sample_filter import get_source_index
+from utils.timing import timed_stage
+from config.constants import PDF_DEFAULT_DPI, PDF_JPEG_QUALITY
+from services.image_prep import prepare_image
+from services.crop_manager import with_cropped_images
 
+# 图片数据以二进制流写入 PDF；默认的 ASCII85 编码在纯 Python 中很慢且使文件增大 25%
+rl_config.useA85 = 0
 
-def pil_image_to_rl_image(
-    pil_img: Image.Image, max_width: float, max_height: float
-) -> RLImage:
+# 编码后的单元格：("image", 图片字节或可直接嵌入的 JPEG 路径, (宽, 高)) 或 ("text", 文本)
+EncodedCell = Tuple
+
+
+def get_target_pixel_width(draw_width: float, dpi: Optional[int]) -> Optional[int]:
+    """按绘制宽度（点）和目标 DPI 计算需要的像素宽度，dpi 为 None 时不限制"""
+    if not dpi:
+        return None
+    return max(1, math.ceil(draw_width / 72 * dpi))
+
+
+def get_draw_size(
+    img_size: Tuple[int, int], max_width: float, max_height: float
+) -> Tuple[float, float]:
+    """计算图片在 PDF 中的绘制尺寸（点），保持宽高比"""
+    img_width, img_height = img_size
+    aspect_ratio = img_width / img_height
+
+    # 按宽度或高度限制缩放
+    if img_width / max_width > img_height / max_height:
+        # 宽度限制
+        return max_width, max_width / aspect_ratio
+    # 高度限制
+    return max_height * aspect_ratio, max_height
+
+
+def encode_pdf_image(
+    pil_img: Image.Image,
+    max_width: float,
+    max_height: float,
+    image_format: str = "lossless",
+    dpi: Optional[int] = None,
+    source_path: Optional[Path] = None,
+    source_size: Optional[Tuple[int, int]] = None,
+) -> Tuple[Union[bytes, str], float, float]:
     """
-    将PIL Image转换为reportlab Image对象
+    将图片编码为嵌入 PDF 的数据
     参数:
         pil_img: PIL Image对象
         max_width: 最大宽度（点）
         max_height: 最大高度（点）
+        image_format: 嵌入方式，"jpeg"（有损压缩）或 "lossless"（无损）
+        dpi: 按实际绘制尺寸降采样的目标分辨率，None 表示保持原始像素
+        source_path: 与 pil_img 内容一致的 JPEG 原图，分辨率不超过需要时直接嵌入（不重新编码）
+        source_size: 原图尺寸
     返回:
-        reportlab Image对象
+        (图片字节或 JPEG 原图路径, 绘制宽度, 绘制高度)
     """
-    # 保存到BytesIO
-    img_buffer = io.BytesIO()
-    pil_img.save(img_buffer, format="PNG")
-    img_buffer.seek(0)
-
-    # 计算合适的尺寸，保持宽高比
     img_width, img_height = pil_img.size
-    aspect_ratio = img_width / img_height
+    width, height = get_draw_size(pil_img.size, max_width, max_height)
+    target_width = get_target_pixel_width(width, dpi)
+
+    # JPEG 原图直接作为 DCT 数据嵌入
+    if image_format == "jpeg" and source_path is not None and source_size:
+        if source_size[0] <= (target_width or img_width):
+            return str(source_path), width, height
+
+    # 降采样到目标分辨率
+    if target_width is not None and img_width > target_width:
+        pil_img = pil_img.resize(
+            (target_width, max(1, round(img_height * target_width / img_width))),
+            Image.Resampling.LANCZOS,
+        )
 
-    # 按宽度或高度限制缩放
-    if img_width / max_width > img_height / max_height:
-        # 宽度限制
-        width = max_width
-        height = max_width / aspect_ratio
+    img_buffer = io.BytesIO()
+    if image_format == "jpeg":
+        if pil_img.mode not in ("RGB", "L"):
+            pil_img = pil_img.convert("RGB")
+        pil_img.save(img_buffer, format="JPEG", quality=PDF_JPEG_QUALITY)
     else:
-        # 高度限制
-        height = max_height
-        width = max_height * aspect_ratio
+        # reportlab 会解码后重新压缩像素，这里使用最快的 PNG 压缩级别
+        pil_img.save(img_buffer, format="PNG", compress_level=1)
 
-    return RLImage(img_buffer, width=width, height=height)
+    return img_buffer.getvalue(), width, height
+
+
+def encoded_to_rl_image(
+    data: Union[bytes, str], width: float, height: float
+) -> RLImage:
+    """由编码后的图片数据创建 reportlab Image对象"""
+    source = io.BytesIO(data) if isinstance(data, bytes) else data
+    return RLImage(source, width=width, height=height)
+
+
+def pil_image_to_rl_image(
+    pil_img: Image.Image,
+    max_width: float,
+    max_height: float,
+    image_format: str = "lossless",
+    dpi: Optional[int] = None,
+    source_path: Optional[Path] = None,
+    source_size: Optional[Tuple[int, int]] = None,
+) -> RLImage:
+    """
+    将PIL Image转换为reportlab Image对象（参数见 encode_pdf_image）
+    返回:
+        reportlab Image对象
+    """
+    return encoded_to_rl_image(
+        *encode_pdf_image(
+            pil_img,
+            max_width,
+            max_height,
+            image_format=image_format,
+            dpi=dpi,
+            source_path=source_path,
+            source_size=source_size,
+        )
+    )
+
+
+def encode_sample_images(
+    sample: Dict,
+    method_names: List[str],
+    base_dir: Path,
+    image_width: int,
+    preserve_aspect_ratio: bool,
+    use_mask: bool,
+    darken_factor: float,
+    crops: Optional[List[Dict]],
+    max_width: float,
+    max_height: float,
+    image_format: str,
+    image_dpi: Optional[int],
+    use_cache: bool = True,
+) -> List[EncodedCell]:
+    """
+    准备并编码一个样本各方法的主图片（可在子进程中运行，参数和返回值均可 pickle）
+    参数:
+        sample: 样本字典
+        method_names: 要导出的方法名列表
+        crops: 需要在主图片上绘制的 crop 框（只需 'box' 和 'color'），None 表示不绘制
+        max_width / max_height: 单元格的最大绘制尺寸（点）
+        use_cache: 是否使用进程内共享的图片缓存（导出当前视图时可复用网页已准备好的图片）
+    返回:
+        每个方法一个编码后的单元格
+    """
+    mask_path = base_dir / sample["mask"] if use_mask and sample.get("mask") else None
+
+    cells = []
+    for method_name in method_names:
+        if method_name not in sample["images"]:
+            cells.append(("text", "N/A"))
+            continue
+
+        image_rel_path = sample["images"][method_name]
+
+        # 处理图片路径为None的情况（缺失的图片）
+        if image_rel_path is None:
+            cells.append(("text", "Missing"))
+            continue
+
+        image_path = base_dir / image_rel_path
+        if not image_path.is_file():
+            cells.append(("text", "Missing"))
+            continue
+
+        try:
+            prepared = prepare_image(
+                image_path,
+                image_width,
+                preserve_aspect_ratio,
+                mask_path=mask_path,
+                darken_factor=darken_factor,
+                crops=crops,
+                use_cache=use_cache,
+            )
+            if prepared["error"] is not None:
+                cells.append(("text", "Error"))
+                continue
+
+            # 未经裁剪、mask、画框的 JPEG 原图可直接嵌入
+            passthrough = (
+                mask_path is None
+                and not crops
+                and prepared["format"] == "JPEG"
+                and (preserve_aspect_ratio or not prepared["was_cropped"])
+            )
+            data, width, height = encode_pdf_image(
+                prepared["image"],
+                max_width,
+                max_height,
+                image_format=image_format,
+                dpi=image_dpi,
+                source_path=image_path if passthrough else None,
+                source_size=prepared["original_size"],
+            )
+            cells.append(("image", data, (width, height)))
+        except Exception:
+            cells.append(("text", "Error"))
+
+    return cells
+
+
+def get_crop_boxes(
+    sample_crop_data: Optional[Dict], close_view_enabled: bool
+) -> Optional[List[Dict]]:
+    """主图片上需要绘制的 crop 框（只保留框和颜色，便于传给子进程）"""
+    if not (close_view_enabled and sample_crop_data):
+        return None
+    crops = sample_crop_data.get("crops", [])
+    return [{"box": crop["box"], "color": crop["color"]} for crop in crops] or None
 
 
 class ColoredSquare(Flowable):
@@ -79,6 +251,267 @@ class ColoredSquare(Flowable):
         self.canv.rect(0, 0, self.size, self.size, fill=1, stroke=1)
 
 
+def create_pdf_document(target) -> SimpleDocTemplate:
+    """创建横向 A4 的 PDF 文档，target 为文件路径或缓冲区"""
+    return SimpleDocTemplate(
+        target,
+        pagesize=landscape(A4),
+        leftMargin=1 * mm,
+        rightMargin=1 * mm,
+        topMargin=1 * mm,
+        bottomMargin=1 * mm,
+    )
+
+
+def create_pdf_styles() -> Dict[str, ParagraphStyle]:
+    """创建 PDF 中使用的段落样式"""
+    styles = getSampleStyleSheet()
+
+    return {
+        "title": ParagraphStyle(
+            "CustomTitle",
+            parent=styles["Heading2"],
+            fontSize=12,
+            spaceAfter=3 * mm,
+            alignment=1,  # 居中
+        ),
+        "text": ParagraphStyle(
+            "CustomText",
+            parent=styles["Normal"],
+            fontSize=9,
+            spaceAfter=1 * mm,
+            spaceBefore=1 * mm,
+        ),
+        "method_name": ParagraphStyle(
+            "MethodName",
+            parent=styles["Normal"],
+            fontSize=8,
+            alignment=1,  # 居中
+            spaceAfter=0.5 * mm,
+        ),
+        # Sample名称标题（左对齐），文档中第一个样本前不留空
+        "sample_title_first": ParagraphStyle(
+            "SampleTitle",
+            parent=styles["Normal"],
+            fontSize=10,
+            alignment=0,  # 左对齐
+            leftIndent=0,
+            spaceBefore=0,
+            spaceAfter=2 * mm,
+        ),
+        "sample_title": ParagraphStyle(
+            "SampleTitle",
+            parent=styles["Normal"],
+            fontSize=10,
+            alignment=0,  # 左对齐
+            leftIndent=0,
+            spaceBefore=2 * mm,
+            spaceAfter=2 * mm,
+        ),
+        # Close View标题样式（左对齐，不加粗）
+        "close_view": ParagraphStyle(
+            "CloseViewTitle",
+            parent=styles["Normal"],
+            fontSize=8,
+            alignment=0,  # 左对齐
+            leftIndent=0,
+            spaceAfter=2 * mm,
+        ),
+    }
+
+
+def get_pdf_layout(num_cols: int) -> Dict[str, float]:
+    """计算页面布局（单位：点）"""
+    # 使用横向A4页面
+    page_width, _ = landscape(A4)
+
+    # 计算可用宽度
+    available_width = page_width - 2 * mm  # 减去左右边距（1mm×2）
+
+    # 列间距（约10px = 3.5mm）
+    col_spacing = 3.5 * mm
+
+    # 每列图片的最大宽度和高度
+    # 总间距 = (列数-1) × 列间距
+    num_cols = max(1, num_cols)
+    total_spacing = (num_cols - 1) * col_spacing if num_cols > 1 else 0
+
+    return {
+        "num_cols": num_cols,
+        "available_width": available_width,
+        "col_spacing": col_spacing,
+        "col_width": (available_width - total_spacing) / num_cols,
+        "max_img_height": 60 * mm,  # 主图片的最大高度
+    }
+
+
+def _row_table(row: List, layout: Dict, vertical_padding: bool = True) -> Table:
+    """创建一行等宽单元格的表格（方法名称、主图片、Close View 共用）"""
+    col_spacing = layout["col_spacing"]
+    table = Table([row], colWidths=[layout["col_width"]] * layout["num_cols"])
+    commands = [
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("LEFTPADDING", (0, 0), (0, -1), 0),  # 第一列左边无padding
+        ("RIGHTPADDING", (-1, 0), (-1, -1), 0),  # 最后一列右边无padding
+        ("LEFTPADDING", (1, 0), (-1, -1), col_spacing / 2),  # 其他列左边padding
+        ("RIGHTPADDING", (0, 0), (-2, -1), col_spacing / 2),  # 其他列右边padding
+    ]
+    if vertical_padding:
+        commands += [
+            ("TOPPADDING", (0, 0), (-1, -1), 1 * mm),  # 上方padding
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 1 * mm),  # 下方padding
+        ]
+    table.setStyle(TableStyle(commands))
+    return table
+
+
+def _cell_to_flowable(cell: EncodedCell, styles: Dict) -> Flowable:
+    if cell[0] == "image":
+        return encoded_to_rl_image(cell[1], *cell[2])
+    return Paragraph(cell[1], styles["text"])
+
+
+def build_sample_flowables(
+    sample: Dict,
+    cells: List[EncodedCell],
+    visible_methods_list: List[Dict],
+    sample_crop_data: Optional[Dict],
+    styles: Dict,
+    layout: Dict,
+    is_first: bool,
+    show_method_name: bool,
+    show_sample_name: bool,
+    show_text: bool,
+    close_view_enabled: bool,
+    image_format: str,
+    image_dpi: Optional[int],
+) -> List[Flowable]:
+    """
+    构建一个样本的所有 flowable：名称、方法名称行、主图片行、Close View、文本
+    参数:
+        cells: encode_sample_images 的结果
+        is_first: 是否为文档中的第一个样本（方法名称行只在第一个样本显示）
+    """
+    elements = []
+
+    # Sample名称标题（左对齐）
+    if show_sample_name:
+        style = styles["sample_title_first"] if is_first else styles["sample_title"]
+        elements.append(Paragraph(f"<b>Sample: {sample['name']}</b>", style))
+
+    # 方法名称行（只在第一个样本时显示）
+    if show_method_name and is_first:
+        names_row = [
+            Paragraph(m["name"], styles["method_name"]) for m in visible_methods_list
+        ]
+        elements.append(_row_table(names_row, layout, vertical_padding=False))
+        elements.append(Spacer(1, 2 * mm))
+
+    # 主图片行
+    elements.append(_row_table([_cell_to_flowable(c, styles) for c in cells], layout))
+
+    # 显示Close Views（如果启用）
+    if close_view_enabled and sample_crop_data:
+        crops = sample_crop_data.get("crops", [])
+        available_width = layout["available_width"]
+
+        for crop_idx, crop in enumerate(crops):
+            elements.append(Spacer(1, 1 * mm))
+
+            # 彩色方块 + 标题文字，使用Table组合并与第一列图片对齐
+            color_square = ColoredSquare(size=2 * mm, color=crop["color"])
+            title_text = Paragraph(f"Close View #{crop_idx + 1}", styles["close_view"])
+            title_table = Table(
+                [[color_square, title_text]],
+                colWidths=[4 * mm, available_width - 4 * mm],
+                rowHeights=[4 * mm],
+            )
+            title_table.setStyle(
+                TableStyle(
+                    [
+                        ("ALIGN", (0, 0), (0, 0), "LEFT"),
+                        ("ALIGN", (1, 0), (1, 0), "LEFT"),
+                        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                        ("LEFTPADDING", (0, 0), (-1, -1), 0),
+                        ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+                        ("TOPPADDING", (0, 0), (-1, -1), 0),
+                        ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+                    ]
+                )
+            )
+            elements.append(title_table)
+
+            # 收集裁剪后的图片（Close View不应用mask）
+            cropped_row = []
+            for method in visible_methods_list:
+                cropped_img = crop.get("cropped_images", {}).get(method["name"])
+                if cropped_img is not None:
+                    cropped_row.append(
+                        pil_image_to_rl_image(
+                            cropped_img,
+                            layout["col_width"],
+                            layout["max_img_height"],
+                            image_format=image_format,
+                            dpi=image_dpi,
+                        )
+                    )
+                else:
+                    cropped_row.append(Paragraph("N/A", styles["text"]))
+            elements.append(_row_table(cropped_row, layout))
+
+            # 添加Close View之间的行间距
+            if crop_idx < len(crops) - 1:
+                elements.append(Spacer(1, 2 * mm))
+
+    # 显示样本文本
+    if show_text and sample.get("text"):
+        elements.append(Spacer(1, 1 * mm))
+        if show_sample_name:
+            text_content = f"<b>{sample['name']}</b> | Text: {sample['text']}"
+        else:
+            text_content = f"Text: {sample['text']}"
+        elements.append(Paragraph(text_content, styles["text"]))
+
+    return elements
+
+
+def build_descriptions_flowables(
+    methods: List[Dict], lang: Dict, styles: Dict, layout: Dict
+) -> List[Flowable]:
+    """方法描述表（在文档最后显示）"""
+    desc_data = []
+    for method in methods:
+        desc = method.get("description", "")
+        desc_data.append(
+            [
+                Paragraph(f"<b>{method['name']}</b>", styles["text"]),
+                Paragraph(desc if desc else "-", styles["text"]),
+            ]
+        )
+
+    desc_table = Table(
+        desc_data, colWidths=[50 * mm, layout["available_width"] - 55 * mm]
+    )
+    desc_table.setStyle(
+        TableStyle(
+            [
+                ("ALIGN", (0, 0), (0, -1), "LEFT"),
+                ("ALIGN", (1, 0), (1, -1), "LEFT"),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("TOPPADDING", (0, 0), (-1, -1), 1 * mm),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 1 * mm),
+            ]
+        )
+    )
+    return [
+        Spacer(1, 5 * mm),
+        Paragraph(lang["method_desc_title"], styles["title"]),
+        desc_table,
+    ]
+
+
+@timed_stage("generate_pdf")
 def generate_pdf_from_current_view(
     samples: List[Dict],
     methods: List[Dict],
@@ -97,61 +530,29 @@ def generate_pdf_from_current_view(
     darken_factor: float = 0.5,
     image_width: int = 800,
     visible_methods: Optional[List[str]] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    image_format: str = "jpeg",
+    image_dpi: Optional[int] = PDF_DEFAULT_DPI,
 ) -> bytes:
     """
     生成当前视图的PDF
+    参数:
+        image_format: 图片嵌入方式，"jpeg" 或 "lossless"
+        image_dpi: 按绘制尺寸降采样的目标分辨率，None 表示保持处理后的像素
+        progress_callback: 可选的进度回调 (已完成步数, 总步数)，每处理完一个样本调用一次
     返回: PDF二进制数据
     """
-    overlay_opacity = darken_factor  # Rename for clarity in function
-
     # 使用过滤后的方法列表
     visible_methods_list = (
         filter_visible_methods(methods, visible_methods) if visible_methods else methods
     )
+    method_names = [m["name"] for m in visible_methods_list]
 
-    # 创建PDF缓冲区
+    # 创建PDF缓冲区和文档
     buffer = io.BytesIO()
-
-    # 使用横向A4页面
-    page_width, page_height = landscape(A4)
-
-    # 创建PDF文档
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=landscape(A4),
-        leftMargin=1 * mm,
-        rightMargin=1 * mm,
-        topMargin=1 * mm,
-        bottomMargin=1 * mm,
-    )
-
-    # 获取样式
-    styles = getSampleStyleSheet()
-
-    # 创建自定义样式
-    title_style = ParagraphStyle(
-        "CustomTitle",
-        parent=styles["Heading2"],
-        fontSize=12,
-        spaceAfter=3 * mm,
-        alignment=1,  # 居中
-    )
-
-    text_style = ParagraphStyle(
-        "CustomText",
-        parent=styles["Normal"],
-        fontSize=9,
-        spaceAfter=1 * mm,
-        spaceBefore=1 * mm,
-    )
-
-    method_name_style = ParagraphStyle(
-        "MethodName",
-        parent=styles["Normal"],
-        fontSize=8,
-        alignment=1,  # 居中
-        spaceAfter=0.5 * mm,
-    )
+    doc = create_pdf_document(buffer)
+    styles = create_pdf_styles()
+    layout = get_pdf_layout(len(visible_methods_list))
 
     # 构建内容
     elements = []
@@ -160,279 +561,52 @@ def generate_pdf_from_current_view(
     end_idx = min(start_idx + num_rows, len(samples))
     selected_samples = samples[start_idx:end_idx]
 
-    # 计算可用宽度
-    available_width = page_width - 2 * mm  # 减去左右边距（1mm×2）
-
-    # 计算列数
-    num_methods = len(visible_methods_list)
-    num_cols = num_methods
-
-    # 列间距（约10px = 3.5mm）
-    col_spacing = 3.5 * mm
-
-    # 每列图片的最大宽度和高度
-    # 总间距 = (列数-1) × 列间距
-    total_spacing = (num_cols - 1) * col_spacing if num_cols > 1 else 0
-    col_width = (available_width - total_spacing) / num_cols
-    max_img_height = 60 * mm  # 主图片的最大高度
+    # 总步数：每个样本一步，最后排版一步
+    total_steps = len(selected_samples) + 1
 
     for row_idx, sample in enumerate(selected_samples):
-        actual_sample_idx = start_idx + row_idx
-        sample_crop_data = crop_data.get(actual_sample_idx, None)
+        if progress_callback is not None:
+            progress_callback(row_idx, total_steps)
 
-        # Sample名称标题（左对齐）
-        if show_sample_name:
-            sample_title_style = ParagraphStyle(
-                "SampleTitle",
-                parent=styles["Normal"],
-                fontSize=10,
-                alignment=0,  # 左对齐
-                leftIndent=0,
-                spaceBefore=2 * mm if row_idx > 0 else 0,
-                spaceAfter=2 * mm,
-            )
-            sample_name_para = Paragraph(
-                f"<b>Sample: {sample['name']}</b>", sample_title_style
-            )
-            elements.append(sample_name_para)
-
-        # 方法名称行（只在第一个样本时显示）
-        if show_method_name and row_idx == 0:
-            method_names_row = []
-            for method in visible_methods_list:
-                method_names_row.append(Paragraph(method["name"], method_name_style))
-
-            # 创建方法名称表格
-            name_table = Table([method_names_row], colWidths=[col_width] * num_cols)
-            name_table.setStyle(
-                TableStyle(
-                    [
-                        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                        ("LEFTPADDING", (0, 0), (0, -1), 0),  # 第一列左边无padding
-                        ("RIGHTPADDING", (-1, 0), (-1, -1), 0),  # 最后一列右边无padding
-                        (
-                            "LEFTPADDING",
-                            (1, 0),
-                            (-1, -1),
-                            col_spacing / 2,
-                        ),  # 其他列左边padding
-                        (
-                            "RIGHTPADDING",
-                            (0, 0),
-                            (-2, -1),
-                            col_spacing / 2,
-                        ),  # 其他列右边padding
-                    ]
-                )
+        actual_sample_idx = get_source_index(samples, start_idx + row_idx)
+        sample_crop_data = crop_data.get(actual_sample_idx, None)
+        if close_view_enabled:
+            sample_crop_data = with_cropped_images(
+                sample, sample_crop_data, method_names, Path(base_dir), image_width
             )
-            elements.append(name_table)
-            elements.append(Spacer(1, 2 * mm))
-
-        # 收集主图片
-        images_row = []
-        for method in methods:
-            method_name = method["name"]
-
-            if method_name not in sample["images"]:
-                images_row.append(Paragraph("N/A", text_style))
-                continue
-
-            image_rel_path = sample["images"][method_name]
-
-            # 处理图片路径为None的情况（缺失的图片）
-            if image_rel_path is None:
-                images_row.append(Paragraph("Missing", text_style))
-                continue
-
-            image_path = base_dir / image_rel_path
-
-            if not check_image_exists(base_dir, image_rel_path):
-                images_row.append(Paragraph("Missing", text_style))
-                continue
-
-            try:
-                # 加载并处理图片
-                processed_img, _, _ = load_and_process_image(
-                    image_path, image_width, preserve_aspect_ratio
-                )
-
-                if processed_img is not None:
-                    # 应用 mask（如果启用且存在）
-                    if use_mask and "mask" in sample and sample["mask"]:
-                        mask_path = base_dir / sample["mask"]
-                        if check_image_exists(base_dir, sample["mask"]):
-                            mask_img = load_mask(mask_path, processed_img.size)
-                            if mask_img is not None:
-                                processed_img = apply_mask_to_image(
-                                    processed_img, mask_img, overlay_opacity
-                                )
-
-                    # 如果有crop data且close view启用，绘制裁剪框
-                    if close_view_enabled and sample_crop_data:
-                        try:
-                            original_img = Image.open(image_path)
-                            original_size = original_img.size
-                            display_size = processed_img.size
-                            crops = sample_crop_data.get("crops", [])
-                            if crops:
-                                processed_img = draw_all_crop_boxes_on_image(
-                                    processed_img, crops, original_size, display_size
-                                )
-                        except Exception:
-                            pass
-
-                    rl_img = pil_image_to_rl_image(
-                        processed_img, col_width, max_img_height
-                    )
-                    images_row.append(rl_img)
-                else:
-                    images_row.append(Paragraph("Error", text_style))
-            except Exception as e:
-                images_row.append(Paragraph("Error", text_style))
 
-        # 创建图片表格，添加行间距
-        img_table = Table(
-            [images_row], colWidths=[col_width] * num_cols, rowHeights=None
+        # 准备图片（与网页主视图共享缓存，当前视图的图片通常已处理好）
+        cells = encode_sample_images(
+            sample,
+            method_names,
+            base_dir,
+            image_width,
+            preserve_aspect_ratio,
+            use_mask,
+            darken_factor,
+            get_crop_boxes(sample_crop_data, close_view_enabled),
+            layout["col_width"],
+            layout["max_img_height"],
+            image_format,
+            image_dpi,
         )
-        img_table.setStyle(
-            TableStyle(
-                [
-                    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                    ("LEFTPADDING", (0, 0), (0, -1), 0),  # 第一列左边无padding
-                    ("RIGHTPADDING", (-1, 0), (-1, -1), 0),  # 最后一列右边无padding
-                    (
-                        "LEFTPADDING",
-                        (1, 0),
-                        (-1, -1),
-                        col_spacing / 2,
-                    ),  # 其他列左边padding
-                    (
-                        "RIGHTPADDING",
-                        (0, 0),
-                        (-2, -1),
-                        col_spacing / 2,
-                    ),  # 其他列右边padding
-                    ("TOPPADDING", (0, 0), (-1, -1), 1 * mm),  # 上方padding
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 1 * mm),  # 下方padding
-                ]
+        elements.extend(
+            build_sample_flowables(
+                sample,
+                cells,
+                visible_methods_list,
+                sample_crop_data,
+                styles,
+                layout,
+                is_first=row_idx == 0,
+                show_method_name=show_method_name,
+                show_sample_name=show_sample_name,
+                show_text=show_text,
+                close_view_enabled=close_view_enabled,
+                image_format=image_format,
+                image_dpi=image_dpi,
             )
         )
-        elements.append(img_table)
-
-        # 显示Close Views（如果启用）
-        if close_view_enabled and sample_crop_data:
-            crops = sample_crop_data.get("crops", [])
-
-            for crop_idx, crop in enumerate(crops):
-                elements.append(Spacer(1, 1 * mm))
-
-                # 获取crop颜色和ID
-                color = crop["color"]
-                crop_id = crop.get("id", f"crop_{crop_idx}")
-
-                # 创建Close View标题样式（左对齐，不加粗）
-                close_view_style = ParagraphStyle(
-                    "CloseViewTitle",
-                    parent=styles["Normal"],
-                    fontSize=8,
-                    alignment=0,  # 左对齐
-                    leftIndent=0,
-                    spaceAfter=2 * mm,
-                )
-
-                # 创建彩色方块
-                color_square = ColoredSquare(size=2 * mm, color=color)
-
-                # 创建标题文字（不加粗）
-                title_text = Paragraph(f"Close View #{crop_idx + 1}", close_view_style)
-
-                # 使用Table组合方块和文字，左侧padding与第一列图片对齐
-                first_col_left_padding = (available_width - total_spacing) / num_cols
-                # 计算标题表格的宽度和位置，使其与图片表格第一列对齐
-                title_row = [[color_square, title_text]]
-                title_table = Table(
-                    title_row,
-                    colWidths=[4 * mm, available_width - 4 * mm],
-                    rowHeights=[4 * mm],
-                )
-                title_table.setStyle(
-                    TableStyle(
-                        [
-                            ("ALIGN", (0, 0), (0, 0), "LEFT"),
-                            ("ALIGN", (1, 0), (1, 0), "LEFT"),
-                            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                            ("LEFTPADDING", (0, 0), (-1, -1), 0),
-                            ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-                            ("TOPPADDING", (0, 0), (-1, -1), 0),
-                            ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
-                        ]
-                    )
-                )
-
-                elements.append(title_table)
-
-                # 收集裁剪后的图片（Close View不应用mask）
-                cropped_row = []
-                for method in visible_methods_list:
-                    method_name = method["name"]
-                    if method_name in crop.get("cropped_images", {}):
-                        cropped_img = crop["cropped_images"][method_name]
-                        rl_img = pil_image_to_rl_image(
-                            cropped_img, col_width, max_img_height
-                        )
-                        cropped_row.append(rl_img)
-                    else:
-                        cropped_row.append(Paragraph("N/A", text_style))
-
-                # 创建裁剪图片表格，添加行间距
-                crop_table = Table(
-                    [cropped_row], colWidths=[col_width] * num_cols, rowHeights=None
-                )
-                crop_table.setStyle(
-                    TableStyle(
-                        [
-                            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                            ("LEFTPADDING", (0, 0), (0, -1), 0),  # 第一列左边无padding
-                            (
-                                "RIGHTPADDING",
-                                (-1, 0),
-                                (-1, -1),
-                                0,
-                            ),  # 最后一列右边无padding
-                            (
-                                "LEFTPADDING",
-                                (1, 0),
-                                (-1, -1),
-                                col_spacing / 2,
-                            ),  # 其他列左边padding
-                            (
-                                "RIGHTPADDING",
-                                (0, 0),
-                                (-2, -1),
-                                col_spacing / 2,
-                            ),  # 其他列右边padding
-                            ("TOPPADDING", (0, 0), (-1, -1), 1 * mm),  # 上方padding
-                            ("BOTTOMPADDING", (0, 0), (-1, -1), 1 * mm),  # 下方padding
-                        ]
-                    )
-                )
-                elements.append(crop_table)
-
-                # 添加Close View之间的行间距
-                if crop_idx < len(crops) - 1:
-                    elements.append(Spacer(1, 2 * mm))
-
-        # 显示样本文本
-        if show_text and "text" in sample and sample["text"]:
-            elements.append(Spacer(1, 1 * mm))
-            if show_sample_name:
-                text_content = f"<b>{sample['name']}</b> | Text: {sample['text']}"
-            else:
-                text_content = f"Text: {sample['text']}"
-            elements.append(Paragraph(text_content, text_style))
 
         # 样本之间添加分隔
         if row_idx < len(selected_samples) - 1:
@@ -440,34 +614,11 @@ def generate_pdf_from_current_view(
 
     # 方法描述（在最后显示）
     if show_descriptions:
-        elements.append(Spacer(1, 5 * mm))
-        elements.append(Paragraph(lang["method_desc_title"], title_style))
-
-        desc_data = []
-        for method in methods:
-            desc = method.get("description", "")
-            desc_data.append(
-                [
-                    Paragraph(f"<b>{method['name']}</b>", text_style),
-                    Paragraph(desc if desc else "-", text_style),
-                ]
-            )
-
-        desc_table = Table(desc_data, colWidths=[50 * mm, available_width - 55 * mm])
-        desc_table.setStyle(
-            TableStyle(
-                [
-                    ("ALIGN", (0, 0), (0, -1), "LEFT"),
-                    ("ALIGN", (1, 0), (1, -1), "LEFT"),
-                    ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                    ("TOPPADDING", (0, 0), (-1, -1), 1 * mm),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 1 * mm),
-                ]
-            )
-        )
-        elements.append(desc_table)
+        elements.extend(build_descriptions_flowables(methods, lang, styles, layout))
 
     # 构建PDF
+    if progress_callback is not None:
+        progress_callback(total_steps - 1, total_steps)
     doc.build(elements)
 
     # 获取PDF数据
@@ -0,0 +1,274 @@
+"""
+Session 内存统计与预算（不依赖界面）
+
+每次运行结束时统计 session 保留的对象占用的字节数（PIL 图片、数组、配置等），
+超出单个 session 或全部 session 的预算时，先释放可重新计算的数据：
+主视图的行缓存、Close View 的裁剪图片（只保留裁剪框，显示或导出时按需重新裁剪）。
+用户设置和裁剪框本身不会被释放。
+
+注册表持有各 session 的 crop_data / row_images 字典的引用，释放时直接修改这两个
+字典。修改其他 session 的数据只在该 session 没有运行时进行（与 begin() 使用同一把锁）；
+整页运行和只重新运行 fragment（crop 编辑器、缩放查看器、进度轮询）都标记为运行中。
+crop 字典可能被导出任务的快照共享，因此释放时替换容器，不原地修改 crop。
+"""
+
+import sys
+import threading
+import time
+from typing import Callable, Collection, Dict, List, Mapping, Optional
+
+from PIL import Image
+
+from config.constants import (
+    GLOBAL_MEMORY_BUDGET,
+    SESSION_IDLE_TIMEOUT,
+    SESSION_MEMORY_BUDGET,
+)
+from utils.metrics import inc
+
+
+def estimate_size(obj, _seen: Optional[set] = None) -> int:
+    """
+    估算对象保留的内存（字节）
+    PIL 图片按像素数据计算，数组按 nbytes 计算，容器递归统计；同一对象只计算一次
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, Image.Image):
+        width, height = obj.size
+        return sys.getsizeof(obj) + width * height * len(obj.getbands())
+    # 未加载 NumPy 时不可能有数组，不为统计内存而导入
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+        return sys.getsizeof(obj)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, Mapping):
+        for key, value in obj.items():
+            size += estimate_size(key, _seen) + estimate_size(value, _seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += estimate_size(item, _seen)
+    elif hasattr(obj, "__dict__"):
+        size += estimate_size(vars(obj), _seen)
+    return size
+
+
+def _evict_row_images(row_images: Dict) -> bool:
+    """释放主视图行缓存，返回是否释放了数据"""
+    if not row_images:
+        return False
+    row_images.clear()
+    return True
+
+
+def _evict_cropped_images(crop_data: Dict, keep: Collection[int] = ()) -> bool:
+    """
+    释放 Close View 裁剪图片（保留裁剪框和原图尺寸）
+    keep: 不释放的样本索引（当前页）
+    返回是否释放了数据
+    """
+    evicted = False
+    for idx, data in list(crop_data.items()):
+        if idx in keep or not data:
+            continue
+        crops = data.get("crops", [])
+        if not any("cropped_images" in crop for crop in crops):
+            continue
+        crop_data[idx] = {
+            **data,
+            "crops": [
+                {k: v for k, v in crop.items() if k != "cropped_images"} for crop in crops
+            ],
+        }
+        evicted = True
+    return evicted
+
+
+class SessionMemoryRegistry:
+    """
+    各 session 的内存统计和预算（线程安全）
+    记录: {session_id: {'crop_data', 'row_images', 'page', 'bytes', 'breakdown',
+                        'last_seen', 'running', 'evictions'}}
+    """
+
+    def __init__(
+        self,
+        session_budget: int = SESSION_MEMORY_BUDGET,
+        global_budget: int = GLOBAL_MEMORY_BUDGET,
+        idle_timeout: float = SESSION_IDLE_TIMEOUT,
+    ):
+        self._sessions: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.session_budget = session_budget
+        self.global_budget = global_budget
+        self.idle_timeout = idle_timeout
+
+    def begin(self, session_id: str):
+        """标记 session 开始运行（运行期间不会被其他 session 释放数据）"""
+        with self._lock:
+            record = self._sessions.get(session_id)
+            if record is not None:
+                record["running"] = True
+                record["last_seen"] = time.time()
+
+    def end(self, session_id: str):
+        """标记只重新运行 fragment 的运行结束（不重新统计内存，整页运行结束时由 update 统计）"""
+        with self._lock:
+            record = self._sessions.get(session_id)
+            if record is not None:
+                record["running"] = False
+                record["last_seen"] = time.time()
+
+    def update(
+        self, session_id: str, state: Mapping, page: Collection[int] = ()
+    ) -> Dict:
+        """
+        运行结束时统计 session 内存，超出单个 session 预算时释放可重新计算的数据
+        参数:
+            state: session 的全部数据（键 -> 值）
+            page: 当前页的原始样本索引（最后才释放这些样本的裁剪图片）
+        返回:
+            该 session 的记录
+        """
+        crop_data = state.get("crop_data")
+        row_images = state.get("row_images")
+        crop_data = crop_data if isinstance(crop_data, dict) else {}
+        row_images = row_images if isinstance(row_images, dict) else {}
+        page = set(page)
+
+        breakdown = self._measure(state)
+        evictions = 0
+        # 释放顺序：其他页的裁剪图片 -> 行缓存 -> 当前页的裁剪图片
+        steps = (
+            lambda: _evict_cropped_images(crop_data, keep=page),
+            lambda: _evict_row_images(row_images),
+            lambda: _evict_cropped_images(crop_data),
+        )
+        for step in steps:
+            if sum(breakdown.values()) <= self.session_budget:
+                break
+            if step():
+                evictions += 1
+                inc("image_viewer_cache_evictions_total", cache="session_memory")
+                breakdown = self._measure(state)
+
+        with self._lock:
+            record = self._sessions.setdefault(session_id, {"evictions": 0})
+            record.update(
+                crop_data=crop_data,
+                row_images=row_images,
+                page=page,
+                breakdown=breakdown,
+                bytes=sum(breakdown.values()),
+                last_seen=time.time(),
+                running=False,
+            )
+            record["evictions"] += evictions
+            return record
+
+    @staticmethod
+    def _measure(state: Mapping) -> Dict[str, int]:
+        """按键统计 session 数据的字节数（键之间共享的对象只计算一次）"""
+        seen = set()
+        return {str(key): estimate_size(value, seen) for key, value in state.items()}
+
+    def _evict_session(self, record: Dict) -> bool:
+        """释放一个空闲 session 的全部可重新计算数据（调用方持有锁）"""
+        evicted = _evict_row_images(record["row_images"])
+        evicted = _evict_cropped_images(record["crop_data"]) or evicted
+        if evicted:
+            record["evictions"] += 1
+            inc("image_viewer_cache_evictions_total", cache="session_memory")
+            freed = record["breakdown"].get("row_images", 0) + record["breakdown"].get(
+                "crop_data", 0
+            )
+            record["breakdown"] = {
+                key: value
+                for key, value in record["breakdown"].items()
+                if key not in ("row_images", "crop_data")
+            }
+            record["bytes"] = max(0, record["bytes"] - freed)
+        return evicted
+
+    def enforce_global_budget(self, current_session_id: Optional[str] = None) -> int:
+        """
+        全部 session 超出预算时，从占用最多的空闲 session 开始释放
+        返回释放数据的 session 数
+        """
+        with self._lock:
+            total = sum(record["bytes"] for record in self._sessions.values())
+            if total <= self.global_budget:
+                return 0
+            candidates = sorted(
+                (
+                    record
+                    for session_id, record in self._sessions.items()
+                    if session_id != current_session_id and not record["running"]
+                ),
+                key=lambda record: record["bytes"],
+                reverse=True,
+            )
+            count = 0
+            for record in candidates:
+                if total <= self.global_budget:
+                    break
+                before = record["bytes"]
+                if self._evict_session(record):
+                    total -= before - record["bytes"]
+                    count += 1
+            return count
+
+    def prune(self, is_alive: Callable[[str], bool]) -> int:
+        """
+        清理已断开的 session（释放可重新计算的数据并移除记录），
+        并释放空闲超过 idle_timeout 的 session 的可重新计算数据
+        返回移除的 session 数
+        """
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for session_id, record in list(self._sessions.items()):
+                if not is_alive(session_id):
+                    if not record["running"]:
+                        self._evict_session(record)
+                    del self._sessions[session_id]
+                    removed += 1
+                elif not record["running"] and now - record["last_seen"] > self.idle_timeout:
+                    self._evict_session(record)
+        return removed
+
+    def snapshot(self) -> List[Dict]:
+        """各 session 的统计（按占用从大到小），供管理视图显示"""
+        with self._lock:
+            rows = [
+                {
+                    "session_id": session_id,
+                    "bytes": record["bytes"],
+                    "breakdown": dict(record["breakdown"]),
+                    "last_seen": record["last_seen"],
+                    "running": record["running"],
+                    "evictions": record["evictions"],
+                }
+                for session_id, record in self._sessions.items()
+            ]
+        return sorted(rows, key=lambda row: row["bytes"], reverse=True)
+
+
+_registry: Optional[SessionMemoryRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_session_memory_registry() -> SessionMemoryRegistry:
+    """获取进程内共享的 session 内存注册表"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SessionMemoryRegistry()
+        return _registry
@@ -0,0 +1,295 @@
+"""
+深度缩放瓦片金字塔（不依赖界面）
+
+每张源图片对应磁盘上的一个瓦片金字塔：第 0 层为原始分辨率，每上一层长宽减半，
+直到整张图片放得进一个瓦片。某一层第一次被请求时才解码源图片生成该层
+（连同尚未生成的更粗的层，JPEG 只解码到所需的分辨率）；之后的平移和缩放只读取
+视口覆盖的瓦片，解码后的瓦片放入共享图片缓存。
+
+目录结构: <缓存目录>/<源文件摘要>/<层>/<列>_<行>.jpg
+每层先写入临时目录再整体改名，层目录存在即表示该层已完整生成。
+磁盘缓存超过上限时按最近使用时间删除整个金字塔。
+"""
+
+import hashlib
+import math
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Tuple
+
+from PIL import Image
+
+from config.constants import TILE_CACHE_DIR, TILE_CACHE_MAX_BYTES, TILE_JPEG_QUALITY, TILE_SIZE
+from services.image_prep import get_image_cache
+from utils.metrics import inc, record_file_read
+from utils.timing import timed_stage
+
+# 进程内保留的金字塔对象数（只含源图片尺寸等元数据）
+_PYRAMIDS_MAX_ENTRIES = 256
+
+# 归一化区域 (left, top, right, bottom)，取值 0~1
+Region = Tuple[float, float, float, float]
+
+
+def pyramid_key(path: Path, tile_size: int = TILE_SIZE) -> str:
+    """金字塔目录名：源文件路径、修改时间、大小和瓦片边长的摘要（源文件改变后重新生成）"""
+    stat = os.stat(path)
+    text = f"{Path(path).resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{tile_size}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def level_size(width: int, height: int, level: int) -> Tuple[int, int]:
+    """第 level 层的尺寸（每层长宽减半，向上取整）"""
+    scale = 1 << level
+    return max(1, -(-width // scale)), max(1, -(-height // scale))
+
+
+def count_levels(width: int, height: int, tile_size: int) -> int:
+    """层数：最粗的一层放得进一个瓦片"""
+    levels = 1
+    while max(level_size(width, height, levels - 1)) > tile_size:
+        levels += 1
+    return levels
+
+
+def level_for_scale(scale: float, levels: int) -> int:
+    """
+    显示比例对应的层：分辨率不低于显示所需的最粗一层
+    参数:
+        scale: 屏幕像素 / 原图像素
+    """
+    if scale >= 1:
+        return 0
+    return min(levels - 1, int(math.floor(math.log2(1 / scale) + 1e-9)))
+
+
+class TilePyramid:
+    """
+    一张源图片的瓦片金字塔（线程安全，不同 session 共享磁盘缓存）
+    属性:
+        size: 源图片尺寸
+        levels: 层数
+    """
+
+    def __init__(self, path: Path, key: str, cache_dir: Path = TILE_CACHE_DIR, tile_size: int = TILE_SIZE):
+        self.path = Path(path)
+        self.key = key
+        self.root = Path(cache_dir) / key
+        self.tile_size = tile_size
+        with Image.open(self.path) as img:
+            self.size = img.size
+        self.levels = count_levels(*self.size, tile_size)
+        self._lock = threading.Lock()
+
+    def level_size(self, level: int) -> Tuple[int, int]:
+        return level_size(*self.size, level)
+
+    def _level_dir(self, level: int) -> Path:
+        return self.root / str(level)
+
+    def has_level(self, level: int) -> bool:
+        return self._level_dir(level).is_dir()
+
+    def ensure_level(self, level: int) -> bool:
+        """
+        确保某一层已生成
+        返回: 本次是否生成了新的层
+        """
+        if self.has_level(level):
+            return False
+        with self._lock:
+            if self.has_level(level):
+                return False
+            self._build(level)
+        prune_tile_cache(keep=(self.key,))
+        return True
+
+    @timed_stage("tile_build")
+    def _build(self, level: int):
+        """解码源图片，生成 level 层及尚未生成的更粗的层"""
+        target = self.level_size(level)
+        img = Image.open(self.path)
+        record_file_read("image", self.path)
+        if level > 0:
+            # JPEG 可在解码时直接缩小到 1/2、1/4、1/8，不必解码全部像素
+            img.draft("RGB", target)
+        img = img.convert("RGB")
+        if img.size != target:
+            img = img.resize(target, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        for current in range(level, self.levels):
+            if current > level:
+                img = img.reduce(2)
+            if not self.has_level(current):
+                self._write_level(current, img)
+
+    def _write_level(self, level: int, img: Image.Image):
+        tile_size = self.tile_size
+        width, height = img.size
+        tmp_dir = self.root / f".{level}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_dir.mkdir(exist_ok=True)
+        num_tiles = 0
+        for top in range(0, height, tile_size):
+            for left in range(0, width, tile_size):
+                tile = img.crop((left, top, min(left + tile_size, width), min(top + tile_size, height)))
+                tile.save(
+                    tmp_dir / f"{left // tile_size}_{top // tile_size}.jpg",
+                    "JPEG",
+                    quality=TILE_JPEG_QUALITY,
+                )
+                num_tiles += 1
+        try:
+            os.replace(tmp_dir, self._level_dir(level))
+        except OSError:
+            # 其他进程已生成该层
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        inc("image_viewer_tiles_generated_total", num_tiles)
+
+    def get_tile(self, level: int, col: int, row: int) -> Image.Image:
+        """读取一个瓦片（解码结果放入共享图片缓存）"""
+        cache = get_image_cache()
+        cache_key = ("tile", self.key, level, col, row)
+        entry = cache.get(cache_key)
+        if entry is None:
+            with Image.open(self._level_dir(level) / f"{col}_{row}.jpg") as tile:
+                tile.load()
+                entry = {"image": tile.convert("RGB")}
+            cache.put(cache_key, entry)
+        return entry["image"]
+
+    @timed_stage("tile_region")
+    def read_region(self, level: int, box: Tuple[int, int, int, int]) -> Image.Image:
+        """
+        读取某一层中的矩形区域，只解码区域覆盖的瓦片
+        参数:
+            box: 该层像素坐标 (left, top, right, bottom)
+        """
+        self.ensure_level(level)
+        left, top, right, bottom = box
+        tile_size = self.tile_size
+        region = Image.new("RGB", (right - left, bottom - top))
+        for row in range(top // tile_size, (bottom - 1) // tile_size + 1):
+            for col in range(left // tile_size, (right - 1) // tile_size + 1):
+                region.paste(
+                    self.get_tile(level, col, row),
+                    (col * tile_size - left, row * tile_size - top),
+                )
+        return region
+
+
+_pyramids: "OrderedDict[Tuple[str, str], TilePyramid]" = OrderedDict()
+_pyramids_lock = threading.Lock()
+
+
+def get_pyramid(path: Path, cache_dir: Path = TILE_CACHE_DIR, tile_size: int = TILE_SIZE) -> TilePyramid:
+    """
+    获取源图片的瓦片金字塔（进程内复用，只读取图片头；瓦片在读取区域时按层生成）
+    无法打开源文件时抛出 OSError
+    """
+    key = pyramid_key(path, tile_size)
+    cache_key = (str(cache_dir), key)
+    with _pyramids_lock:
+        pyramid = _pyramids.get(cache_key)
+        if pyramid is not None:
+            _pyramids.move_to_end(cache_key)
+    if pyramid is None:
+        pyramid = TilePyramid(path, key, cache_dir, tile_size)
+        with _pyramids_lock:
+            _pyramids[cache_key] = pyramid
+            while len(_pyramids) > _PYRAMIDS_MAX_ENTRIES:
+                _pyramids.popitem(last=False)
+    # 目录修改时间作为最近使用时间（清理磁盘缓存时参考）
+    try:
+        os.utime(pyramid.root)
+    except OSError:
+        pass
+    return pyramid
+
+
+@timed_stage("zoom_viewport")
+def render_viewport(pyramid: TilePyramid, region: Region, out_width: int) -> Tuple[Image.Image, int]:
+    """
+    输出源图片中一个区域的视口图片
+    参数:
+        region: 归一化区域 (left, top, right, bottom)
+        out_width: 输出宽度（高度按区域比例计算）
+    返回:
+        (视口图片, 使用的层)
+        放大超过原始分辨率时按最近邻放大，便于逐像素比较
+    """
+    width, height = pyramid.size
+    region_width = max((region[2] - region[0]) * width, 1e-6)
+    region_height = max((region[3] - region[1]) * height, 1e-6)
+    scale = out_width / region_width
+    level = level_for_scale(scale, pyramid.levels)
+
+    level_width, level_height = pyramid.level_size(level)
+    exact = (
+        region[0] * level_width,
+        region[1] * level_height,
+        region[2] * level_width,
+        region[3] * level_height,
+    )
+    left = max(0, min(level_width - 1, math.floor(exact[0])))
+    top = max(0, min(level_height - 1, math.floor(exact[1])))
+    right = max(left + 1, min(level_width, math.ceil(exact[2])))
+    bottom = max(top + 1, min(level_height, math.ceil(exact[3])))
+    image = pyramid.read_region(level, (left, top, right, bottom))
+
+    out_height = max(1, round(out_width * region_height / region_width))
+    resample = Image.Resampling.NEAREST if scale > 1 else Image.Resampling.LANCZOS
+    viewport = image.resize(
+        (out_width, out_height),
+        resample,
+        box=(exact[0] - left, exact[1] - top, exact[2] - left, exact[3] - top),
+    )
+    return viewport, level
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.stat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def prune_tile_cache(
+    cache_dir: Path = TILE_CACHE_DIR, max_bytes: int = TILE_CACHE_MAX_BYTES, keep=()
+) -> int:
+    """
+    磁盘缓存超过上限时删除最久未使用的金字塔
+    参数:
+        keep: 不删除的金字塔（正在使用的）
+    返回:
+        删除的金字塔数
+    """
+    try:
+        entries = [entry for entry in os.scandir(cache_dir) if entry.is_dir()]
+    except OSError:
+        return 0
+    pyramids = []
+    for entry in entries:
+        try:
+            pyramids.append((entry.stat().st_mtime, entry.name, _dir_size(Path(entry.path))))
+        except OSError:
+            continue
+    total = sum(size for _, _, size in pyramids)
+    removed = 0
+    for _, name, size in sorted(pyramids):
+        if total <= max_bytes:
+            break
+        if name in keep:
+            continue
+        shutil.rmtree(Path(cache_dir) / name, ignore_errors=True)
+        total -= size
+        removed += 1
+        inc("image_viewer_cache_evictions_total", cache="tiles")
+    return removed
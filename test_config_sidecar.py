@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""测试编译后的二进制配置缓存（sidecar）和 SampleStore 列数据的往返"""
+
+from pathlib import Path
+
+from utils.config_sidecar import get_sidecar_path, load_config_sidecar, write_config_sidecar
+from utils.sample_store import SampleStore
+
+SAMPLES = [
+    {
+        "name": "样本1",
+        "text": "夜景 night",
+        "mask": "masks/1.png",
+        "images": {"方法A": "a/1.jpg", "方法B": None},
+    },
+    {
+        "name": "s2",
+        "reference": "ref/2.png",
+        "images": {"方法A": "a/sub/2.jpg", "方法C": "c/2.png"},
+        "tags": ["x", 1],
+        "score": 0.5,
+    },
+    {"name": 3, "text": None, "images": {}},
+]
+
+
+def _config(tmp_path: Path):
+    return {
+        "base_dir": str(tmp_path / "图片"),
+        "methods": [{"name": "方法A", "description": "描述"}, {"name": "方法B"}],
+        "samples": SampleStore.from_samples(SAMPLES),
+    }
+
+
+def _write(tmp_path: Path, digest: str = "json:abc") -> Path:
+    path = get_sidecar_path(tmp_path / "configs", digest)
+    write_config_sidecar(path, digest, _config(tmp_path))
+    return path
+
+
+def test_sample_store_round_trip():
+    """SampleStore 的记录与原始样本相同（含 None 图片、额外字段和非 ASCII 文本）"""
+    store = SampleStore.from_samples(SAMPLES)
+    assert len(store) == len(SAMPLES)
+    assert [sample.to_dict() for sample in store] == SAMPLES
+
+    meta, columns = store.to_columns()
+    rebuilt = SampleStore.from_columns(meta, columns)
+    assert [sample.to_dict() for sample in rebuilt] == SAMPLES
+
+
+def test_write_then_load(tmp_path):
+    """写入后通过 mmap 加载，配置与写入前相同"""
+    path = _write(tmp_path)
+    config = load_config_sidecar(path, "json:abc")
+
+    assert config is not None
+    expected = _config(tmp_path)
+    assert config["base_dir"] == expected["base_dir"]
+    assert config["methods"] == expected["methods"]
+    assert [sample.to_dict() for sample in config["samples"]] == SAMPLES
+    assert config["samples"][0]["images"]["方法B"] is None
+    assert "方法C" not in config["samples"][0]["images"]
+    assert config["samples"][1]["tags"] == ["x", 1]
+
+
+def test_wrong_digest_is_rejected(tmp_path):
+    path = _write(tmp_path)
+    assert load_config_sidecar(path, "json:other") is None
+
+
+def test_truncated_file_is_rejected(tmp_path):
+    """文件被截断（列数据或头部不完整）时返回 None，调用方回退到正常解析"""
+    path = _write(tmp_path)
+    data = path.read_bytes()
+    for size in (len(data) - 1, len(data) // 2, 20, 0):
+        path.write_bytes(data[:size])
+        assert load_config_sidecar(path, "json:abc") is None
+
+
+def test_missing_file_is_rejected(tmp_path):
+    assert load_config_sidecar(tmp_path / "missing.ivc", "json:abc") is None
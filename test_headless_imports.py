@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""测试核心模块（加载、图片处理、crop、导出）和命令行入口不依赖 streamlit，界面启动时不加载重型依赖"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+# 无界面场景使用的模块（子进程、命令行、基准测试）
+CORE_MODULES = [
+    "utils",
+    "services.crop_manager",
+    "services.image_prep",
+    "services.pdf_export",
+    "services.dataset_export",
+    "services.html_export",
+    "services.mosaic_export",
+    "services.export_jobs",
+    "services.integrity_scan",
+    "services.session_memory",
+    "services.metrics_exporter",
+    "services.tile_pyramid",
+    "cli",
+]
+
+# 界面启动时不应加载的重型依赖（在第一次导出、裁剪、应用 mask 或筛选时才导入）
+DEFERRED_MODULES = ["reportlab", "streamlit_cropper", "numpy"]
+
+
+def test_core_modules_do_not_import_streamlit():
+    """在全新的解释器中导入核心模块，检查 streamlit 没有被加载"""
+    code = (
+        "import importlib, sys\n"
+        f"for name in {CORE_MODULES!r}:\n"
+        "    importlib.import_module(name)\n"
+        # utils 的导出按需加载，逐个访问以导入全部子模块
+        "import utils\n"
+        "for name in utils.__all__:\n"
+        "    getattr(utils, name)\n"
+        "print('streamlit' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    print(f"导入模块: {', '.join(CORE_MODULES)}")
+    print(f"streamlit 已加载: {result.stdout.strip()}")
+    assert result.stdout.strip() == "False"
+
+
+
+def test_app_defers_heavy_imports():
+    """在全新的解释器中导入 app，检查重型依赖没有被加载"""
+    code = (
+        "import sys\n"
+        "import app\n"
+        f"print([name for name in {DEFERRED_MODULES!r} if name in sys.modules])\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    print(f"已加载的重型依赖: {result.stdout.strip()}")
+    assert result.stdout.strip() == "[]"
+
+
+if __name__ == "__main__":
+    test_core_modules_do_not_import_streamlit()
+    test_app_defers_heavy_imports()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""测试清单行索引和逐行解析：空行、空白行、格式错误的行和没有换行符的最后一行"""
+
+from pathlib import Path
+
+import utils.manifest_loader as manifest_loader
+from utils.manifest_loader import build_line_index, load_manifest
+
+
+def _write_manifest(tmp_path: Path) -> Path:
+    lines = [
+        b'{"methods": [{"name": "a"}, {"name": "b"}]}\n',
+        b'{"name": "s1", "images": {"a": "1.png", "b": null}}\n',
+        b"\n",
+        b"   \t \r\n",
+        b"\r\n",
+        b"{\n",
+        b'{"images": {"a": "x.png"}}\n',
+        b'{"name": "s2", "images": ["a"]}\n',
+        b"{}\n",
+        b'{"name": "s3", "images": {"a": "3.png"}}',
+    ]
+    path = tmp_path / "manifest.jsonl"
+    path.write_bytes(b"".join(lines))
+    return path
+
+
+def test_line_index_skips_blank_lines(tmp_path, monkeypatch):
+    """只索引有内容的行；块边界落在行中间时结果不变"""
+    path = _write_manifest(tmp_path)
+    data = path.read_bytes()
+    expected = [0]
+    expected += [
+        i + 1
+        for i, byte in enumerate(data)
+        if byte == 0x0A and data[i + 1 :].split(b"\n", 1)[0].strip()
+    ]
+
+    assert build_line_index(path).tolist() == expected
+    for chunk_size in (1, 2, 3, 7, 64):
+        monkeypatch.setattr(manifest_loader, "INDEX_CHUNK_SIZE", chunk_size)
+        assert build_line_index(path).tolist() == expected
+
+
+def test_invalid_lines_become_placeholder_samples(tmp_path):
+    """格式错误或缺少 name / images 的行解析为占位样本，不会抛出异常"""
+    config, stats = load_manifest(_write_manifest(tmp_path))
+
+    assert stats["errors"] == []
+    samples = config["samples"]
+    assert len(samples) == 6
+    assert samples[0] == {"name": "s1", "images": {"a": "1.png", "b": None}}
+    assert samples[-1] == {"name": "s3", "images": {"a": "3.png"}}
+    for sample in samples[1:5]:
+        assert sample["name"].startswith("⚠")
+        assert sample["images"] == {}
+        assert sample["text"]
+    assert [sample["name"] for sample in samples] == [s["name"] for s in list(samples)]
+
+
+def test_short_lines_are_kept(tmp_path):
+    """两个字节以内的有效行（如 CSV 中的单字符名称）不会被过滤"""
+    path = tmp_path / "manifest.csv"
+    path.write_bytes(b"name,a\nx,\n\ny,1.png")
+    config, stats = load_manifest(path)
+
+    assert stats["errors"] == []
+    assert [sample["name"] for sample in config["samples"]] == ["x", "y"]
+    assert config["samples"][1]["images"] == {"a": "1.png"}
+
+
+def test_csv_header_with_bom(tmp_path):
+    """Excel 保存的 "CSV UTF-8" 以 BOM 开头，name 列仍能识别"""
+    path = tmp_path / "manifest.csv"
+    path.write_bytes("name,方法A\ns1,a/1.jpg\n".encode("utf-8-sig"))
+    config, stats = load_manifest(path)
+
+    assert stats["errors"] == []
+    assert config["methods"] == [{"name": "方法A", "description": ""}]
+    assert config["samples"][0] == {"name": "s1", "images": {"方法A": "a/1.jpg"}}
+
+
+def test_malformed_first_jsonl_line_is_a_data_row(tmp_path):
+    """没有表头时，无法解析的第一行与其他位置的坏行一样显示为占位样本"""
+    path = tmp_path / "manifest.jsonl"
+    path.write_bytes(b'{"name": \n{"name": "s1", "images": {"a": "1.png"}}\n')
+    config, stats = load_manifest(path)
+
+    assert stats["errors"] == []
+    assert config["methods"] == [{"name": "a", "description": ""}]
+    samples = config["samples"]
+    assert len(samples) == 2
+    assert samples[0]["name"].startswith("⚠")
+    assert samples[1]["name"] == "s1"
@@ -1,11 +1,44 @@
-from .styles import apply_custom_styles
-from .sidebar import render_sidebar
-from .main_view import render_main_view
-from .crop_editor import render_crop_editor
-
-__all__ = [
-    'apply_custom_styles',
-    'render_sidebar',
-    'render_main_view',
-    'render_crop_editor',
-]
+"""
+界面模块
+
+子模块按需导入（PEP 562）：导入其中一个模块（如 ui.styles）时不会连带加载
+导出、crop 编辑器等其他模块
+"""
+
+import importlib
+
+# 导出名称 -> 所在子模块
+_EXPORTS = {
+    'apply_custom_styles': 'styles',
+    'render_sidebar': 'sidebar',
+    'render_main_view': 'main_view',
+    'render_crop_editor': 'crop_editor',
+    'render_zoom_viewer': 'zoom_viewer',
+    'render_integrity_panel': 'integrity_panel',
+    'render_export_button': 'export_button',
+    'render_dataset_export': 'export_button',
+    'begin_session_run': 'memory_panel',
+    'track_session_memory': 'memory_panel',
+    'track_fragment_run': 'memory_panel',
+    'render_memory_admin': 'memory_panel',
+    'start_rerun_timings': 'timing_panel',
+    'render_timing_panel': 'timing_panel',
+    'start_rerun_profile': 'profiler_panel',
+    'stop_rerun_profile': 'profiler_panel',
+    'render_profiler_panel': 'profiler_panel',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module_name}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,5 +1,4 @@
 import streamlit as st
-from streamlit_cropper import st_cropper
 from pathlib import Path
 from PIL import Image
 import time
@@ -13,8 +12,11 @@ from services.crop_manager import (
     get_next_crop_color,
     save_crop_for_sample,
 )
+from ui.memory_panel import track_fragment_run
 
 
+@st.fragment
+@track_fragment_run
 def render_crop_editor(
     samples: List[Dict],
     methods: List[Dict],
@@ -26,7 +28,12 @@ def render_crop_editor(
     渲染 Crop 编辑器界面
     
     当 st.session_state.current_cropping_sample 不为 None 时调用
+    编辑器是独立的 fragment：拖动裁剪框、切换参考图片只重新运行编辑器，
+    保存或取消时再整页重新运行以更新主视图
     """
+    # 裁剪组件只在打开编辑器时导入
+    from streamlit_cropper import st_cropper
+
     sample_idx = st.session_state.current_cropping_sample
     sample = samples[sample_idx]
 
@@ -37,13 +44,15 @@ def render_crop_editor(
 
     if is_editing:
         # Editing existing crop
-        existing_crop = get_crop_by_id(sample_idx, st.session_state.current_editing_crop_id)
+        existing_crop = get_crop_by_id(
+            st.session_state.crop_data, sample_idx, st.session_state.current_editing_crop_id
+        )
         if existing_crop:
             crop_id = existing_crop['id']
             crop_color = existing_crop['color']
             crop_number = None
             # Find crop number for display
-            crop_data = get_crop_data(sample_idx)
+            crop_data = get_crop_data(st.session_state.crop_data, sample_idx)
             if crop_data and 'crops' in crop_data:
                 for idx, c in enumerate(crop_data['crops']):
                     if c['id'] == crop_id:
@@ -70,7 +79,7 @@ def render_crop_editor(
     if not is_editing:
         # Adding new crop
         crop_id = f"crop_{st.session_state.next_crop_id_counter}"
-        crop_color = get_next_crop_color(sample_idx)
+        crop_color = get_next_crop_color(st.session_state.crop_data, sample_idx)
         st.markdown(f"### 🔍 Add Crop for: {sample['name']}")
 
     st.divider()
@@ -122,7 +131,7 @@ def render_crop_editor(
         with col_cropper:
             st.markdown(f"**{lang['reference_image']}**")
 
-            # Fixed display size for editing mode
+            # Fixed display size for editing mode（预览使用相同宽度保持高度一致）
             max_display_size = 420
 
             ref_w, ref_h = reference_img.size
@@ -151,9 +160,6 @@ def render_crop_editor(
                 key=f"cropper_{sample_idx}_{crop_id}"
             )
 
-            # Store display_size for height consistency in preview
-            st.session_state[f"display_size_{sample_idx}_{crop_id}"] = display_size
-
             # Scale crop coordinates back to original image size
             cropped_img = None
             if cropped_img_scaled and cropped_img_scaled.get('width', 0) > 0:
@@ -167,9 +173,6 @@ def render_crop_editor(
         with col_preview:
             st.markdown(f"**{lang['close_view_preview']}**")
 
-            # Get display size to maintain height consistency
-            display_size = st.session_state.get(f"display_size_{sample_idx}_{crop_id}", display_size)
-
             # Display crop size and aspect ratio
             if cropped_img and cropped_img.get('width', 0) > 0:
                 crop_w = cropped_img['width']
@@ -214,7 +217,18 @@ def render_crop_editor(
                            int(cropped_img['top'] + cropped_img['height']))
 
                     # Save crop for all methods in this sample
-                    if save_crop_for_sample(sample_idx, box, samples, methods, base_dir, image_width, crop_id, crop_color, st.session_state.visible_methods):
+                    try:
+                        save_crop_for_sample(
+                            st.session_state.crop_data, sample_idx, box, samples, methods,
+                            base_dir, image_width, crop_id, crop_color,
+                            st.session_state.visible_methods,
+                        )
+                        saved = True
+                    except Exception as e:
+                        st.error(f"保存裁剪数据时出错: {e}")
+                        saved = False
+
+                    if saved:
                         st.success("Crop saved successfully!")
 
                         # Increment counter if this was a new crop
@@ -0,0 +1,407 @@
+import importlib
+import os
+import time
+import streamlit as st
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from config.constants import (
+    EXPORT_DIR,
+    EXPORT_FORMATS,
+    EXPORT_POLL_INTERVAL,
+    MOSAIC_IMAGE_FORMATS,
+)
+from services.export_jobs import (
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_RUNNING,
+    compute_view_fingerprint,
+    get_export_registry,
+    snapshot_crop_data,
+)
+from utils.sample_filter import FilteredSamples, get_source_index
+from ui.memory_panel import track_fragment_run
+
+
+def _get_export_options(image_width: int) -> Dict:
+    """影响导出结果的显示选项（同时作为导出函数的关键字参数）"""
+    return {
+        "show_method_name": st.session_state.show_method_name,
+        "show_text": st.session_state.show_text,
+        "show_sample_name": st.session_state.show_sample_name,
+        "show_descriptions": st.session_state.show_descriptions,
+        "close_view_enabled": st.session_state.close_view_enabled,
+        "preserve_aspect_ratio": st.session_state.preserve_aspect_ratio,
+        "use_mask": st.session_state.use_mask,
+        "darken_factor": st.session_state.darken_factor,
+        "image_width": image_width,
+        "visible_methods": list(st.session_state.visible_methods),
+        "image_format": st.session_state.pdf_image_format,
+        "image_dpi": st.session_state.pdf_image_dpi,
+    }
+
+
+def _safe_filename(name: str) -> str:
+    return "".join(c for c in name if c.isalnum() or c in (" ", "-", "_")).strip()
+
+
+def _claim_profile_request(job: Dict):
+    """
+    任务带剖析时，请求已完成，记录任务指纹供剖析面板显示结果
+    已有结果的导出不会重新运行（也不会被剖析），请求保留到下一次导出
+    """
+    if job["profiled"]:
+        st.session_state.profile_pending = None
+        st.session_state.profile_export_fingerprint = job["fingerprint"]
+
+
+def _start_export(fingerprint: str, filename: str, pdf_kwargs: Dict):
+    """
+    提交后台导出任务（按钮回调）
+    开启计时面板时记录导出各阶段的耗时；剖析面板请求了剖析导出时剖析该任务
+    """
+    # 导出模块依赖 ReportLab，在第一次导出时才导入（不拖慢冷启动）
+    from services.pdf_export import generate_pdf_from_current_view
+
+    job = get_export_registry().submit(
+        fingerprint,
+        filename,
+        generate_pdf_from_current_view,
+        timed=st.session_state.timing_enabled,
+        profiled=st.session_state.profile_pending == "export",
+        **pdf_kwargs,
+    )
+    st.session_state.timing_export_fingerprint = fingerprint
+    _claim_profile_request(job)
+
+
+def _remove_export_file(job: Dict):
+    """导出结果移出缓存时删除输出文件"""
+    if job["result"] is not None:
+        Path(job["result"]).unlink(missing_ok=True)
+
+
+def _read_on_click(path: Path):
+    """下载按钮的延迟数据：用户点击下载时才在单独的线程中读取文件"""
+    return lambda: path.read_bytes()
+
+
+# 导出格式 -> (模块, 导出函数名, 输出文件后缀)；HTML 画廊和拼图打包为 zip 下载
+# 导出模块在提交任务时才导入
+DATASET_EXPORTERS = {
+    "pdf": ("services.dataset_export", "export_dataset_pdf", ".pdf"),
+    "html": ("services.html_export", "export_html_gallery", ".zip"),
+    "mosaic": ("services.mosaic_export", "export_mosaics", ".zip"),
+}
+
+
+def _start_dataset_export(
+    fingerprint: str, filename: str, export_format: str, export_kwargs: Dict
+):
+    """提交完整数据集导出任务（按钮回调）；剖析的是任务线程，进程池中的图片处理不在其中"""
+    module_name, func_name, suffix = DATASET_EXPORTERS[export_format]
+    export_func = getattr(importlib.import_module(module_name), func_name)
+    job = get_export_registry().submit(
+        fingerprint,
+        filename,
+        export_func,
+        on_evict=_remove_export_file,
+        profiled=st.session_state.profile_pending == "export",
+        output_path=EXPORT_DIR / f"{fingerprint}{suffix}",
+        **export_kwargs,
+    )
+    _claim_profile_request(job)
+
+
+@st.fragment(run_every=EXPORT_POLL_INTERVAL)
+@track_fragment_run
+def _render_export_progress(fingerprint: str, lang: Dict, show_rate: bool = False):
+    """定时刷新导出进度；任务结束后整页重新运行以显示下载按钮"""
+    job = get_export_registry().get(fingerprint)
+    if job is None or job["status"] != JOB_RUNNING:
+        st.rerun()
+    st.progress(job["progress"], text=f"{int(job['progress'] * 100)}%")
+    if show_rate and job["total"]:
+        elapsed = max(1e-6, time.time() - job["started"])
+        st.caption(
+            lang["dataset_export_progress"].format(
+                done=job["done"], total=job["total"], rate=job["done"] / elapsed
+            )
+        )
+    else:
+        st.caption(lang["save_pdf_generating"])
+
+
+@st.fragment
+@track_fragment_run
+def render_export_button(
+    samples: Sequence,
+    methods: List[Dict],
+    base_dir: Path,
+    config_digest: str,
+    num_rows: int,
+    image_width: int,
+    lang: Dict,
+):
+    """
+    渲染 PDF 导出按钮（独立的 fragment，点击只重新运行按钮本身）
+    只在点击时于后台生成 PDF，结果按视图状态指纹缓存：
+    视图未变化时再次下载直接复用，切换页面或选项不会触发重新生成
+    """
+    # 正在编辑 crop 或没有样本时禁用按钮
+    if st.session_state.current_cropping_sample is not None or len(samples) == 0:
+        st.button(
+            "📥 Export",
+            disabled=True,
+            help=lang["save_pdf_disabled_tooltip"],
+            key="save_pdf_btn",
+        )
+        return
+
+    start_idx = st.session_state.selected_sample_idx
+    end_idx = min(start_idx + num_rows, len(samples))
+    sample_indices = [get_source_index(samples, pos) for pos in range(start_idx, end_idx)]
+
+    options = _get_export_options(image_width)
+    # 关闭 Close View 时导出不使用 crop 数据
+    crop_data = (
+        snapshot_crop_data(st.session_state.crop_data, sample_indices)
+        if st.session_state.close_view_enabled
+        else {}
+    )
+    fingerprint = compute_view_fingerprint(
+        config_digest,
+        sample_indices,
+        {**options, "language": st.session_state.language},
+        crop_data,
+    )
+
+    job = get_export_registry().get(fingerprint)
+
+    if job is not None and job["status"] == JOB_RUNNING:
+        _render_export_progress(fingerprint, lang)
+        return
+
+    if job is not None and job["status"] == JOB_DONE:
+        st.download_button(
+            label="📥 Export",
+            data=job["result"],
+            file_name=job["filename"],
+            mime="application/pdf",
+            help=lang["save_pdf_tooltip"],
+            key="save_pdf_btn",
+        )
+        return
+
+    # 生成文件名
+    safe_name = _safe_filename(samples[start_idx]["name"])
+    filename = f"{lang['save_pdf_filename']}_{safe_name}.pdf"
+
+    pdf_kwargs = {
+        **options,
+        "samples": samples,
+        "methods": methods,
+        "base_dir": base_dir,
+        "start_idx": start_idx,
+        "num_rows": num_rows,
+        "crop_data": crop_data,
+        "lang": lang,
+    }
+    failed = job is not None and job["status"] == JOB_FAILED
+    st.button(
+        "📥 Export",
+        on_click=_start_export,
+        args=(fingerprint, filename, pdf_kwargs),
+        help=(
+            lang["save_pdf_failed"].format(error=job["error"])
+            if failed
+            else lang["save_pdf_start_tooltip"]
+        ),
+        key="save_pdf_btn",
+    )
+
+
+def render_dataset_export(
+    samples: Sequence,
+    all_samples: Sequence,
+    methods: List[Dict],
+    base_dir: Path,
+    config_digest: str,
+    image_width: int,
+    lang: Dict,
+):
+    """
+    在侧边栏渲染完整数据集导出
+    导出全部样本或当前筛选结果，图片在进程池中并行处理，可按卷拆分输出
+    参数:
+        samples: 当前筛选后的样本视图
+        all_samples: 全部样本
+    """
+    with st.sidebar:
+        _render_dataset_export_panel(
+            samples, all_samples, methods, base_dir, config_digest, image_width, lang
+        )
+
+
+@st.fragment
+@track_fragment_run
+def _render_dataset_export_panel(
+    samples: Sequence,
+    all_samples: Sequence,
+    methods: List[Dict],
+    base_dir: Path,
+    config_digest: str,
+    image_width: int,
+    lang: Dict,
+):
+    """导出面板（独立的 fragment，修改导出选项只重新运行面板）"""
+    with st.expander(lang["dataset_export_title"], expanded=False):
+        filtered = isinstance(samples, FilteredSamples)
+        if filtered:
+            scope = st.radio(
+                lang["dataset_export_scope_label"],
+                ("filtered", "all"),
+                format_func=lambda x: lang[f"dataset_export_scope_{x}"].format(
+                    n=len(samples) if x == "filtered" else len(all_samples)
+                ),
+                key="dataset_export_scope",
+            )
+        else:
+            scope = "all"
+        export_samples = samples if filtered and scope == "filtered" else all_samples
+
+        export_format = st.radio(
+            lang["dataset_export_format_label"],
+            EXPORT_FORMATS,
+            format_func=lambda x: lang[f"dataset_export_format_{x}"],
+            horizontal=True,
+            key="dataset_export_format",
+        )
+        if export_format == "pdf":
+            st.number_input(
+                lang["dataset_export_volume_label"],
+                min_value=0,
+                step=100,
+                help=lang["dataset_export_volume_help"],
+                key="dataset_export_volume",
+            )
+        elif export_format == "mosaic":
+            st.selectbox(
+                lang["mosaic_image_format_label"],
+                MOSAIC_IMAGE_FORMATS,
+                format_func=str.upper,
+                key="mosaic_image_format",
+            )
+            st.number_input(
+                lang["mosaic_samples_per_image_label"],
+                min_value=1,
+                help=lang["mosaic_samples_per_image_help"],
+                key="mosaic_samples_per_image",
+            )
+        st.number_input(
+            lang["dataset_export_workers_label"],
+            min_value=1,
+            max_value=max(1, (os.cpu_count() or 1) * 2),
+            help=lang["dataset_export_workers_help"],
+            key="dataset_export_workers",
+        )
+
+        options = _get_export_options(image_width)
+        if export_format == "pdf":
+            options["samples_per_volume"] = st.session_state.dataset_export_volume
+        else:
+            # PDF 图片嵌入选项不影响 HTML 画廊和拼图
+            del options["image_format"], options["image_dpi"]
+        if export_format == "mosaic":
+            del options["show_descriptions"]
+            options["image_format"] = st.session_state.mosaic_image_format
+            options["samples_per_image"] = st.session_state.mosaic_samples_per_image
+        crop_data = {}
+        if st.session_state.close_view_enabled:
+            crop_data = snapshot_crop_data(
+                st.session_state.crop_data,
+                [
+                    idx
+                    for idx in st.session_state.crop_data
+                    if export_samples is all_samples
+                    or export_samples.position_of(idx) is not None
+                ],
+            )
+        # 导出全部样本时不需要逐个列出索引
+        sample_indices = (
+            export_samples.indices.tolist()
+            if export_samples is not all_samples
+            else []
+        )
+        fingerprint = compute_view_fingerprint(
+            config_digest,
+            sample_indices,
+            {
+                **options,
+                "scope": scope,
+                "format": export_format,
+                "num_samples": len(export_samples),
+                "language": st.session_state.language,
+            },
+            crop_data,
+        )
+
+        job = get_export_registry().get(fingerprint)
+        if job is not None and job["status"] == JOB_DONE:
+            if not Path(job["result"]).exists():
+                job = None
+
+        if job is not None and job["status"] == JOB_RUNNING:
+            _render_export_progress(fingerprint, lang, show_rate=True)
+            return
+
+        if job is not None and job["status"] == JOB_DONE:
+            result = Path(job["result"])
+            elapsed = max(1e-6, job["finished"] - job["started"])
+            st.caption(
+                lang["dataset_export_done"].format(
+                    n=job["total"],
+                    size=result.stat().st_size / 1024 / 1024,
+                    elapsed=elapsed,
+                    rate=job["total"] / elapsed,
+                )
+            )
+            # 点击时才读取文件：数据集导出可能有数 GB，不在每次运行时读入内存并注册媒体文件
+            st.download_button(
+                label=lang["dataset_export_download"],
+                data=_read_on_click(result),
+                file_name=f"{job['filename']}{result.suffix}",
+                mime=(
+                    "application/zip"
+                    if result.suffix == ".zip"
+                    else "application/pdf"
+                ),
+                use_container_width=True,
+                key="dataset_export_download_btn",
+            )
+            return
+
+        if job is not None and job["status"] == JOB_FAILED:
+            st.error(lang["save_pdf_failed"].format(error=job["error"]))
+
+        export_kwargs = {
+            **options,
+            "samples": export_samples,
+            "methods": methods,
+            "base_dir": base_dir,
+            "crop_data": crop_data,
+            "lang": lang,
+            "max_workers": st.session_state.dataset_export_workers,
+        }
+        filename = f"{lang['save_pdf_filename']}_{scope}_{len(export_samples)}"
+        st.button(
+            lang["dataset_export_start"],
+            on_click=_start_dataset_export,
+            args=(fingerprint, filename, export_format, export_kwargs),
+            disabled=(
+                st.session_state.current_cropping_sample is not None
+                or len(export_samples) == 0
+            ),
+            use_container_width=True,
+            key="dataset_export_btn",
+        )
@@ -0,0 +1,197 @@
+import streamlit as st
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from config.constants import EXPORT_POLL_INTERVAL
+from services.integrity_scan import (
+    ISSUE_STATUSES,
+    SCAN_DONE,
+    SCAN_FAILED,
+    SCAN_LEVELS,
+    SCAN_RUNNING,
+    get_integrity_registry,
+)
+from ui.sidebar import jump_to_sample, get_view_position
+from ui.memory_panel import track_fragment_run
+
+# 报告中最多列出的问题条数
+MAX_LISTED_ISSUES = 200
+
+# 需要点击按钮才开始的检查级别（完整解码要读取所有图片数据）
+MANUAL_SCAN_LEVELS = ("decode",)
+
+
+def _scan_key(config_digest: str, level: str) -> str:
+    """检查任务的键（同一配置和级别的报告在所有 session 间共享）"""
+    return f"{config_digest}|{level}"
+
+
+def _start_scan(
+    key: str, samples: List[Dict], methods: List[Dict], base_dir: Path, level: str
+):
+    """重新检查 / 开始完整解码检查（按钮回调）"""
+    get_integrity_registry().submit(key, samples, methods, base_dir, level, force=True)
+
+
+@st.fragment(run_every=EXPORT_POLL_INTERVAL)
+@track_fragment_run
+def _render_scan_progress(key: str, lang: Dict):
+    """定时刷新检查进度；任务结束后整页重新运行以显示报告"""
+    job = get_integrity_registry().get(key)
+    if job is None or job["status"] != SCAN_RUNNING:
+        st.rerun()
+    st.progress(job["progress"], text=lang["integrity_scanning"])
+    if job["total"]:
+        st.caption(
+            lang["integrity_scan_progress"].format(done=job["done"], total=job["total"])
+        )
+
+
+def render_integrity_panel(
+    samples: List[Dict],
+    methods: List[Dict],
+    base_dir: Path,
+    config_digest: str,
+    lang: Dict,
+    view: Sequence,
+):
+    """
+    在侧边栏渲染数据集完整性报告
+    加载配置（配置摘要变化）时按所选级别在后台线程池中检查所有图片，不阻塞页面；
+    完整解码级别需点击按钮开始。报告按 (配置摘要, 检查级别) 在进程内共享
+    view 为当前筛选后的样本视图，用于把跳转目标换算为视图位置
+    """
+    with st.sidebar:
+        with st.expander(lang["integrity_title"], expanded=False):
+            level = st.selectbox(
+                lang["integrity_level_label"],
+                SCAN_LEVELS,
+                format_func=lambda x: lang[f"integrity_level_{x}"],
+                help=lang["integrity_level_help"],
+                key="integrity_level",
+            )
+            if level == "off":
+                return
+
+            key = _scan_key(config_digest, level)
+            registry = get_integrity_registry()
+            job = registry.get(key)
+            if job is None and level not in MANUAL_SCAN_LEVELS:
+                job = registry.submit(key, samples, methods, base_dir, level)
+
+            if job is not None and job["status"] == SCAN_RUNNING:
+                _render_scan_progress(key, lang)
+                return
+
+            scan_args = (key, samples, methods, base_dir, level)
+            if job is None or job["status"] != SCAN_DONE:
+                if job is None:
+                    st.caption(lang["integrity_manual_hint"])
+                elif job["status"] == SCAN_FAILED:
+                    st.error(lang["integrity_scan_failed"].format(error=job["error"]))
+                st.button(
+                    lang["integrity_run"],
+                    on_click=_start_scan,
+                    args=scan_args,
+                    use_container_width=True,
+                    key="integrity_run_btn",
+                )
+                return
+
+            report = job["result"]
+            st.button(
+                lang["integrity_rerun"],
+                on_click=_start_scan,
+                args=scan_args,
+                use_container_width=True,
+                key="integrity_rerun_btn",
+            )
+            issues = report["issues"]
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric(lang["integrity_files_label"], report["num_files"])
+            with col2:
+                st.metric(
+                    lang["integrity_bad_samples_label"],
+                    len(report["bad_samples"]) if issues else "0 ✓",
+                )
+
+            if not issues:
+                st.caption(lang["integrity_no_issues"])
+                return
+
+            # 按方法统计
+            st.dataframe(
+                [
+                    {
+                        lang["integrity_role_label"]: role,
+                        **{
+                            lang[f"integrity_status_{status}"]: counts.get(status, 0)
+                            for status in ISSUE_STATUSES
+                        },
+                    }
+                    for role, counts in report["counts"].items()
+                ],
+                hide_index=True,
+                use_container_width=True,
+            )
+
+            # 过滤
+            status_filter = st.multiselect(
+                lang["integrity_status_filter"],
+                ISSUE_STATUSES,
+                default=list(ISSUE_STATUSES),
+                format_func=lambda x: lang[f"integrity_status_{x}"],
+                key="integrity_status_filter",
+            )
+            role_filter = st.multiselect(
+                lang["integrity_role_filter"],
+                list(report["counts"].keys()),
+                key="integrity_role_filter",
+            )
+            filtered = [
+                issue
+                for issue in issues
+                if issue["status"] in status_filter
+                and (not role_filter or issue["role"] in role_filter)
+            ]
+
+            st.caption(
+                lang["integrity_filtered_count"].format(
+                    n=len(filtered), total=len(issues)
+                )
+            )
+            st.dataframe(
+                [
+                    {
+                        "#": issue["sample_idx"] + 1,
+                        lang["integrity_sample_label"]: issue["sample_name"],
+                        lang["integrity_role_label"]: issue["role"],
+                        lang["integrity_status_label"]: lang[
+                            f"integrity_status_{issue['status']}"
+                        ],
+                        lang["integrity_path_label"]: issue["path"] or "-",
+                    }
+                    for issue in filtered[:MAX_LISTED_ISSUES]
+                ],
+                hide_index=True,
+                use_container_width=True,
+            )
+
+            # 跳转到有问题的样本
+            bad_names = {issue["sample_idx"]: issue["sample_name"] for issue in filtered}
+            bad_samples = sorted(bad_names)
+            if bad_samples:
+                target = st.selectbox(
+                    lang["integrity_jump_label"],
+                    bad_samples[:MAX_LISTED_ISSUES],
+                    format_func=lambda i: f"{i + 1}. {bad_names[i]}",
+                    key="integrity_jump_target",
+                )
+                st.button(
+                    lang["integrity_jump_button"],
+                    on_click=jump_to_sample,
+                    args=(target, get_view_position(view, target)),
+                    use_container_width=True,
+                    key="integrity_jump_btn",
+                )
@@ -1,17 +1,185 @@
+import html
 import streamlit as st
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
 from PIL import Image
-from typing import Dict, List
 
-from config.constants import MAX_CROPS_PER_SAMPLE
+from config.constants import COMPOSITE_GAP, COMPOSITE_MAX_WIDTH, MAX_CROPS_PER_SAMPLE
 from utils.image_processing import (
-    load_and_process_image,
-    check_image_exists,
-    draw_all_crop_boxes_on_image,
+    compose_strip,
+    composite_tile_width,
     filter_visible_methods,
 )
-from utils.mask import load_mask, apply_mask_to_image
-from services.crop_manager import get_crop_data, delete_crop_from_sample
+from utils.sample_filter import get_source_index
+from services.crop_manager import (
+    get_crop_data,
+    delete_crop_from_sample,
+    with_cropped_images,
+)
+from services.image_prep import prepare_image
+from utils.metrics import inc
+from utils.timing import count, timed, timing_item
+
+
+def _prepare_row_images(
+    sample: Dict,
+    crop_data: Optional[Dict],
+    visible_methods_list: List[Dict],
+    base_dir: Path,
+    image_width: int,
+    lang: Dict,
+) -> Tuple[List[Dict], List[Tuple[str, str]]]:
+    """
+    准备一个样本行的所有图片
+    返回: (图片信息列表, 需要显示的提示 [(级别, 文本)])
+    """
+    images_data = []
+    messages = []
+
+    for method in visible_methods_list:
+        method_name = method["name"]
+        method_desc = method.get("description", "")
+
+        if method_name not in sample["images"]:
+            messages.append(
+                ("warning", f"样本 '{sample['name']}' 中缺少方法 '{method_name}' 的图片")
+            )
+            continue
+
+        image_rel_path = sample["images"][method_name]
+
+        # 处理图片路径为None的情况（缺失的图片）
+        if image_rel_path is None:
+            image_path = None
+        else:
+            image_path = base_dir / image_rel_path
+
+        # mask 和 crop 框只应用于实际存在的图片
+        mask_path = (
+            base_dir / sample["mask"]
+            if image_path is not None
+            and st.session_state.use_mask
+            and sample.get("mask")
+            else None
+        )
+        crops = (
+            crop_data.get("crops", [])
+            if image_path is not None
+            and st.session_state.close_view_enabled
+            and crop_data
+            else None
+        )
+
+        # 准备图片（与 PDF 导出共享缓存；路径为None时生成占位符）
+        with timing_item(sample["name"], method_name):
+            prepared = prepare_image(
+                image_path,
+                image_width,
+                st.session_state.preserve_aspect_ratio,
+                mask_path=mask_path,
+                darken_factor=st.session_state.darken_factor,
+                crops=crops,
+                placeholder_text=lang.get("image_missing_placeholder", "Image Missing"),
+            )
+        if prepared["error"]:
+            messages.append(("error", f"加载图片 {image_path} 时出错: {prepared['error']}"))
+
+        if prepared["image"] is not None:
+            images_data.append(
+                {
+                    "method_name": method_name,
+                    "description": method_desc,
+                    "image": prepared["image"],
+                    "original_ratio": prepared["original_ratio"],
+                    "was_cropped": prepared["was_cropped"],
+                    "path": image_rel_path,
+                }
+            )
+
+    return images_data, messages
+
+
+def _get_row_images(
+    sample: Dict,
+    sample_idx: int,
+    crop_data: Optional[Dict],
+    visible_methods_list: List[Dict],
+    base_dir: Path,
+    image_width: int,
+    lang: Dict,
+) -> Tuple[List[Dict], List[Tuple[str, str]], Dict]:
+    """
+    获取样本行的图片，按影响图片的选项在 session 中缓存
+    只改变文字大小、显示名称等选项时整页重新运行也不会再准备图片
+    返回: (图片信息列表, 提示, 合成图片缓存)；合成图片缓存与该行缓存一起失效
+    """
+    crops_key = ()
+    if st.session_state.close_view_enabled and crop_data:
+        crops_key = tuple(
+            (crop["id"], tuple(crop["box"]), crop["color"])
+            for crop in crop_data.get("crops", [])
+        )
+    key = (
+        st.session_state.config_hash,
+        st.session_state.language,
+        tuple(m["name"] for m in visible_methods_list),
+        image_width,
+        st.session_state.preserve_aspect_ratio,
+        st.session_state.use_mask,
+        st.session_state.darken_factor,
+        crops_key,
+    )
+
+    cached = st.session_state.row_images.get(sample_idx)
+    if cached is not None and cached[0] == key:
+        count("row_cache_hit")
+        inc("image_viewer_cache_requests_total", cache="row", result="hit")
+        return cached[1], cached[2], cached[3]
+    count("row_cache_miss")
+    inc("image_viewer_cache_requests_total", cache="row", result="miss")
+
+    images_data, messages = _prepare_row_images(
+        sample, crop_data, visible_methods_list, base_dir, image_width, lang
+    )
+    composites = {}
+    st.session_state.row_images[sample_idx] = (key, images_data, messages, composites)
+    return images_data, messages, composites
+
+
+def _get_composite(
+    composites: Dict, key, images: List[Optional[Image.Image]], num_cols: int, image_width: int
+) -> Image.Image:
+    """获取一行（主图片或某个 Close View）的合成图片，在行缓存中复用"""
+    strip = composites.get(key)
+    if strip is None:
+        tile_width = composite_tile_width(num_cols, image_width, COMPOSITE_MAX_WIDTH, COMPOSITE_GAP)
+        strip = composites[key] = compose_strip(images, tile_width, COMPOSITE_GAP)
+    return strip
+
+
+def render_composite_labels(method_names: List[str], strip: Image.Image):
+    """在合成图片上方按列显示方法名称（网格间距与图片中的列间距成比例）"""
+    method_size = st.session_state.method_text_size
+    gap_percent = 100 * COMPOSITE_GAP / strip.width
+    cells = "".join(
+        f"<div style='font-size: {method_size}px; font-weight: bold; overflow: hidden; "
+        f"text-overflow: ellipsis; white-space: nowrap;'>{html.escape(name)}</div>"
+        for name in method_names
+    )
+    st.markdown(
+        f"<div style='display: grid; grid-template-columns: repeat({len(method_names)}, 1fr); "
+        f"column-gap: {gap_percent:.3f}%;'>{cells}</div>",
+        unsafe_allow_html=True,
+    )
+
+
+def _open_zoom_viewer(sample_idx: int):
+    """深度缩放按钮回调：打开查看器并显示整张图片（在运行前修改缩放控件的值）"""
+    st.session_state.zoom_sample = sample_idx
+    st.session_state.zoom_factor = 1
+    st.session_state.zoom_x = 50.0
+    st.session_state.zoom_y = 50.0
 
 
 def render_main_view(
@@ -25,118 +193,96 @@ def render_main_view(
 ):
     """
     渲染主视图，显示图片网格
+    samples 可以是筛选后的视图，start_idx 为视图中的位置
     """
     end_idx = min(start_idx + num_rows, len(samples))
     selected_samples = samples[start_idx:end_idx]
+    visible_indices = [
+        get_source_index(samples, pos) for pos in range(start_idx, end_idx)
+    ]
+
+    # 只保留当前页的行缓存
+    for sample_idx in list(st.session_state.row_images):
+        if sample_idx not in visible_indices:
+            del st.session_state.row_images[sample_idx]
+
+    # 使用过滤后的方法列表
+    visible_methods_list = filter_visible_methods(
+        methods, st.session_state.visible_methods
+    )
 
     # 收集所有样本的图片信息
     all_aspect_ratios = []
 
     for row_idx, sample in enumerate(selected_samples):
-        # 收集当前样本的所有图片信息
-        images_data = []
-        aspect_ratios = []
-        actual_sample_idx = start_idx + row_idx
-        crop_data = get_crop_data(actual_sample_idx)
-
-        # 使用过滤后的方法列表
-        visible_methods_list = filter_visible_methods(
-            methods, st.session_state.visible_methods
+        actual_sample_idx = visible_indices[row_idx]
+        crop_data = get_crop_data(st.session_state.crop_data, actual_sample_idx)
+        if st.session_state.close_view_enabled and crop_data:
+            # 内存预算释放过的裁剪图片按裁剪框重新生成
+            try:
+                restored = with_cropped_images(
+                    sample,
+                    crop_data,
+                    [m["name"] for m in visible_methods_list],
+                    base_dir,
+                    image_width,
+                )
+            except OSError as e:
+                st.error(f"恢复样本 '{sample['name']}' 的裁剪图片时出错: {e}")
+                restored = crop_data
+            if restored is not crop_data:
+                st.session_state.crop_data[actual_sample_idx] = restored
+                crop_data = restored
+
+        images_data, messages, composites = _get_row_images(
+            sample,
+            actual_sample_idx,
+            crop_data,
+            visible_methods_list,
+            base_dir,
+            image_width,
+            lang,
         )
-
-        for method in visible_methods_list:
-            method_name = method["name"]
-            method_desc = method.get("description", "")
-
-            if method_name not in sample["images"]:
-                st.warning(f"样本 '{sample['name']}' 中缺少方法 '{method_name}' 的图片")
-                continue
-
-            image_rel_path = sample["images"][method_name]
-
-            # 处理图片路径为None的情况（缺失的图片）
-            if image_rel_path is None:
-                image_path = None
-            else:
-                image_path = base_dir / image_rel_path
-
-            # 加载并处理图片（如果路径为None，会生成占位符）
-            processed_img, original_ratio, was_cropped = load_and_process_image(
-                image_path,
-                image_width,
-                st.session_state.preserve_aspect_ratio,
-                placeholder_text=lang.get("image_missing_placeholder", "Image Missing"),
+        for level, message in messages:
+            getattr(st, level)(message)
+        for data in images_data:
+            all_aspect_ratios.append(
+                (sample["name"], data["method_name"], data["original_ratio"])
             )
 
-            if processed_img is not None:
-                # 应用 mask（如果启用且存在，且图片路径不为None）
-                if (
-                    image_path is not None
-                    and st.session_state.use_mask
-                    and "mask" in sample
-                    and sample["mask"]
-                ):
-                    mask_path = base_dir / sample["mask"]
-                    if check_image_exists(base_dir, sample["mask"]):
-                        mask_img = load_mask(mask_path, processed_img.size)
-                        if mask_img is not None:
-                            processed_img = apply_mask_to_image(
-                                processed_img, mask_img, st.session_state.darken_factor
-                            )
-
-                # 如果有crop data且close view启用，在图片上绘制所有crop框（仅当图片路径不为None）
-                if (
-                    image_path is not None
-                    and st.session_state.close_view_enabled
-                    and crop_data
-                ):
-                    try:
-                        # 加载原始图片以获取正确的尺寸
-                        original_img = Image.open(image_path)
-                        original_size = original_img.size
-                        display_size = processed_img.size
-
-                        # 获取crops列表并绘制所有框
-                        crops = crop_data.get("crops", [])
-                        if crops:
-                            processed_img = draw_all_crop_boxes_on_image(
-                                processed_img, crops, original_size, display_size
-                            )
-                    except Exception as e:
-                        pass  # 如果绘制失败，使用原始图片
-
-                images_data.append(
-                    {
-                        "method_name": method_name,
-                        "description": method_desc,
-                        "image": processed_img,
-                        "original_ratio": original_ratio,
-                        "was_cropped": was_cropped,
-                        "path": image_rel_path,
-                    }
-                )
-                aspect_ratios.append((method_name, original_ratio))
-                all_aspect_ratios.append((sample["name"], method_name, original_ratio))
-
         # 并排显示图片
         if images_data:
             # 计算总列数
             num_cols = len(images_data)
-            cols = st.columns(num_cols)
+            composite = st.session_state.composite_rows
 
-            # 渲染主图片
-            for idx, (col, data) in enumerate(
-                zip(cols[: len(images_data)], images_data)
-            ):
-                with col:
-                    # 在图片上方显示方法名称（只在第一个样本显示，如果启用）
-                    if st.session_state.show_method_name and row_idx == 0:
-                        method_size = st.session_state.method_text_size
-                        st.markdown(
-                            f"<span style='font-size: {method_size}px; font-weight: bold;'>{data['method_name']}</span>",
-                            unsafe_allow_html=True,
-                        )
-                    st.image(data["image"], use_container_width=True)
+            if composite:
+                # 合成行：整行一张图片，方法名称用一个网格显示
+                strip = _get_composite(
+                    composites, "main", [data["image"] for data in images_data], num_cols, image_width
+                )
+                if st.session_state.show_method_name and row_idx == 0:
+                    render_composite_labels([data["method_name"] for data in images_data], strip)
+                with timing_item(sample["name"], "composite"), timed("st_image"):
+                    st.image(strip, use_container_width=True)
+            else:
+                cols = st.columns(num_cols)
+
+                # 渲染主图片
+                for idx, (col, data) in enumerate(
+                    zip(cols[: len(images_data)], images_data)
+                ):
+                    with col:
+                        # 在图片上方显示方法名称（只在第一个样本显示，如果启用）
+                        if st.session_state.show_method_name and row_idx == 0:
+                            method_size = st.session_state.method_text_size
+                            st.markdown(
+                                f"<span style='font-size: {method_size}px; font-weight: bold;'>{data['method_name']}</span>",
+                                unsafe_allow_html=True,
+                            )
+                        # st.image 在当前运行中编码图片（PNG/JPEG）并注册媒体文件
+                        with timing_item(sample["name"], data["method_name"]), timed("st_image"):
+                            st.image(data["image"], use_container_width=True)
 
             # Display multiple cropped close views vertically
             if st.session_state.close_view_enabled and crop_data:
@@ -180,9 +326,25 @@ def render_main_view(
                                     key=f"delete_crop_{actual_sample_idx}_{crop_id}",
                                     use_container_width=True,
                                 ):
-                                    delete_crop_from_sample(actual_sample_idx, crop_id)
+                                    delete_crop_from_sample(
+                                        st.session_state.crop_data, actual_sample_idx, crop_id
+                                    )
                                     st.rerun()
 
+                    if composite:
+                        # 合成行：各方法的裁剪图片拼成一张（列与主图片对齐）
+                        cropped_images = crop.get("cropped_images", {})
+                        strip = _get_composite(
+                            composites,
+                            ("crop", crop_id),
+                            [cropped_images.get(data["method_name"]) for data in images_data],
+                            num_cols,
+                            image_width,
+                        )
+                        with timing_item(sample["name"], "composite"), timed("st_image"):
+                            st.image(strip, use_container_width=True)
+                        continue
+
                     # Cropped images in columns (保持与主显示相同的列数)
                     crop_cols = st.columns(num_cols)
                     for col_idx, (col, data) in enumerate(
@@ -190,9 +352,10 @@ def render_main_view(
                     ):
                         with col:
                             method_name = data["method_name"]
-                            if method_name in crop["cropped_images"]:
-                                cropped_img = crop["cropped_images"][method_name]
-                                st.image(cropped_img, use_container_width=True)
+                            cropped_img = crop.get("cropped_images", {}).get(method_name)
+                            if cropped_img is not None:
+                                with timing_item(sample["name"], method_name), timed("st_image"):
+                                    st.image(cropped_img, use_container_width=True)
 
             # Add Crop button at the bottom if close view is enabled and button is set to show
             if (
@@ -203,20 +366,33 @@ def render_main_view(
                 crops = crop_data.get("crops", []) if crop_data else []
                 num_crops = len(crops)
 
-                if num_crops < MAX_CROPS_PER_SAMPLE:
-                    if st.button(
-                        lang["add_crop"],
-                        key=f"add_crop_btn_{actual_sample_idx}",
+                add_col, zoom_col = st.columns(2)
+                with add_col:
+                    if num_crops < MAX_CROPS_PER_SAMPLE:
+                        if st.button(
+                            lang["add_crop"],
+                            key=f"add_crop_btn_{actual_sample_idx}",
+                            use_container_width=True,
+                        ):
+                            st.session_state.current_cropping_sample = actual_sample_idx
+                            st.session_state.current_editing_crop_id = (
+                                None  # None means new crop
+                            )
+                            st.session_state.cropper_reference_method = None
+                            st.rerun()
+                    else:
+                        st.info(lang["max_crops_msg"].format(n=MAX_CROPS_PER_SAMPLE))
+
+                # 深度缩放：在同步视口中查看原图细节（不需要先保存裁剪框）
+                with zoom_col:
+                    st.button(
+                        lang["deep_zoom"],
+                        key=f"deep_zoom_btn_{actual_sample_idx}",
+                        help=lang["deep_zoom_help"],
+                        on_click=_open_zoom_viewer,
+                        args=(actual_sample_idx,),
                         use_container_width=True,
-                    ):
-                        st.session_state.current_cropping_sample = actual_sample_idx
-                        st.session_state.current_editing_crop_id = (
-                            None  # None means new crop
-                        )
-                        st.session_state.cropper_reference_method = None
-                        st.rerun()
-                else:
-                    st.info(lang["max_crops_msg"].format(n=MAX_CROPS_PER_SAMPLE))
+                    )
         else:
             if st.session_state.language == "zh":
                 st.error(f"样本 '{sample['name']}' 没有成功加载任何图片")
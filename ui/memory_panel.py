@@ -0,0 +1,138 @@
+import functools
+import time
+import streamlit as st
+from typing import Callable, Dict, Optional
+
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from services.export_jobs import get_export_registry
+from services.image_prep import get_image_cache
+from services.session_memory import get_session_memory_registry
+
+# 管理视图中每个 session 列出的占用最多的键数
+TOP_KEYS = 3
+
+
+def _session_id() -> Optional[str]:
+    """当前 session 的 ID（不在 streamlit 中运行时返回 None）"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def _format_mb(nbytes: int) -> str:
+    return f"{nbytes / (1024 * 1024):.1f} MB"
+
+
+def begin_session_run():
+    """运行开始时调用：运行期间其他 session 不会释放本 session 的数据"""
+    session_id = _session_id()
+    if session_id is not None:
+        get_session_memory_registry().begin(session_id)
+
+
+def track_fragment_run(func: Callable) -> Callable:
+    """
+    fragment 函数的装饰器（放在 @st.fragment 下面）
+    只重新运行 fragment 时不经过整页运行的 begin_session_run / track_session_memory，
+    由此标记 session 运行中并刷新最近活动时间：运行期间其他 session 不会替换本 session 的
+    crop 数据，只在 fragment 中操作的用户也不会被当作空闲
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        ctx = get_script_run_ctx()
+        if ctx is None or not ctx.fragment_ids_this_run:
+            # 整页运行中（或不在 streamlit 中）：由整页运行负责标记
+            return func(*args, **kwargs)
+        registry = get_session_memory_registry()
+        registry.begin(ctx.session_id)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            registry.end(ctx.session_id)
+
+    return wrapper
+
+
+def track_session_memory():
+    """
+    运行结束时调用：统计本 session 的内存并执行预算，清理已断开的 session
+    当前页为行缓存中的样本（行缓存只保留当前页），这些样本的裁剪图片最后释放
+    """
+    session_id = _session_id()
+    if session_id is None:
+        return
+    registry = get_session_memory_registry()
+    state = st.session_state.to_dict()
+    registry.update(session_id, state, page=list(state.get("row_images", {})))
+    registry.enforce_global_budget(current_session_id=session_id)
+    if Runtime.exists():
+        registry.prune(Runtime.instance().is_active_session)
+
+
+def render_memory_admin(lang: Dict):
+    """在侧边栏渲染内存管理视图（各 session 占用、进程内缓存）"""
+    registry = get_session_memory_registry()
+    sessions = registry.snapshot()
+    session_id = _session_id()
+    current = next((row for row in sessions if row["session_id"] == session_id), None)
+    total = sum(row["bytes"] for row in sessions)
+    image_cache = get_image_cache()
+    exports = get_export_registry().stats()
+
+    with st.sidebar:
+        with st.expander(lang["memory_admin_title"], expanded=False):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric(
+                    lang["memory_session_label"],
+                    _format_mb(current["bytes"]) if current else "-",
+                    help=lang["memory_budget_help"].format(
+                        budget=_format_mb(registry.session_budget)
+                    ),
+                )
+                st.metric(
+                    lang["memory_image_cache_label"],
+                    _format_mb(image_cache.nbytes),
+                    help=lang["memory_budget_help"].format(
+                        budget=_format_mb(image_cache.max_bytes)
+                    ),
+                )
+            with col2:
+                st.metric(
+                    lang["memory_all_sessions_label"].format(n=len(sessions)),
+                    _format_mb(total),
+                    help=lang["memory_budget_help"].format(
+                        budget=_format_mb(registry.global_budget)
+                    ),
+                )
+                st.metric(
+                    lang["memory_export_label"].format(n=exports["jobs"]),
+                    _format_mb(exports["result_bytes"]),
+                )
+
+            if current and current["bytes"] > registry.session_budget:
+                st.warning(lang["memory_over_budget"])
+
+            now = time.time()
+            st.dataframe(
+                [
+                    {
+                        lang["memory_col_session"]: row["session_id"][:8]
+                        + (" *" if row["session_id"] == session_id else ""),
+                        lang["memory_col_size"]: _format_mb(row["bytes"]),
+                        lang["memory_col_top_keys"]: ", ".join(
+                            f"{key} ({_format_mb(nbytes)})"
+                            for key, nbytes in sorted(
+                                row["breakdown"].items(), key=lambda item: -item[1]
+                            )[:TOP_KEYS]
+                        ),
+                        lang["memory_col_idle"]: int(now - row["last_seen"]),
+                        lang["memory_col_evictions"]: row["evictions"],
+                    }
+                    for row in sessions
+                ],
+                hide_index=True,
+                use_container_width=True,
+            )
@@ -0,0 +1,204 @@
+import threading
+import time
+import streamlit as st
+from typing import Dict, Optional
+
+from services.export_jobs import JOB_RUNNING, get_export_registry
+from utils.profiling import (
+    is_profiler_busy,
+    is_project_group,
+    start_profiler,
+    stop_profiler,
+    summarize_profile,
+)
+
+# 列出的函数数
+TOP_FUNCTIONS = 25
+
+# 剖析对象：下一次运行、下一次导出任务
+PROFILE_TARGETS = ("rerun", "export")
+
+# 正在进行的运行剖析（脚本线程）
+_local = threading.local()
+
+
+def _arm_profile():
+    """开始剖析按钮回调：记录待剖析的对象"""
+    st.session_state.profile_pending = st.session_state.profile_target
+    st.session_state.profile_busy = False
+
+
+def _clear_profile():
+    st.session_state.profile_result = None
+
+
+def _make_result(target: str, label: str, started: float, data: bytes) -> Dict:
+    return {
+        "target": target,
+        "label": label,
+        "captured": started,
+        "data": data,
+        "summary": summarize_profile(data, TOP_FUNCTIONS),
+    }
+
+
+def start_rerun_profile():
+    """
+    已请求剖析下一次运行时，在运行开始时启动剖析
+    点击开始剖析按钮引起的那次运行不剖析，剖析的是之后的操作
+    """
+    if st.session_state.profile_pending != "rerun" or st.session_state.get("profile_capture_btn"):
+        return
+    st.session_state.profile_pending = None
+    profiler = start_profiler()
+    if profiler is None:
+        # 其他 session 或导出任务正在剖析（进程内同一时刻只能有一个剖析器）
+        st.session_state.profile_busy = True
+        return
+    _local.run = (profiler, time.time())
+
+
+def stop_rerun_profile():
+    """结束本次运行的剖析（没有进行中的剖析时不做任何事），结果保存在 session 中"""
+    run = getattr(_local, "run", None)
+    if run is None:
+        return
+    _local.run = None
+    profiler, started = run
+    st.session_state.profile_result = _make_result("rerun", "", started, stop_profiler(profiler))
+
+
+def _collect_export_profile():
+    """被剖析的导出任务结束后，把结果移到 session 中"""
+    fingerprint = st.session_state.profile_export_fingerprint
+    if fingerprint is None:
+        return
+    job = get_export_registry().get(fingerprint)
+    if job is None:
+        st.session_state.profile_export_fingerprint = None
+        return
+    if job["status"] == JOB_RUNNING:
+        return
+    st.session_state.profile_export_fingerprint = None
+    if job["profile"] is None:
+        st.session_state.profile_busy = job["profile_busy"]
+        return
+    st.session_state.profile_result = _make_result(
+        "export", job["filename"], job["started"], job["profile"]
+    )
+
+
+def _render_result(result: Dict, lang: Dict):
+    summary = result["summary"]
+    target = lang[f"profile_target_{result['target']}"]
+    if result["label"]:
+        target = f"{target}: {result['label']}"
+    st.caption(
+        lang["profile_result_caption"].format(
+            target=target,
+            time=time.strftime("%H:%M:%S", time.localtime(result["captured"])),
+            ms=summary["total_s"] * 1000,
+        )
+    )
+
+    st.caption(lang["profile_groups_caption"])
+    st.dataframe(
+        [
+            {
+                lang["profile_col_group"]: row["group"],
+                lang["profile_col_self_ms"]: round(row["self_s"] * 1000, 1),
+                "%": round(100 * row["share"], 1),
+            }
+            for row in summary["groups"]
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+    project_modules = [
+        row for row in summary["modules"] if is_project_group(row["module"].split(".")[0])
+    ]
+    if project_modules:
+        st.caption(lang["profile_modules_caption"])
+        st.dataframe(
+            [
+                {
+                    lang["profile_col_module"]: row["module"],
+                    lang["profile_col_self_ms"]: round(row["self_s"] * 1000, 1),
+                    "%": round(100 * row["share"], 1),
+                }
+                for row in project_modules
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+
+    st.caption(lang["profile_functions_caption"].format(n=TOP_FUNCTIONS))
+    st.dataframe(
+        [
+            {
+                lang["profile_col_function"]: row["function"],
+                lang["profile_col_group"]: row["group"],
+                lang["profile_col_calls"]: row["calls"],
+                lang["profile_col_self_ms"]: round(row["self_s"] * 1000, 1),
+                lang["profile_col_cumulative_ms"]: round(row["cumulative_s"] * 1000, 1),
+            }
+            for row in summary["functions"]
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+    stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(result["captured"]))
+    st.download_button(
+        lang["profile_download"],
+        data=result["data"],
+        file_name=f"profile_{result['target']}_{stamp}.prof",
+        mime="application/octet-stream",
+        help=lang["profile_download_help"],
+        use_container_width=True,
+        key="profile_download_btn",
+    )
+    st.button(
+        lang["profile_clear"],
+        on_click=_clear_profile,
+        use_container_width=True,
+        key="profile_clear_btn",
+    )
+
+
+def render_profiler_panel(lang: Dict):
+    """
+    在侧边栏末尾渲染剖析面板：结束本次运行的剖析，选择并启动下一次剖析，
+    显示最近一次剖析结果（按分组 / 项目模块汇总、最耗时的函数）并提供下载
+    """
+    stop_rerun_profile()
+    _collect_export_profile()
+    pending: Optional[str] = st.session_state.profile_pending
+    result = st.session_state.profile_result
+
+    with st.sidebar:
+        with st.expander(lang["profile_title"], expanded=pending is not None or result is not None):
+            st.selectbox(
+                lang["profile_target_label"],
+                options=PROFILE_TARGETS,
+                format_func=lambda target: lang[f"profile_target_{target}"],
+                key="profile_target",
+                help=lang["profile_help"],
+            )
+            st.button(
+                lang["profile_capture"],
+                on_click=_arm_profile,
+                use_container_width=True,
+                key="profile_capture_btn",
+            )
+            if st.session_state.profile_busy:
+                st.warning(lang["profile_busy"])
+            elif pending is not None and is_profiler_busy():
+                st.caption(lang["profile_busy_now"])
+            if pending is not None:
+                st.info(lang[f"profile_pending_{pending}"])
+            if st.session_state.profile_export_fingerprint is not None:
+                st.caption(lang["profile_export_running"])
+            if result is not None:
+                _render_result(result, lang)
@@ -1,33 +1,151 @@
 import streamlit as st
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence
 
 from config.languages import LANGUAGES
+from config.constants import (
+    SAMPLE_SEARCH_MAX_RESULTS,
+    PDF_IMAGE_FORMATS,
+    PDF_DPI_OPTIONS,
+)
+from services.config_cache import get_sample_name_index, get_sample_filter_index
+from utils.sample_filter import FilteredSamples
+
+# 筛选控件的默认值（同时也是 session_state 中的键）
+FILTER_DEFAULTS = {
+    "filter_keywords": "",
+    "filter_name_pattern": "",
+    "filter_has_mask": False,
+    "filter_has_missing": False,
+}
+
+
+def _reset_selection():
+    """筛选条件变化时回到第一个样本"""
+    st.session_state.selected_sample_idx = 0
+
+
+def _clear_sample_filter():
+    """清除所有筛选条件"""
+    for key, value in FILTER_DEFAULTS.items():
+        st.session_state[key] = value
+    _reset_selection()
+
+
+def jump_to_sample(source_idx: int, position: Optional[int]):
+    """
+    跳转到指定样本（按钮回调）
+    参数:
+        source_idx: 原始样本索引
+        position: 在当前筛选结果中的位置，不在结果中时为 None（此时清除筛选）
+    """
+    if position is None:
+        _clear_sample_filter()
+        position = source_idx
+    st.session_state.selected_sample_idx = position
+
+
+def get_view_position(samples: Sequence, source_idx: int) -> Optional[int]:
+    """原始样本索引在当前视图中的位置"""
+    if isinstance(samples, FilteredSamples):
+        return samples.position_of(source_idx)
+    return source_idx
+
+
+def _render_sample_filter(
+    lang: Dict, samples: List[Dict], methods: List[Dict], config_digest: str
+) -> Sequence:
+    """
+    渲染样本筛选控件，返回筛选后的样本视图
+    筛选使用按配置构建一次的倒排索引，翻页只在筛选结果中进行
+    """
+    with st.expander(lang["filter_title"], expanded=False):
+        keywords = st.text_input(
+            lang["filter_keywords_label"],
+            placeholder=lang["filter_keywords_placeholder"],
+            key="filter_keywords",
+            on_change=_reset_selection,
+        )
+        name_pattern = st.text_input(
+            lang["filter_name_label"],
+            placeholder=lang["filter_name_placeholder"],
+            key="filter_name_pattern",
+            on_change=_reset_selection,
+        )
+        require_mask = st.checkbox(
+            lang["filter_has_mask"], key="filter_has_mask", on_change=_reset_selection
+        )
+        require_missing = st.checkbox(
+            lang["filter_has_missing"],
+            key="filter_has_missing",
+            on_change=_reset_selection,
+        )
+
+        if not (
+            keywords.strip() or name_pattern.strip() or require_mask or require_missing
+        ):
+            return samples
+
+        filter_index = get_sample_filter_index(config_digest, samples, methods)
+        indices = filter_index.filter(
+            keywords=keywords,
+            name_pattern=name_pattern,
+            require_mask=require_mask,
+            require_missing=require_missing,
+        )
+        st.caption(
+            lang["filter_result_count"].format(n=len(indices), total=len(samples))
+        )
+        st.button(
+            lang["filter_clear"],
+            on_click=_clear_sample_filter,
+            use_container_width=True,
+            key="filter_clear_btn",
+        )
+        return FilteredSamples(samples, indices)
+
+
+def _on_sample_number_change():
+    """序号输入框变化时同步起始样本（输入框从 1 开始计数）"""
+    st.session_state.selected_sample_idx = st.session_state.sample_number_input - 1
 
 
 def render_sidebar(
-    lang: Dict, samples: List[Dict], methods: List[Dict], has_masks: bool
+    lang: Dict,
+    samples: List[Dict],
+    methods: List[Dict],
+    has_masks: bool,
+    config_digest: str,
 ) -> Dict:
     """
     渲染侧边栏并返回用户选择的配置
 
     返回:
-        包含各项配置的字典
+        包含各项配置的字典，其中 "samples" 为筛选后的样本视图
     """
     with st.sidebar:
+        # 样本筛选（分页基于筛选后的视图）
+        all_samples = samples
+        samples = _render_sample_filter(lang, all_samples, methods, config_digest)
+        if len(samples) == 0:
+            st.warning(lang["filter_no_results"])
+
         # 显示行数控制
         num_rows = st.number_input(
             lang["num_rows_label"],
             min_value=1,
-            max_value=len(samples),
+            max_value=max(1, len(samples)),
             value=1,
             step=1,
             help=lang["num_rows_help"],
         )
 
-        sample_names = [s["name"] for s in samples]
         max_start_idx = max(0, len(samples) - num_rows)
 
+        # 配置切换后起始样本可能越界
+        if st.session_state.selected_sample_idx >= max(1, len(samples)):
+            st.session_state.selected_sample_idx = 0
+
         # 回调函数
         def go_prev():
             st.session_state.selected_sample_idx = max(
@@ -59,20 +177,45 @@ def render_sidebar(
                 on_click=go_next,
             )
 
-        # 样本选择下拉框
-        st.selectbox(
-            lang["starting_sample"],
-            range(len(samples)),
-            index=st.session_state.selected_sample_idx,
-            format_func=lambda i: sample_names[i],
-            key="selected_sample_idx",
+        # 按序号跳转（从 1 开始）
+        st.session_state.sample_number_input = st.session_state.selected_sample_idx + 1
+        st.number_input(
+            lang["starting_sample_index"],
+            min_value=1,
+            max_value=max(1, len(samples)),
+            step=1,
+            key="sample_number_input",
+            on_change=_on_sample_number_change,
+        )
+
+        # 按名称搜索：使用预先构建的索引，只把匹配结果发送到前端
+        query = st.text_input(
+            lang["sample_search_label"],
+            placeholder=lang["sample_search_placeholder"],
+            key="sample_search_query",
         )
+        if query.strip():
+            # 在全部样本中搜索；选中筛选结果之外的样本时会清除筛选
+            name_index = get_sample_name_index(config_digest, all_samples)
+            matches = name_index.search(query, limit=SAMPLE_SEARCH_MAX_RESULTS)
+            if not matches:
+                st.caption(lang["sample_search_no_results"])
+            for match_idx in matches:
+                st.button(
+                    f"{match_idx + 1}. {name_index.name(match_idx)}",
+                    key=f"sample_search_hit_{match_idx}",
+                    on_click=jump_to_sample,
+                    args=(match_idx, get_view_position(samples, match_idx)),
+                    use_container_width=True,
+                )
 
         # 显示当前范围
         end_idx = min(st.session_state.selected_sample_idx + num_rows, len(samples))
-        if num_rows == 1:
+        if len(samples) == 0:
+            pass
+        elif num_rows == 1:
             st.caption(
-                f"{lang['current_label']}: {sample_names[st.session_state.selected_sample_idx]} ({st.session_state.selected_sample_idx + 1}/{len(samples)})"
+                f"{lang['current_label']}: {samples[st.session_state.selected_sample_idx]['name']} ({st.session_state.selected_sample_idx + 1}/{len(samples)})"
             )
         else:
             st.caption(
@@ -137,6 +280,12 @@ def render_sidebar(
                 key="preserve_aspect_ratio_checkbox",
             )
 
+            st.checkbox(
+                lang["composite_rows"],
+                help=lang["composite_rows_help"],
+                key="composite_rows",
+            )
+
             st.divider()
             st.markdown(f"**{lang['method_display']}**")
 
@@ -203,6 +352,26 @@ def render_sidebar(
                         key="darken_factor_slider",
                     )
 
+            st.divider()
+            st.markdown(f"**{lang['pdf_export_options']}**")
+
+            st.session_state.pdf_image_format = st.selectbox(
+                lang["pdf_image_format_label"],
+                PDF_IMAGE_FORMATS,
+                index=PDF_IMAGE_FORMATS.index(st.session_state.pdf_image_format),
+                format_func=lambda x: lang[f"pdf_image_format_{x}"],
+                help=lang["pdf_image_format_help"],
+                key="pdf_image_format_select",
+            )
+
+            st.session_state.pdf_image_dpi = st.select_slider(
+                lang["pdf_image_dpi_label"],
+                options=PDF_DPI_OPTIONS,
+                value=st.session_state.pdf_image_dpi,
+                help=lang["pdf_image_dpi_help"],
+                key="pdf_image_dpi_slider",
+            )
+
         st.markdown("---")
 
         # 使用说明 expander - 放在最后
@@ -212,7 +381,7 @@ def render_sidebar(
             **JSON 配置文件模式：**
             1. 上传 JSON 配置文件
             2. 选择显示行数（多样本对比）
-            3. 使用翻页按钮或下拉框切换样本
+            3. 使用翻页按钮、序号或名称搜索切换样本
             4. 启用 Close View 查看图片细节
             
             **文件夹列表模式：**
@@ -220,13 +389,18 @@ def render_sidebar(
             2. 每个文件夹代表一个方法
             3. 系统自动扫描并匹配图片
             4. 查看加载摘要了解统计信息
+            
+            **JSONL/CSV 清单模式：**
+            1. 输入服务器上的清单文件路径
+            2. 每行一个样本，方法来自表头或附属文件
+            3. 只读取当前页需要的行，大型清单也能快速打开
                 """)
             else:
                 st.caption("""
             **JSON Configuration Mode:**
             1. Upload JSON configuration file
             2. Select number of rows (multi-sample comparison)
-            3. Use navigation buttons or dropdown to switch samples
+            3. Use navigation buttons, index or name search to switch samples
             4. Enable Close View to inspect image details
             
             **Folder List Mode:**
@@ -234,8 +408,14 @@ def render_sidebar(
             2. Each folder represents a method
             3. System automatically scans and matches images
             4. Check loading summary for statistics
+            
+            **JSONL/CSV Manifest Mode:**
+            1. Enter the path of a manifest file on the server
+            2. One sample per line; methods come from the header or a side file
+            3. Only the lines for the current page are read, so large manifests open quickly
                 """)
 
     return {
         "num_rows": num_rows,
+        "samples": samples,
     }
@@ -0,0 +1,107 @@
+import streamlit as st
+from typing import Dict, Optional
+
+from services.export_jobs import get_export_registry
+from utils.timing import TimingCollector, start_timings, stop_timings
+
+# 按耗时列出的 (样本, 方法) 数
+TOP_ITEMS = 20
+
+# 计数器前缀 -> 显示命中率的缓存
+CACHE_COUNTERS = ("image_cache", "row_cache")
+
+
+def start_rerun_timings():
+    """开启计时面板时，在运行开始时启动本线程的计时"""
+    if st.session_state.timing_enabled:
+        start_timings()
+
+
+def _render_stage_table(collector: TimingCollector, lang: Dict):
+    total = collector.elapsed or 0.0
+    st.dataframe(
+        [
+            {
+                lang["timing_col_stage"]: stage,
+                lang["timing_col_calls"]: calls,
+                lang["timing_col_ms"]: round(seconds * 1000, 1),
+                "%": round(100 * seconds / total, 1) if total else 0.0,
+            }
+            for stage, (calls, seconds) in sorted(
+                collector.stages.items(), key=lambda item: -item[1][1]
+            )
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
+def _render_cache_rates(collector: TimingCollector, lang: Dict):
+    cols = st.columns(len(CACHE_COUNTERS))
+    for col, name in zip(cols, CACHE_COUNTERS):
+        hits = collector.counters.get(f"{name}_hit", 0)
+        misses = collector.counters.get(f"{name}_miss", 0)
+        with col:
+            st.metric(
+                lang[f"timing_{name}_label"],
+                f"{100 * hits / (hits + misses):.0f}%" if hits + misses else "-",
+                help=lang["timing_hits_help"].format(hits=hits, misses=misses),
+            )
+
+
+def _render_item_table(collector: TimingCollector, lang: Dict):
+    if not collector.items:
+        return
+    stages = sorted({stage for item in collector.items.values() for stage in item})
+    rows = sorted(
+        collector.items.items(), key=lambda item: -sum(item[1].values())
+    )[:TOP_ITEMS]
+    st.caption(lang["timing_items_caption"].format(n=TOP_ITEMS))
+    st.dataframe(
+        [
+            {
+                lang["timing_col_sample"]: sample_name,
+                lang["timing_col_method"]: method_name,
+                **{stage: round(stage_times.get(stage, 0.0) * 1000, 1) for stage in stages},
+            }
+            for (sample_name, method_name), stage_times in rows
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
+def _last_export_timings() -> Optional[TimingCollector]:
+    fingerprint = st.session_state.timing_export_fingerprint
+    if fingerprint is None:
+        return None
+    job = get_export_registry().get(fingerprint)
+    if job is None or job["timings"] is None or job["timings"].elapsed is None:
+        return None
+    return job["timings"]
+
+
+def render_timing_panel(lang: Dict):
+    """
+    在侧边栏末尾渲染计时面板：结束本次运行的计时，显示各阶段和各 (样本, 方法) 的耗时、
+    缓存命中率，以及最近一次 PDF 导出的各阶段耗时
+    阶段可以嵌套（如 prepare_image 包含 decode_resize），百分比相对整次运行
+    """
+    collector = stop_timings()
+    with st.sidebar:
+        with st.expander(lang["timing_title"], expanded=st.session_state.timing_enabled):
+            st.checkbox(lang["timing_enable"], key="timing_enabled", help=lang["timing_help"])
+            if collector is None:
+                return
+
+            st.metric(lang["timing_rerun_label"], f"{collector.elapsed * 1000:.0f} ms")
+            _render_cache_rates(collector, lang)
+            _render_stage_table(collector, lang)
+            _render_item_table(collector, lang)
+
+            export_timings = _last_export_timings()
+            if export_timings is not None:
+                st.caption(
+                    lang["timing_export_caption"].format(ms=export_timings.elapsed * 1000)
+                )
+                _render_stage_table(export_timings, lang)
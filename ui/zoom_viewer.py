@@ -0,0 +1,167 @@
+import streamlit as st
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from config.constants import COMPOSITE_GAP, COMPOSITE_MAX_WIDTH, ZOOM_MAX_PIXEL_SCALE
+from utils.image_processing import compose_strip, composite_tile_width, filter_visible_methods
+from utils.timing import timed, timing_item
+from services.tile_pyramid import get_pyramid, render_viewport
+from ui.main_view import render_composite_labels
+from ui.memory_panel import track_fragment_run
+
+
+def zoom_factors(image_width: int, pane_width: int) -> List[int]:
+    """可选的缩放倍数（2 的幂），最大放大到原图 1 像素显示为 ZOOM_MAX_PIXEL_SCALE 个屏幕像素"""
+    factors = [1]
+    while image_width * ZOOM_MAX_PIXEL_SCALE / (factors[-1] * 2) >= pane_width:
+        factors.append(factors[-1] * 2)
+    return factors
+
+
+def _clamp_center(percent: float, zoom: int) -> float:
+    """视口中心（百分比）限制在视口不超出图片的范围内"""
+    half = 50 / zoom
+    return min(max(percent, half), 100 - half)
+
+
+def _view_region(zoom: int) -> Tuple[float, float, float, float]:
+    """当前视口的归一化区域 (left, top, right, bottom)"""
+    half = 0.5 / zoom
+    center_x = _clamp_center(st.session_state.zoom_x, zoom) / 100
+    center_y = _clamp_center(st.session_state.zoom_y, zoom) / 100
+    return center_x - half, center_y - half, center_x + half, center_y + half
+
+
+def _zoom_step(factors: List[int], step: int):
+    """放大 / 缩小按钮回调"""
+    idx = factors.index(st.session_state.zoom_factor) + step
+    st.session_state.zoom_factor = factors[min(max(idx, 0), len(factors) - 1)]
+
+
+def _pan(dx: int, dy: int):
+    """平移按钮回调：移动半个视口"""
+    zoom = st.session_state.zoom_factor
+    step = 50 / zoom
+    st.session_state.zoom_x = _clamp_center(_clamp_center(st.session_state.zoom_x, zoom) + dx * step, zoom)
+    st.session_state.zoom_y = _clamp_center(_clamp_center(st.session_state.zoom_y, zoom) + dy * step, zoom)
+
+
+def _reset_view():
+    """缩放和位置恢复为整张图片"""
+    st.session_state.zoom_factor = 1
+    st.session_state.zoom_x = 50.0
+    st.session_state.zoom_y = 50.0
+
+
+@st.fragment
+@track_fragment_run
+def render_zoom_viewer(
+    samples: List[Dict],
+    methods: List[Dict],
+    base_dir: Path,
+    image_width: int,
+    lang: Dict,
+):
+    """
+    渲染同步深度缩放查看器
+
+    当 st.session_state.zoom_sample 不为 None 时调用
+    所有方法显示原图的同一归一化区域；每个视口从该图片的瓦片金字塔读取
+    所需分辨率的瓦片，整行拼成一张图片发送。查看器是独立的 fragment：
+    缩放和平移只重新运行查看器，关闭时整页重新运行
+    """
+    sample = samples[st.session_state.zoom_sample]
+    st.markdown(f"### {lang['zoom_title'].format(name=sample['name'])}")
+
+    # 各方法的金字塔（只读取图片头；缺失的图片留空）
+    panes = []
+    for method in filter_visible_methods(methods, st.session_state.visible_methods):
+        method_name = method["name"]
+        if method_name not in sample["images"]:
+            continue
+        image_rel_path = sample["images"][method_name]
+        pyramid = None
+        if image_rel_path is not None:
+            try:
+                pyramid = get_pyramid(base_dir / image_rel_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                st.error(lang["zoom_image_error"].format(path=image_rel_path, error=e))
+        panes.append((method_name, pyramid))
+
+    available = [pyramid for _, pyramid in panes if pyramid is not None]
+    if not available:
+        st.warning(lang["zoom_no_images"])
+    else:
+        pane_width = composite_tile_width(len(panes), image_width, COMPOSITE_MAX_WIDTH, COMPOSITE_GAP)
+        # 缩放倍数按最大的图片计算，分辨率不同的方法按相同的相对区域同步
+        reference = max(available, key=lambda pyramid: pyramid.size[0] * pyramid.size[1])
+        factors = zoom_factors(reference.size[0], pane_width)
+        if st.session_state.zoom_factor not in factors:
+            st.session_state.zoom_factor = max(f for f in factors if f <= st.session_state.zoom_factor)
+        zoom = st.session_state.zoom_factor
+
+        control_cols = st.columns([1, 1, 1, 1, 1, 1, 2])
+        with control_cols[0]:
+            st.button("➖", on_click=_zoom_step, args=(factors, -1), help=lang["zoom_out_help"],
+                      disabled=zoom == factors[0], use_container_width=True, key="zoom_out_btn")
+        with control_cols[1]:
+            st.button("➕", on_click=_zoom_step, args=(factors, 1), help=lang["zoom_in_help"],
+                      disabled=zoom == factors[-1], use_container_width=True, key="zoom_in_btn")
+        for col, (label, dx, dy) in zip(
+            control_cols[2:6],
+            [("⬅️", -1, 0), ("⬆️", 0, -1), ("⬇️", 0, 1), ("➡️", 1, 0)],
+        ):
+            with col:
+                st.button(label, on_click=_pan, args=(dx, dy), help=lang["zoom_pan_help"],
+                          disabled=zoom == 1, use_container_width=True, key=f"zoom_pan_{dx}_{dy}")
+        with control_cols[6]:
+            st.button(lang["zoom_reset"], on_click=_reset_view, use_container_width=True,
+                      key="zoom_reset_btn")
+
+        slider_cols = st.columns(3)
+        with slider_cols[0]:
+            st.select_slider(lang["zoom_factor_label"], options=factors,
+                             format_func=lambda f: f"{f}×", key="zoom_factor")
+        with slider_cols[1]:
+            st.slider(lang["zoom_x_label"], 0.0, 100.0, step=0.5, disabled=zoom == 1, key="zoom_x")
+        with slider_cols[2]:
+            st.slider(lang["zoom_y_label"], 0.0, 100.0, step=0.5, disabled=zoom == 1, key="zoom_y")
+
+        region = _view_region(zoom)
+        viewports = []
+        for method_name, pyramid in panes:
+            if pyramid is None:
+                viewports.append(None)
+                continue
+            with timing_item(sample["name"], method_name):
+                try:
+                    viewport, _ = render_viewport(pyramid, region, pane_width)
+                except OSError as e:
+                    st.error(lang["zoom_image_error"].format(path=pyramid.path, error=e))
+                    viewport = None
+            viewports.append(viewport)
+
+        strip = compose_strip(viewports, pane_width, COMPOSITE_GAP)
+        if st.session_state.show_method_name:
+            render_composite_labels([method_name for method_name, _ in panes], strip)
+        with timing_item(sample["name"], "deep_zoom"), timed("st_image"):
+            st.image(strip, use_container_width=True)
+
+        full_width, full_height = reference.size
+        st.caption(
+            lang["zoom_caption"].format(
+                zoom=zoom,
+                width=round((region[2] - region[0]) * full_width),
+                height=round((region[3] - region[1]) * full_height),
+                full_width=full_width,
+                full_height=full_height,
+            )
+        )
+
+    if st.button(lang["zoom_close"], use_container_width=True, key="zoom_close_btn"):
+        st.session_state.zoom_sample = None
+        st.rerun()
+
+    st.divider()
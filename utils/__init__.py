@@ -1,29 +1,62 @@
-from .json_loader import load_json_config
-from .image_processing import (
-    get_aspect_ratio,
-    find_closest_square_crop,
-    load_and_process_image,
-    check_image_exists,
-    check_aspect_ratio_consistency,
-    apply_crop_to_image,
-    draw_crop_box_on_image,
-    draw_all_crop_boxes_on_image,
-    filter_visible_methods,
-)
-from .mask import check_masks_available, load_mask, apply_mask_to_image
-
-__all__ = [
-    'load_json_config',
-    'get_aspect_ratio',
-    'find_closest_square_crop',
-    'load_and_process_image',
-    'check_image_exists',
-    'check_aspect_ratio_consistency',
-    'apply_crop_to_image',
-    'draw_crop_box_on_image',
-    'draw_all_crop_boxes_on_image',
-    'filter_visible_methods',
-    'check_masks_available',
-    'load_mask',
-    'apply_mask_to_image',
-]
+"""
+工具模块
+
+子模块按需导入（PEP 562）：只用到图片处理的场景不会加载 NumPy 等依赖
+"""
+
+import importlib
+
+# 导出名称 -> 所在子模块
+_EXPORTS = {
+    'parse_json_config': 'json_loader',
+    'get_aspect_ratio': 'image_processing',
+    'find_closest_square_crop': 'image_processing',
+    'load_and_process_image': 'image_processing',
+    'process_loaded_image': 'image_processing',
+    'check_image_exists': 'image_processing',
+    'check_aspect_ratio_consistency': 'image_processing',
+    'apply_crop_to_image': 'image_processing',
+    'crop_sample_images': 'image_processing',
+    'draw_crop_box_on_image': 'image_processing',
+    'draw_all_crop_boxes_on_image': 'image_processing',
+    'filter_visible_methods': 'image_processing',
+    'check_masks_available': 'mask',
+    'load_mask': 'mask',
+    'apply_mask_to_image': 'mask',
+    'SampleStore': 'sample_store',
+    'SampleNameIndex': 'sample_index',
+    'SampleFilterIndex': 'sample_filter',
+    'FilteredSamples': 'sample_filter',
+    'get_source_index': 'sample_filter',
+    'load_config_sidecar': 'config_sidecar',
+    'write_config_sidecar': 'config_sidecar',
+    'TimingCollector': 'timing',
+    'collect_timings': 'timing',
+    'start_timings': 'timing',
+    'stop_timings': 'timing',
+    'timed': 'timing',
+    'timed_stage': 'timing',
+    'timing_item': 'timing',
+    'MetricsRegistry': 'metrics',
+    'get_metrics_registry': 'metrics',
+    'record_file_read': 'metrics',
+    'start_profiler': 'profiling',
+    'stop_profiler': 'profiling',
+    'is_profiler_busy': 'profiling',
+    'summarize_profile': 'profiling',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module_name}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,142 @@
+"""
+编译后的二进制配置缓存（sidecar）
+
+首次加载配置后，将已验证的配置（解析后的 base_dir、methods、列式样本数据）
+写入版本化的二进制文件；再次打开相同内容的配置时，通过 mmap 直接映射列数据，
+跳过 JSON 解析、验证和路径解析。文件系统相关的检查（如 mask 是否存在）不缓存，
+由调用方每次加载后重新检查。
+
+文件格式（前导部分为小端序，列数据为本机字节序，见头部 byteorder 字段）:
+    MAGIC(4) | VERSION(uint32) | 头部长度(uint64) | 头部 JSON | 8 字节对齐的各列数据
+头部 JSON 中的 sections 记录每一列的 [偏移, 字节数, typecode]。
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Dict, Optional
+
+from utils.sample_store import SampleStore
+from utils.timing import timed_stage
+
+
+SIDECAR_MAGIC = b"IVCF"
+SIDECAR_VERSION = 1
+SIDECAR_SUFFIX = ".ivc"
+
+_PREAMBLE = struct.Struct("<4sIQ")
+_ALIGNMENT = 8
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def get_sidecar_path(cache_dir: Path, digest: str) -> Path:
+    """根据配置摘要得到 sidecar 路径（摘要中的 ':' 替换为 '_'）"""
+    return cache_dir / (digest.replace(":", "_") + SIDECAR_SUFFIX)
+
+
+def write_config_sidecar(path: Path, digest: str, config: Dict):
+    """
+    将配置写入 sidecar 文件（先写临时文件再原子替换）
+    参数:
+        path: sidecar 路径
+        digest: 源配置的摘要
+        config: 已验证的配置，config["samples"] 必须是 SampleStore
+    """
+    store_meta, columns = config["samples"].to_columns()
+
+    sections = {}
+    payloads = []
+    offset = 0
+    for name, column in columns.items():
+        if isinstance(column, array):
+            typecode = column.typecode
+            data = column.tobytes()
+        elif isinstance(column, memoryview):
+            typecode = column.format
+            data = column.tobytes()
+        else:
+            typecode = "B"
+            data = bytes(column)
+        sections[name] = [offset, len(data), typecode]
+        payloads.append(data)
+        offset = _align(offset + len(data))
+
+    header = {
+        "digest": digest,
+        "byteorder": sys.byteorder,
+        "base_dir": config["base_dir"],
+        "methods": config["methods"],
+        "store": store_meta,
+        "sections": sections,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = _align(_PREAMBLE.size + len(header_bytes))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREAMBLE.pack(SIDECAR_MAGIC, SIDECAR_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            f.write(b"\0" * (data_start - _PREAMBLE.size - len(header_bytes)))
+            position = 0
+            for (name, (section_offset, length, _)), data in zip(
+                sections.items(), payloads
+            ):
+                f.write(b"\0" * (section_offset - position))
+                f.write(data)
+                position = section_offset + length
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+@timed_stage("load_config_sidecar")
+def load_config_sidecar(path: Path, digest: str) -> Optional[Dict]:
+    """
+    通过 mmap 加载 sidecar
+    文件不存在、版本不符、摘要不匹配或已损坏时返回 None（调用方回退到正常解析）
+    返回的配置不含 has_masks，由调用方重新检查
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, version, header_len = _PREAMBLE.unpack_from(mapped, 0)
+        if magic != SIDECAR_MAGIC or version != SIDECAR_VERSION:
+            return None
+        header = json.loads(mapped[_PREAMBLE.size : _PREAMBLE.size + header_len])
+        if header["digest"] != digest or header["byteorder"] != sys.byteorder:
+            return None
+
+        view = memoryview(mapped)
+        data_start = _align(_PREAMBLE.size + header_len)
+        columns = {}
+        for name, (offset, length, typecode) in header["sections"].items():
+            start = data_start + offset
+            if start + length > len(mapped):
+                return None
+            section = view[start : start + length]
+            columns[name] = section if typecode == "B" else section.cast(typecode)
+        samples = SampleStore.from_columns(header["store"], columns)
+    except (struct.error, ValueError, KeyError, IndexError, TypeError):
+        return None
+
+    return {
+        "base_dir": header["base_dir"],
+        "methods": header["methods"],
+        "samples": samples,
+    }
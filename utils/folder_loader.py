@@ -2,6 +2,8 @@ import os
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 
+from utils.timing import timed_stage
+
 
 # 支持的图片格式
 IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp"}
@@ -108,6 +110,7 @@ def find_common_parent(folders: List[Path]) -> Path:
     return Path(*common_parts)
 
 
+@timed_stage("load_config_folders")
 def build_config_from_folders(folders: List[Path]) -> Tuple[Optional[Dict], Dict]:
     """
     根据文件夹列表生成配置字典
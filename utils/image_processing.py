@@ -1,8 +1,10 @@
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
-import streamlit as st
 from typing import Dict, List, Tuple, Optional
 
+from utils.metrics import record_file_read
+from utils.timing import timed_stage
+
 
 def filter_visible_methods(
     methods: List[Dict], visible_methods: List[str]
@@ -83,6 +85,40 @@ def find_closest_square_crop(image: Image.Image) -> Tuple[int, int, int, int]:
     return (left, top, right, bottom)
 
 
+@timed_stage("decode_resize")
+def process_loaded_image(
+    img: Image.Image,
+    target_width: int = 512,
+    preserve_aspect_ratio: bool = False,
+) -> Tuple[Image.Image, float, bool]:
+    """
+    处理已打开的图片：按需中心裁剪到接近 1:1，再缩放到目标宽度
+    参数:
+        img: PIL Image对象
+        target_width: 目标宽度
+        preserve_aspect_ratio: 是否保持原始比例（不裁剪为正方形）
+    返回: (处理后的图片, 原始宽高比, 是否被裁剪)
+    """
+    original_ratio = get_aspect_ratio(img)
+
+    # 检查是否需要裁剪（宽高比偏离 1:1 超过 5%）
+    needs_crop = abs(original_ratio - 1.0) > 0.05
+
+    # 如果不保持原始比例，且需要裁剪，则裁剪到正方形
+    if needs_crop and not preserve_aspect_ratio:
+        # 裁剪到接近 1:1
+        crop_box = find_closest_square_crop(img)
+        img = img.crop(crop_box)
+
+    # 调整大小到目标宽度，保持宽高比
+    aspect_ratio = get_aspect_ratio(img)
+    new_height = int(target_width / aspect_ratio)
+    img = img.resize((target_width, new_height), Image.Resampling.LANCZOS)
+
+    return img, original_ratio, needs_crop
+
+
+@timed_stage("load_and_process_image")
 def load_and_process_image(
     image_path: Optional[Path],
     target_width: int = 512,
@@ -97,6 +133,7 @@ def load_and_process_image(
         preserve_aspect_ratio: 是否保持原始比例（不裁剪为正方形）
         placeholder_text: 占位符文本
     返回: (处理后的图片, 原始宽高比, 是否被裁剪)
+    文件不存在时返回占位符；无法解码等其他错误抛出异常，由调用方处理
     """
     # 如果图片路径为None，生成占位符图片
     if image_path is None:
@@ -107,36 +144,14 @@ def load_and_process_image(
 
     try:
         img = Image.open(image_path)
-        original_ratio = get_aspect_ratio(img)
-
-        # 检查是否需要裁剪（宽高比偏离 1:1 超过 5%）
-        needs_crop = abs(original_ratio - 1.0) > 0.05
-
-        # 如果不保持原始比例，且需要裁剪，则裁剪到正方形
-        if needs_crop and not preserve_aspect_ratio:
-            # 裁剪到接近 1:1
-            crop_box = find_closest_square_crop(img)
-            img = img.crop(crop_box)
-
-        # 调整大小到目标宽度，保持宽高比
-        aspect_ratio = get_aspect_ratio(img)
-        new_height = int(target_width / aspect_ratio)
-        img = img.resize((target_width, new_height), Image.Resampling.LANCZOS)
-
-        return img, original_ratio, needs_crop
+        record_file_read("image", image_path)
+        return process_loaded_image(img, target_width, preserve_aspect_ratio)
     except FileNotFoundError:
         # 文件不存在，生成占位符
         placeholder = create_placeholder_image(
             target_width, target_width, placeholder_text
         )
         return placeholder, 1.0, False
-    except Exception as e:
-        st.error(f"加载图片 {image_path} 时出错: {e}")
-        # 出错时也生成占位符
-        placeholder = create_placeholder_image(
-            target_width, target_width, placeholder_text
-        )
-        return placeholder, 1.0, False
 
 
 def check_image_exists(base_dir: Path, image_rel_path: str) -> bool:
@@ -191,6 +206,35 @@ def apply_crop_to_image(
     return resized
 
 
+@timed_stage("crop_sample_images")
+def crop_sample_images(
+    sample: Dict,
+    box: Tuple[int, int, int, int],
+    method_names: List[str],
+    base_dir: Path,
+    target_width: int,
+) -> Tuple[Dict[str, Image.Image], Dict[str, Tuple[int, int]]]:
+    """
+    对样本的各方法图片应用相同的裁剪框
+    参数:
+        method_names: 需要裁剪的方法名称（缺失或不存在的图片跳过）
+    返回:
+        (方法名称 -> 裁剪后的图片, 方法名称 -> 原始尺寸)
+    """
+    cropped_images = {}
+    original_sizes = {}
+    for method_name in method_names:
+        image_rel_path = sample["images"].get(method_name)
+        if image_rel_path is None or not check_image_exists(base_dir, image_rel_path):
+            continue
+
+        with Image.open(base_dir / image_rel_path) as img:
+            record_file_read("image", base_dir / image_rel_path)
+            original_sizes[method_name] = img.size
+            cropped_images[method_name] = apply_crop_to_image(img, box, target_width)
+    return cropped_images, original_sizes
+
+
 def draw_crop_box_on_image(
     image: Image.Image,
     box: Tuple[int, int, int, int],
@@ -232,6 +276,7 @@ def draw_crop_box_on_image(
     return img_with_box
 
 
+@timed_stage("draw_crop_boxes")
 def draw_all_crop_boxes_on_image(
     image: Image.Image,
     crops: List[Dict],
@@ -256,3 +301,47 @@ def draw_all_crop_boxes_on_image(
         )
 
     return result_img
+
+
+def composite_tile_width(num_cols: int, image_width: int, max_width: int, gap: int) -> int:
+    """合成图片中每列的宽度：不超过处理宽度，整行不超过 max_width"""
+    if num_cols <= 0:
+        return image_width
+    return max(1, min(image_width, (max_width - (num_cols - 1) * gap) // num_cols))
+
+
+@timed_stage("compose_strip")
+def compose_strip(
+    images: List[Optional[Image.Image]],
+    tile_width: int,
+    gap: int,
+    background: Tuple[int, int, int] = (255, 255, 255),
+) -> Image.Image:
+    """
+    将一行图片缩放到相同宽度后横向拼成一张图片
+    参数:
+        images: 各列的图片（None 表示该列留空）
+        tile_width: 每列宽度
+        gap: 列间距
+        background: 间距和留空列的颜色
+    返回:
+        RGB 图片，高度为最高的一列，较矮的图片顶部对齐
+    """
+    tiles = []
+    for image in images:
+        if image is None:
+            tiles.append(None)
+            continue
+        if image.width != tile_width:
+            height = max(1, round(image.height * tile_width / image.width))
+            image = image.resize((tile_width, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        tiles.append(image if image.mode == "RGB" else image.convert("RGB"))
+
+    heights = [tile.height for tile in tiles if tile is not None]
+    height = max(heights) if heights else tile_width
+    width = len(images) * tile_width + max(0, len(images) - 1) * gap
+    strip = Image.new("RGB", (width, height), background)
+    for col, tile in enumerate(tiles):
+        if tile is not None:
+            strip.paste(tile, (col * (tile_width + gap), 0))
+    return strip
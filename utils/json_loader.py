@@ -1,28 +1,37 @@
 import json
-import streamlit as st
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
+from utils.timing import timed_stage
 
-def load_json_config(uploaded_file) -> Optional[Dict]:
-    """加载并验证 JSON 配置文件"""
+
+@timed_stage("load_config_json")
+def parse_json_config(
+    content: bytes, base_path: Optional[Path] = None
+) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    解析并验证 JSON 配置
+    参数:
+        content: JSON 文件内容
+        base_path: 相对 base_dir 的解析基准（如 JSON 文件所在目录），默认为当前工作目录
+    返回:
+        (配置字典, 错误信息)，验证失败时配置为 None
+    """
     try:
-        content = uploaded_file.read()
         config = json.loads(content)
 
         # 验证必需字段
         required_fields = ["base_dir", "methods", "samples"]
         for field in required_fields:
             if field not in config:
-                st.error(f"JSON 配置缺少必需字段: {field}")
-                return None
+                return None, f"JSON 配置缺少必需字段: {field}"
 
         # 解析 base_dir 路径，将相对路径转换为绝对路径
         # 这样在 Windows 和 Mac 上都能正确工作
         base_dir = Path(config["base_dir"])
         if not base_dir.is_absolute():
-            # 相对于当前工作目录解析
-            base_dir = Path.cwd() / base_dir
+            # 相对于 base_path（默认当前工作目录）解析
+            base_dir = (base_path if base_path is not None else Path.cwd()) / base_dir
         # 解析路径，处理 . 和 .. 等符号
         base_dir = base_dir.resolve()
         # 更新配置中的 base_dir 为绝对路径字符串
@@ -30,28 +39,23 @@ def load_json_config(uploaded_file) -> Optional[Dict]:
         
         # 验证 methods 结构
         if not isinstance(config["methods"], list) or len(config["methods"]) == 0:
-            st.error("methods 字段必须是非空列表")
-            return None
+            return None, "methods 字段必须是非空列表"
         
         for method in config["methods"]:
             if "name" not in method:
-                st.error("每个 method 必须包含 'name' 字段")
-                return None
+                return None, "每个 method 必须包含 'name' 字段"
         
         # 验证 samples 结构
         if not isinstance(config["samples"], list) or len(config["samples"]) == 0:
-            st.error("samples 字段必须是非空列表")
-            return None
+            return None, "samples 字段必须是非空列表"
         
         for sample in config["samples"]:
             if "name" not in sample or "images" not in sample:
-                st.error("每个 sample 必须包含 'name' 和 'images' 字段")
-                return None
+                return None, "每个 sample 必须包含 'name' 和 'images' 字段"
         
-        return config
+        return config, None
     except json.JSONDecodeError as e:
-        st.error(f"JSON 解析错误: {e}")
-        return None
+        return None, f"JSON 解析错误: {e}"
     except Exception as e:
-        st.error(f"加载配置文件时出错: {e}")
-        return None
+        return None, f"加载配置文件时出错: {e}"
+
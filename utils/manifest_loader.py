@@ -0,0 +1,285 @@
+import csv
+import json
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.timing import timed_stage
+
+
+# 支持的清单格式
+MANIFEST_EXTENSIONS = {".jsonl", ".csv"}
+
+# CSV 中不作为方法列的保留列
+RESERVED_CSV_COLUMNS = ("name", "text", "mask", "reference")
+
+# 没有表头或附属文件时，从前若干个样本中推断方法列表
+METHOD_PROBE_SAMPLES = 100
+
+# 建立行索引时每次读取的块大小
+INDEX_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def get_side_file_path(manifest_path: Path) -> Path:
+    """清单的附属方法文件：<清单名>.methods.json"""
+    return manifest_path.with_name(manifest_path.stem + ".methods.json")
+
+
+# 空白字节（空格、\t、\n、\v、\f、\r）查找表
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[[0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0x20]] = True
+
+# 无法解析的行在占位样本名称中保留的字符数
+INVALID_LINE_PREVIEW = 80
+
+
+def build_line_index(manifest_path: Path) -> np.ndarray:
+    """
+    扫描清单文件，返回每个有内容的行的起始字节偏移（int64 数组）
+    只查找换行符和非空白字节，不解析内容，多 GB 文件也只需顺序读一遍；
+    空行和只含空白字符的行不计入，最后一行可以没有换行符
+    """
+    starts = [np.zeros(1, dtype=np.int64)]
+    keep = []
+    # 跨块的当前行是否已出现非空白字节
+    carry = False
+    position = 0
+    buffer = bytearray(INDEX_CHUNK_SIZE)
+
+    with open(manifest_path, "rb") as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            chunk = np.frombuffer(buffer, dtype=np.uint8, count=n)
+            newlines = np.flatnonzero(chunk == 0x0A).astype(np.int64)
+            starts.append(newlines + position + 1)
+            position += n
+
+            # 按行统计非空白字节数：第 k 段到第 k 个换行符为止，最后一段是未结束的行
+            bounds = np.concatenate(([0], newlines + 1))
+            bounds = bounds[bounds < n]
+            content = np.add.reduceat(~_WHITESPACE[chunk], bounds, dtype=np.int64) > 0
+            if len(newlines):
+                ended = content[: len(newlines)].copy()
+                ended[0] |= carry
+                keep.append(ended)
+                carry = len(content) > len(newlines) and bool(content[-1])
+            else:
+                carry = carry or bool(content[0])
+
+    starts = np.concatenate(starts)
+    # 最后一行（文件不以换行符结尾时有内容）
+    keep.append(np.array([carry]))
+    return starts[np.concatenate(keep)]
+
+
+class ManifestSamples(Sequence):
+    """
+    按需读取的清单样本序列
+    只保存行偏移索引，访问某个样本时才读取并解析对应的行
+    """
+
+    def __init__(
+        self,
+        manifest_path: Path,
+        offsets: np.ndarray,
+        parse_line: Callable[[bytes], Dict],
+    ):
+        self._path = manifest_path
+        self._offsets = offsets
+        self._parse_line = parse_line
+
+    def _read_range(self, start: int, stop: int) -> List[Dict]:
+        """读取第 start 到 stop-1 个样本（连续区域一次读取）"""
+        if start >= stop:
+            return []
+        begin = int(self._offsets[start])
+        with open(self._path, "rb") as f:
+            f.seek(begin)
+            if stop < len(self._offsets):
+                data = f.read(int(self._offsets[stop]) - begin)
+            else:
+                data = f.read()
+
+        relative = self._offsets[start:stop] - begin
+        ends = np.append(relative[1:], len(data))
+        return [
+            self._parse_line(data[int(a) : int(b)].strip())
+            for a, b in zip(relative, ends)
+        ]
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return self._read_range(start, stop)
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("sample index out of range")
+        return self._read_range(idx, idx + 1)[0]
+
+    def __iter__(self):
+        # 分批顺序读取，避免逐行打开文件
+        batch = 1024
+        for start in range(0, len(self), batch):
+            yield from self._read_range(start, min(start + batch, len(self)))
+
+
+def _read_line_at(manifest_path: Path, offset: int) -> bytes:
+    with open(manifest_path, "rb") as f:
+        f.seek(offset)
+        return f.readline().strip()
+
+
+def _invalid_sample(line: bytes, error: str) -> Dict:
+    """
+    无法解析的行的占位样本：名称为行内容的开头，说明文字为错误原因，没有图片
+    （完整性检查会把它的所有方法报告为缺失），浏览到该行时不会中断页面
+    """
+    preview = line[:INVALID_LINE_PREVIEW].decode("utf-8", errors="replace")
+    return {"name": f"⚠ {preview}", "text": error, "images": {}}
+
+
+def _make_csv_parser(columns: List[str], method_names: List[str]):
+    """根据表头生成 CSV 行解析函数"""
+    reserved = [c for c in columns if c in RESERVED_CSV_COLUMNS]
+
+    def parse_line(line: bytes) -> Dict:
+        try:
+            row = next(csv.reader([line.decode("utf-8-sig")]))
+        except (ValueError, csv.Error, StopIteration) as e:
+            return _invalid_sample(line, f"CSV: {e}")
+        values = dict(zip(columns, row))
+        sample = {"name": values.get("name", "")}
+        for column in reserved:
+            if column != "name" and values.get(column):
+                sample[column] = values[column]
+        # 空单元格表示图片缺失
+        sample["images"] = {
+            name: (values.get(name) or None) for name in method_names
+        }
+        return sample
+
+    return parse_line
+
+
+def _parse_jsonl_line(line: bytes) -> Dict:
+    """解析一行 JSONL 样本；格式错误或缺少 name / images 时返回占位样本"""
+    try:
+        sample = json.loads(line)
+    except ValueError as e:
+        return _invalid_sample(line, f"JSON: {e}")
+    if not isinstance(sample, dict) or "name" not in sample:
+        return _invalid_sample(line, "sample 必须包含 'name' 字段")
+    images = sample.get("images")
+    if not isinstance(images, dict) or not all(
+        path is None or isinstance(path, str) for path in images.values()
+    ):
+        return _invalid_sample(line, "sample 的 'images' 必须是 方法名 -> 路径 的对象")
+    sample["name"] = str(sample["name"])
+    return sample
+
+
+@timed_stage("load_config_manifest")
+def load_manifest(manifest_path: Path) -> Tuple[Optional[Dict], Dict]:
+    """
+    加载 JSONL / CSV 清单，生成与 JSON 配置相同结构的配置字典
+
+    - JSONL：每行一个 sample；第一行可以是包含 "methods"（及可选 "base_dir"）的表头对象
+    - CSV：表头中 name/text/mask/reference 以外的列为方法名
+    - 也可以在清单旁放置 <清单名>.methods.json 提供 base_dir 和 methods（含描述）
+    - base_dir 为相对路径时相对于清单所在目录解析，默认为清单所在目录
+
+    Returns:
+        (config_dict, stats_dict)，config["samples"] 为按需读取的 ManifestSamples
+    """
+    stats = {"num_methods": 0, "num_samples": 0, "errors": []}
+
+    if not manifest_path.exists() or not manifest_path.is_file():
+        stats["errors"].append(f"error_manifest_not_exist|{manifest_path}")
+        return None, stats
+
+    suffix = manifest_path.suffix.lower()
+    if suffix not in MANIFEST_EXTENSIONS:
+        stats["errors"].append(f"error_manifest_unsupported|{manifest_path}")
+        return None, stats
+
+    offsets = build_line_index(manifest_path)
+    if len(offsets) == 0:
+        stats["errors"].append(f"error_manifest_empty|{manifest_path}")
+        return None, stats
+
+    # 附属文件中的元信息
+    meta = {}
+    side_file = get_side_file_path(manifest_path)
+    if side_file.exists():
+        try:
+            with open(side_file, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except ValueError:
+            stats["errors"].append(f"error_manifest_invalid|{side_file}")
+            return None, stats
+
+    try:
+        first_line = _read_line_at(manifest_path, int(offsets[0]))
+        if suffix == ".csv":
+            # Excel 的 "CSV UTF-8" 格式以 BOM 开头，按 utf-8-sig 解码去掉
+            columns = [c.strip() for c in next(csv.reader([first_line.decode("utf-8-sig")]))]
+            offsets = offsets[1:]
+            method_names = [c for c in columns if c not in RESERVED_CSV_COLUMNS]
+            parse_line = _make_csv_parser(columns, method_names)
+        else:
+            # 无法解析的第一行按普通样本行处理（显示为占位样本），不拒绝整个清单
+            try:
+                header = json.loads(first_line)
+            except ValueError:
+                header = None
+            if isinstance(header, dict) and "methods" in header and "images" not in header:
+                meta = {**header, **meta}
+                offsets = offsets[1:]
+            parse_line = _parse_jsonl_line
+            method_names = []
+    except (ValueError, StopIteration):
+        stats["errors"].append(f"error_manifest_invalid|{manifest_path}")
+        return None, stats
+
+    if len(offsets) == 0:
+        stats["errors"].append(f"error_manifest_empty|{manifest_path}")
+        return None, stats
+
+    samples = ManifestSamples(manifest_path, offsets, parse_line)
+
+    # 构建 methods 列表：附属文件/表头优先，其次 CSV 列名，最后取第一个样本的 images
+    methods = meta.get("methods")
+    if not methods:
+        if not method_names:
+            # 取前几个样本中第一个有图片的（跳过无法解析的占位样本）
+            method_names = next(
+                (list(sample["images"].keys()) for sample in samples[:METHOD_PROBE_SAMPLES]
+                 if sample["images"]),
+                [],
+            )
+        methods = [{"name": name, "description": ""} for name in method_names]
+
+    if not methods:
+        stats["errors"].append(f"error_manifest_no_methods|{manifest_path}")
+        return None, stats
+
+    base_dir = Path(meta.get("base_dir", "."))
+    if not base_dir.is_absolute():
+        base_dir = manifest_path.parent / base_dir
+    base_dir = base_dir.resolve()
+
+    stats["num_methods"] = len(methods)
+    stats["num_samples"] = len(samples)
+
+    config = {"base_dir": str(base_dir), "methods": methods, "samples": samples}
+    return config, stats
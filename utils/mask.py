@@ -1,11 +1,20 @@
 from pathlib import Path
 from PIL import Image
-import numpy as np
 from typing import Dict, List, Tuple, Optional
 
+from utils.metrics import record_file_read
+from utils.timing import timed_stage
 
-def check_masks_available(samples: List[Dict], base_dir: Path) -> bool:
-    """检查是否至少有一个 sample 有有效的 mask 图片"""
+
+def check_masks_available(
+    samples: List[Dict], base_dir: Path, limit: Optional[int] = None
+) -> bool:
+    """
+    检查是否至少有一个 sample 有有效的 mask 图片
+    limit: 只检查前 limit 个样本（用于按需读取的大型清单）
+    """
+    if limit is not None:
+        samples = samples[:limit]
     for sample in samples:
         if "mask" in sample and sample["mask"]:
             mask_path = base_dir / sample["mask"]
@@ -14,6 +23,7 @@ def check_masks_available(samples: List[Dict], base_dir: Path) -> bool:
     return False
 
 
+@timed_stage("load_mask")
 def load_mask(mask_path: Path, target_size: Tuple[int, int]) -> Optional[Image.Image]:
     """
     加载 mask 图片并调整到目标尺寸
@@ -25,6 +35,7 @@ def load_mask(mask_path: Path, target_size: Tuple[int, int]) -> Optional[Image.I
     """
     try:
         mask = Image.open(mask_path)
+        record_file_read("mask", mask_path)
         # 转换为灰度图
         if mask.mode != 'L':
             mask = mask.convert('L')
@@ -37,6 +48,7 @@ def load_mask(mask_path: Path, target_size: Tuple[int, int]) -> Optional[Image.I
         return None
 
 
+@timed_stage("apply_mask")
 def apply_mask_to_image(image: Image.Image, mask: Image.Image, overlay_opacity: float = 0.5) -> Image.Image:
     """
     对图片应用 mask 效果：mask > 0 的区域正常显示，其余区域应用半透明黑色叠加层
@@ -47,6 +59,9 @@ def apply_mask_to_image(image: Image.Image, mask: Image.Image, overlay_opacity:
     返回:
         应用 mask 后的图片
     """
+    # NumPy 只在真正应用 mask 时才导入（冷启动不加载）
+    import numpy as np
+
     try:
         # 确保 mask 尺寸与图片匹配
         if mask.size != image.size:
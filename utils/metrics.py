@@ -0,0 +1,194 @@
+"""
+服务监控指标（Prometheus 文本格式，不依赖界面）
+
+计数器和直方图由图片、mask、crop、导出等模块在关键位置上报，进程内汇总；
+会话数、缓存占用等当前值在输出时由注册的收集函数读取。
+未启用时（没有配置指标输出）上报函数只检查一个标志位，几乎没有额外开销。
+"""
+
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 直方图桶（秒）
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RERUN_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+EXPORT_BUCKETS = (1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+# 指标名称 -> (类型, 说明, 直方图桶)
+METRICS: Dict[str, Tuple[str, str, Optional[Tuple[float, ...]]]] = {
+    "image_viewer_images_decoded_total": (
+        "counter", "Source files opened for decoding, by kind (image / mask).", None),
+    "image_viewer_bytes_read_total": (
+        "counter", "Bytes of source files opened for decoding, by kind.", None),
+    "image_viewer_cache_requests_total": (
+        "counter", "Cache lookups by cache (image / row) and result (hit / miss).", None),
+    "image_viewer_cache_evictions_total": (
+        "counter", "Entries or data released to stay within limits, by cache.", None),
+    "image_viewer_crops_saved_total": (
+        "counter", "Close View crop boxes saved.", None),
+    "image_viewer_tiles_generated_total": (
+        "counter", "Deep zoom pyramid tiles written to the tile cache.", None),
+    "image_viewer_export_jobs_total": (
+        "counter", "Finished background export jobs by exporter and status.", None),
+    "image_viewer_stage_duration_seconds": (
+        "histogram", "Duration of instrumented stages (stages may nest).", STAGE_BUCKETS),
+    "image_viewer_rerun_duration_seconds": (
+        "histogram", "Duration of a full script run of the web UI.", RERUN_BUCKETS),
+    "image_viewer_export_duration_seconds": (
+        "histogram", "Duration of background export jobs by exporter.", EXPORT_BUCKETS),
+    "image_viewer_active_sessions": (
+        "gauge", "Sessions that ran within the idle timeout or are running.", None),
+    "image_viewer_session_memory_bytes": (
+        "gauge", "Estimated bytes retained by all sessions.", None),
+    "image_viewer_image_cache_bytes": (
+        "gauge", "Bytes of processed images in the shared image cache.", None),
+    "image_viewer_image_cache_entries": (
+        "gauge", "Entries in the shared image cache.", None),
+    "image_viewer_export_jobs": (
+        "gauge", "Export jobs held in the registry by status.", None),
+}
+
+# 标签（按名称排序的 (名称, 值) 元组）
+Labels = Tuple[Tuple[str, str], ...]
+# 收集函数返回 (指标名称, 标签, 值) 序列
+Collector = Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]
+
+
+def _labels(labels: Dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    进程内指标注册表（线程安全）
+    计数器: {名称: {标签: 值}}
+    直方图: {名称: {标签: [各桶计数..., 总和, 次数]}}（桶计数非累计，输出时累加）
+    """
+
+    def __init__(self, definitions: Dict = METRICS):
+        self.enabled = False
+        self._definitions = definitions
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}
+        self._collectors: List[Collector] = []
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        """计数器加 value"""
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """直方图记录一次观测值"""
+        buckets = self._definitions[name][2]
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            entry = series.get(key)
+            if entry is None:
+                entry = series[key] = [0.0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    entry[i] += 1
+                    break
+            entry[-2] += value
+            entry[-1] += 1
+
+    def add_collector(self, collector: Collector):
+        """注册输出时读取当前值的收集函数"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """按 Prometheus 文本格式（0.0.4）输出全部指标"""
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: list(entry) for key, entry in series.items()}
+                for name, series in self._histograms.items()
+            }
+            collectors = list(self._collectors)
+
+        gauges: Dict[str, Dict[Labels, float]] = {}
+        for collector in collectors:
+            for name, labels, value in collector():
+                gauges.setdefault(name, {})[_labels(labels)] = value
+
+        lines = []
+        for name, (metric_type, help_text, buckets) in self._definitions.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            if metric_type == "histogram":
+                for key, entry in sorted(histograms.get(name, {}).items()):
+                    cumulative = 0.0
+                    for bound, bucket_count in zip(buckets, entry):
+                        cumulative += bucket_count
+                        bucket_labels = key + (("le", _format_value(bound)),)
+                        lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {_format_value(cumulative)}")
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {_format_value(entry[-1])}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(entry[-2])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {_format_value(entry[-1])}")
+                continue
+            series = (counters if metric_type == "counter" else gauges).get(name, {})
+            if not series and metric_type == "counter":
+                series = {(): 0.0}
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """获取进程内共享的指标注册表"""
+    return _registry
+
+
+def inc(name: str, value: float = 1.0, **labels):
+    """计数器加 value（未启用指标时不记录）"""
+    if _registry.enabled:
+        _registry.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    """直方图记录一次观测值（未启用指标时不记录）"""
+    if _registry.enabled:
+        _registry.observe(name, value, **labels)
+
+
+def record_file_read(kind: str, path, nbytes: Optional[int] = None):
+    """
+    记录一次源文件解码（解码数和读取字节数）
+    参数:
+        kind: image / mask
+        nbytes: 文件大小（已知时传入，避免再次 stat）
+    """
+    if not _registry.enabled:
+        return
+    if nbytes is None:
+        try:
+            nbytes = os.stat(path).st_size
+        except OSError:
+            nbytes = 0
+    _registry.inc("image_viewer_images_decoded_total", kind=kind)
+    _registry.inc("image_viewer_bytes_read_total", nbytes, kind=kind)
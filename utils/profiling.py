@@ -0,0 +1,161 @@
+"""
+按需性能剖析（cProfile，不依赖界面）
+
+剖析结果保存为 .prof 格式的字节（与 cProfile -o / pstats.dump_stats 相同，
+可用 python -m pstats、snakeviz 等工具打开），摘要按函数和模块汇总自身耗时。
+
+Python 3.12 起 cProfile 基于进程级的 sys.monitoring，同一时刻只能启用一个剖析器
+（再启用一个会抛出 ValueError）。为使各版本行为一致，进程内同一时刻只允许一次剖析，
+其他剖析进行中时 start_profiler 直接返回 None，由调用方提示剖析器正忙。
+"""
+
+import cProfile
+import marshal
+import sysconfig
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# 项目根目录及顶层包（摘要中单独列出）
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PROJECT_PACKAGES = ("app", "cli", "config", "utils", "services", "ui")
+
+_STDLIB_DIR = Path(sysconfig.get_paths()["stdlib"]).resolve()
+
+# C 函数在统计中的文件名
+_BUILTIN_FILE = "~"
+
+
+# 进程内同一时刻只允许一次剖析（start_profiler 获取，stop_profiler 释放）
+_capture_lock = threading.Lock()
+
+
+def start_profiler() -> Optional[cProfile.Profile]:
+    """
+    在当前线程启动剖析
+    返回: 剖析器；其他剖析正在进行时返回 None（不等待）
+    """
+    if not _capture_lock.acquire(blocking=False):
+        return None
+    try:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    except ValueError:
+        # 进程中的其他工具已占用 sys.monitoring 的剖析器
+        _capture_lock.release()
+        return None
+    return profiler
+
+
+def stop_profiler(profiler: cProfile.Profile) -> bytes:
+    """结束剖析并释放剖析锁，返回 .prof 格式的字节"""
+    try:
+        profiler.disable()
+        profiler.create_stats()
+    finally:
+        _capture_lock.release()
+    return marshal.dumps(profiler.stats)
+
+
+def is_profiler_busy() -> bool:
+    """进程内是否有剖析正在进行"""
+    return _capture_lock.locked()
+
+
+def _module_of(filename: str) -> Tuple[str, str]:
+    """
+    源文件对应的 (模块, 分组)
+    分组: 项目顶层包（utils / services / ui ...）、第三方包名、stdlib 或 builtins
+    """
+    if filename == _BUILTIN_FILE:
+        return "builtins", "builtins"
+    if filename.startswith("<"):
+        # <frozen ...>、<string> 等
+        return filename, "stdlib" if filename.startswith("<frozen") else "other"
+
+    path = Path(filename)
+    try:
+        relative = path.resolve().relative_to(PROJECT_ROOT)
+    except (OSError, ValueError):
+        relative = None
+    if relative is not None and relative.parts and relative.parts[0] != "benchmarks":
+        module = ".".join(relative.with_suffix("").parts)
+        return module, relative.parts[0] if len(relative.parts) > 1 else module
+
+    parts = path.parts
+    for marker in ("site-packages", "dist-packages"):
+        if marker in parts:
+            rest = Path(*parts[parts.index(marker) + 1:])
+            module = ".".join(rest.with_suffix("").parts).removesuffix(".__init__")
+            return module, rest.parts[0].removesuffix(".py")
+    try:
+        rest = path.resolve().relative_to(_STDLIB_DIR)
+    except (OSError, ValueError):
+        return filename, "other"
+    return ".".join(rest.with_suffix("").parts).removesuffix(".__init__"), "stdlib"
+
+
+def summarize_profile(data: bytes, top: int = 30) -> Dict:
+    """
+    汇总剖析结果
+    参数:
+        data: .prof 格式的字节
+        top: 列出自身耗时最多的函数数
+    返回:
+        {"total_s", "functions", "modules", "groups"}
+        functions: [{"function", "module", "group", "calls", "self_s", "cumulative_s"}]
+        modules / groups: [{"module" / "group", "self_s", "share"}]
+        C 函数（如 Pillow 的缩放）没有源文件，其耗时按调用关系计入调用方所在的模块
+    """
+    stats = marshal.loads(data)
+    total = sum(entry[2] for entry in stats.values())
+    modules_of = {key: _module_of(key[0]) for key in stats}
+
+    by_module: Dict[str, float] = defaultdict(float)
+    by_group: Dict[str, float] = defaultdict(float)
+    for key, (_, _, self_time, _, callers) in stats.items():
+        module, group = modules_of[key]
+        if group == "builtins" and callers:
+            caller_total = sum(entry[2] for entry in callers.values())
+            if caller_total > 0:
+                for caller, entry in callers.items():
+                    share = self_time * entry[2] / caller_total
+                    caller_module, caller_group = modules_of.get(caller) or _module_of(caller[0])
+                    by_module[caller_module] += share
+                    by_group[caller_group] += share
+                continue
+        by_module[module] += self_time
+        by_group[group] += self_time
+
+    def ranked(values: Dict[str, float], name: str):
+        return [
+            {name: key, "self_s": value, "share": value / total if total else 0.0}
+            for key, value in sorted(values.items(), key=lambda item: -item[1])
+        ]
+
+    hottest = sorted(stats.items(), key=lambda item: -item[1][2])[:top]
+    return {
+        "total_s": total,
+        "functions": [
+            {
+                "function": key[2]
+                if key[0] == _BUILTIN_FILE
+                else f"{modules_of[key][0]}:{key[1]}({key[2]})",
+                "module": modules_of[key][0],
+                "group": modules_of[key][1],
+                "calls": calls,
+                "self_s": self_time,
+                "cumulative_s": cumulative,
+            }
+            for key, (_, calls, self_time, cumulative, _) in hottest
+        ],
+        "modules": ranked(by_module, "module"),
+        "groups": ranked(by_group, "group"),
+    }
+
+
+def is_project_group(group: str) -> bool:
+    """分组是否为项目自身的代码"""
+    return group in PROJECT_PACKAGES
+
@@ -0,0 +1,191 @@
+import re
+from array import array
+from collections.abc import Sequence
+from fnmatch import translate
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+# NumPy 在构建筛选索引时才导入：未筛选时（以及只用 FilteredSamples / get_source_index 的模块）不加载
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# 中日韩字符逐字索引，其他文字按连续的字母数字切分
+_CJK = "\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_TOKEN_RE = re.compile(rf"[{_CJK}]|[^\W_{_CJK}]+")
+
+# 每个索引缓存的名称模式匹配结果数
+_PATTERN_CACHE_SIZE = 32
+
+
+def tokenize(text: str) -> List[str]:
+    """将文本切分为小写关键词"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SampleFilterIndex:
+    """
+    样本筛选索引，每个配置构建一次
+
+    - text 字段的关键词倒排表（多个关键词取交集）
+    - 样本名称（支持 * ? 通配符，不区分大小写）
+    - 标志位：是否有 mask、是否缺少某个方法的图片
+    """
+
+    def __init__(self, samples: Iterable[Dict], methods: List[Dict]):
+        import numpy as np
+
+        method_names = [m["name"] for m in methods]
+        postings: Dict[str, array] = {}
+        names = []
+        has_mask = []
+        has_missing = []
+
+        for idx, sample in enumerate(samples):
+            names.append(str(sample["name"]).lower())
+            has_mask.append(bool(sample.get("mask")))
+            images = sample["images"]
+            has_missing.append(any(images.get(name) is None for name in method_names))
+
+            text = sample.get("text")
+            if text:
+                for token in set(tokenize(str(text))):
+                    column = postings.get(token)
+                    if column is None:
+                        column = postings[token] = array("i")
+                    column.append(idx)
+
+        self._size = len(names)
+        self._names = names
+        self._postings = {
+            token: np.frombuffer(column, dtype=np.int32)
+            for token, column in postings.items()
+        }
+        self._has_mask = np.array(has_mask, dtype=bool)
+        self._has_missing = np.array(has_missing, dtype=bool)
+        self._pattern_cache: Dict[str, "np.ndarray"] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _match_name_pattern(self, pattern: str) -> "np.ndarray":
+        """名称模式匹配；不含通配符时按子串匹配"""
+        import numpy as np
+
+        pattern = pattern.strip().lower()
+        cached = self._pattern_cache.get(pattern)
+        if cached is not None:
+            return cached
+
+        if not any(c in pattern for c in "*?["):
+            pattern_re = re.compile(re.escape(pattern))
+            matcher = pattern_re.search
+        else:
+            matcher = re.compile(translate(pattern)).match
+
+        result = np.fromiter(
+            (idx for idx, name in enumerate(self._names) if matcher(name)),
+            dtype=np.int32,
+        )
+        if len(self._pattern_cache) >= _PATTERN_CACHE_SIZE:
+            self._pattern_cache.pop(next(iter(self._pattern_cache)))
+        self._pattern_cache[pattern] = result
+        return result
+
+    def filter(
+        self,
+        keywords: str = "",
+        name_pattern: str = "",
+        require_mask: bool = False,
+        require_missing: bool = False,
+    ) -> "np.ndarray":
+        """
+        按条件筛选样本（各条件之间为「与」关系）
+        返回: 升序排列的样本索引数组
+        """
+        import numpy as np
+
+        result: Optional["np.ndarray"] = None
+
+        tokens = tokenize(keywords)
+        if tokens:
+            lists = [self._postings.get(token) for token in set(tokens)]
+            if any(postings is None for postings in lists):
+                return np.empty(0, dtype=np.int32)
+            for postings in sorted(lists, key=len):
+                result = (
+                    postings
+                    if result is None
+                    else np.intersect1d(result, postings, assume_unique=True)
+                )
+
+        if name_pattern.strip():
+            matched = self._match_name_pattern(name_pattern)
+            result = (
+                matched
+                if result is None
+                else np.intersect1d(result, matched, assume_unique=True)
+            )
+
+        mask = None
+        if require_mask:
+            mask = self._has_mask
+        if require_missing:
+            mask = self._has_missing if mask is None else mask & self._has_missing
+        if mask is not None:
+            if result is None:
+                result = np.flatnonzero(mask).astype(np.int32)
+            else:
+                result = result[mask[result]]
+
+        if result is None:
+            return np.arange(self._size, dtype=np.int32)
+        return result
+
+
+class FilteredSamples(Sequence):
+    """
+    样本子集视图：位置 -> 原始样本索引
+    分页、翻页都基于视图位置，crop 数据等仍使用原始样本索引
+    """
+
+    def __init__(self, samples: Sequence, indices: "np.ndarray"):
+        self._samples = samples
+        self._indices = indices
+
+    @property
+    def source(self) -> Sequence:
+        """原始样本序列"""
+        return self._samples
+
+    @property
+    def indices(self) -> "np.ndarray":
+        """视图中各位置对应的原始样本索引（升序）"""
+        return self._indices
+
+    def source_index(self, position: int) -> int:
+        """视图位置对应的原始样本索引"""
+        return int(self._indices[position])
+
+    def position_of(self, source_idx: int) -> Optional[int]:
+        """原始样本索引在视图中的位置，不在视图中返回 None"""
+        import numpy as np
+
+        pos = int(np.searchsorted(self._indices, source_idx))
+        if pos < len(self._indices) and self._indices[pos] == source_idx:
+            return pos
+        return None
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._samples[int(i)] for i in self._indices[idx]]
+        return self._samples[int(self._indices[idx])]
+
+
+def get_source_index(samples: Sequence, position: int) -> int:
+    """获取视图位置对应的原始样本索引（未筛选时两者相同）"""
+    if isinstance(samples, FilteredSamples):
+        return samples.source_index(position)
+    return position
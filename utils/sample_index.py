@@ -0,0 +1,107 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+
+class SampleNameIndex:
+    """
+    样本名称搜索索引（不区分大小写）
+
+    - 前缀匹配：对排序后的名称使用二分查找
+    - 子串匹配：三字母组（trigram）倒排表，取最短的倒排表逐个校验
+    每次查询只访问与结果数量相关的少量条目，与样本总数无关
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self._names: List[str] = []
+        self._lowered: List[str] = []
+        trigrams: Dict[str, array] = {}
+
+        for idx, name in enumerate(names):
+            name = str(name)
+            lowered = name.lower()
+            self._names.append(name)
+            self._lowered.append(lowered)
+            for gram in {lowered[i : i + 3] for i in range(len(lowered) - 2)}:
+                postings = trigrams.get(gram)
+                if postings is None:
+                    postings = trigrams[gram] = array("i")
+                postings.append(idx)
+
+        order = sorted(range(len(self._lowered)), key=self._lowered.__getitem__)
+        self._sorted_ids = array("i", order)
+        self._sorted_keys = [self._lowered[i] for i in order]
+        self._trigrams = trigrams
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def name(self, idx: int) -> str:
+        """获取样本名称（不读取样本数据）"""
+        return self._names[idx]
+
+    def lookup(self, name: str) -> Optional[int]:
+        """
+        按完整名称（区分大小写）查找样本
+        返回: 第一个同名样本的索引，不存在返回 None
+        """
+        name = str(name)
+        lowered = name.lower()
+        pos = bisect_left(self._sorted_keys, lowered)
+        while pos < len(self._sorted_keys) and self._sorted_keys[pos] == lowered:
+            idx = self._sorted_ids[pos]
+            if self._names[idx] == name:
+                return idx
+            pos += 1
+        return None
+
+    def search(self, query: str, limit: int = 10) -> List[int]:
+        """
+        搜索样本名称
+        参数:
+            query: 查询文本
+            limit: 最多返回的结果数
+        返回:
+            样本索引列表，前缀匹配在前（按名称排序），其次为子串匹配（按样本顺序）
+        """
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        results = []
+        seen = set()
+
+        # 前缀匹配
+        pos = bisect_left(self._sorted_keys, query)
+        while (
+            pos < len(self._sorted_keys)
+            and len(results) < limit
+            and self._sorted_keys[pos].startswith(query)
+        ):
+            idx = self._sorted_ids[pos]
+            results.append(idx)
+            seen.add(idx)
+            pos += 1
+
+        if len(results) >= limit:
+            return results
+
+        # 子串匹配
+        if len(query) >= 3:
+            postings = [
+                self._trigrams.get(query[i : i + 3]) for i in range(len(query) - 2)
+            ]
+            if any(p is None for p in postings):
+                return results
+            candidates = min(postings, key=len)
+        else:
+            # 一两个字符的查询匹配很多，顺序扫描很快就能凑够结果
+            candidates = range(len(self._lowered))
+
+        for idx in candidates:
+            if idx not in seen and query in self._lowered[idx]:
+                results.append(idx)
+                if len(results) >= limit:
+                    break
+
+        return results
@@ -0,0 +1,378 @@
+"""
+紧凑的列式样本存储
+
+将 JSON 配置中的 samples（字典列表）转换为只读的列式结构：
+- 方法名使用 sys.intern 驻留，每个方法一列
+- 图片路径拆分为「目录前缀 + 文件名」，前缀进入前缀字典去重
+- 字符串统一存放在 UTF-8 blob 中，列只保存 array 形式的整数编号
+- 访问时返回带 __slots__ 的轻量记录对象，接口与原来的 dict 一致
+  （sample["name"]、sample["images"][method]、"mask" in sample、sample.get(...)）
+
+SampleStore 构建后不可修改，可以在多个 session 之间共享。
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# 列中的特殊编码
+ABSENT = -1  # 字段不存在
+NONE = -2  # 字段值为 None
+
+# 除 name / images 外按列存储的可选字段
+OPTIONAL_FIELDS = ("text", "mask", "reference")
+
+
+def split_path(path: str) -> Tuple[str, str]:
+    """
+    将路径拆分为 (目录前缀, 文件名)，前缀保留末尾分隔符，拼接即可还原
+    """
+    cut = max(path.rfind("/"), path.rfind("\\")) + 1
+    return path[:cut], path[cut:]
+
+
+class StringTable:
+    """
+    去重字符串表
+
+    构建阶段用字典去重，freeze() 之后只保留 UTF-8 blob 和偏移数组。
+    blob / offsets 也可以是 memoryview（例如来自 mmap），读取方式相同。
+    """
+
+    __slots__ = ("_blob", "_offsets", "_lookup", "_pending")
+
+    def __init__(self, blob=b"", offsets=None):
+        self._blob = blob
+        self._offsets = offsets if offsets is not None else array("q", [0])
+        self._lookup: Optional[Dict[str, int]] = None if offsets is not None else {}
+        self._pending: List[bytes] = []
+
+    def add(self, value: str) -> int:
+        """添加字符串并返回编号（相同字符串返回相同编号）"""
+        idx = self._lookup.get(value)
+        if idx is None:
+            idx = len(self._lookup)
+            self._lookup[value] = idx
+            encoded = value.encode("utf-8")
+            self._pending.append(encoded)
+            self._offsets.append(self._offsets[-1] + len(encoded))
+        return idx
+
+    def freeze(self):
+        """结束构建：合并 blob 并释放去重字典"""
+        if self._lookup is not None:
+            self._blob = b"".join(self._pending)
+            self._pending = []
+            self._lookup = None
+
+    def __getitem__(self, idx: int) -> str:
+        offsets = self._offsets
+        return str(self._blob[offsets[idx] : offsets[idx + 1]], "utf-8")
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._blob) + len(self._offsets) * self._offsets.itemsize
+
+
+class ImagesView(Mapping):
+    """单个样本的 images 只读视图：{方法名: 相对路径或 None}"""
+
+    __slots__ = ("_store", "_idx")
+
+    def __init__(self, store: "SampleStore", idx: int):
+        self._store = store
+        self._idx = idx
+
+    def __getitem__(self, method_name: str) -> Optional[str]:
+        return self._store._get_image(self._idx, method_name)
+
+    def __contains__(self, method_name) -> bool:
+        store = self._store
+        mi = store._method_index.get(method_name)
+        return mi is not None and store._image_prefix[mi][self._idx] != ABSENT
+
+    def __iter__(self) -> Iterator[str]:
+        idx = self._idx
+        for mi, name in enumerate(self._store._method_names):
+            if self._store._image_prefix[mi][idx] != ABSENT:
+                yield name
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"ImagesView({dict(self)!r})"
+
+
+class SampleRecord(Mapping):
+    """单个样本的只读记录，行为与原始 sample 字典一致"""
+
+    __slots__ = ("_store", "_idx")
+
+    def __init__(self, store: "SampleStore", idx: int):
+        self._store = store
+        self._idx = idx
+
+    def __getitem__(self, key: str) -> Any:
+        return self._store._get_field(self._idx, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store._field_names(self._idx))
+
+    def __len__(self) -> int:
+        return len(self._store._field_names(self._idx))
+
+    def to_dict(self) -> Dict:
+        """转换回普通字典"""
+        result = {key: self[key] for key in self}
+        result["images"] = dict(result["images"])
+        return result
+
+    def __repr__(self) -> str:
+        return f"SampleRecord({self.to_dict()!r})"
+
+
+class SampleStore(Sequence):
+    """
+    只读的列式样本序列
+
+    支持 len()、下标访问、切片（返回记录列表）和迭代，
+    因此可以直接替换 config["samples"] 传给各渲染/导出函数。
+    """
+
+    __slots__ = (
+        "_size",
+        "_strings",
+        "_prefixes",
+        "_names",
+        "_optional",
+        "_method_names",
+        "_method_index",
+        "_image_prefix",
+        "_image_base",
+        "_extras",
+    )
+
+    def __init__(self):
+        self._size = 0
+        self._strings = StringTable()
+        self._prefixes = StringTable()
+        self._names = array("i")
+        self._optional: Dict[str, array] = {f: array("i") for f in OPTIONAL_FIELDS}
+        self._method_names: List[str] = []
+        self._method_index: Dict[str, int] = {}
+        self._image_prefix: List[array] = []
+        self._image_base: List[array] = []
+        # 无法按列存储的字段（非字符串值、未知字段），按样本稀疏保存
+        self._extras: Dict[int, Dict[str, Any]] = {}
+
+    # ------------------------------------------------------------------
+    # 构建
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_samples(cls, samples: Iterable[Dict]) -> "SampleStore":
+        """从样本字典列表构建存储"""
+        store = cls()
+        for sample in samples:
+            store._append(sample)
+        store._strings.freeze()
+        store._prefixes.freeze()
+        return store
+
+    @classmethod
+    def from_columns(cls, meta: Dict, columns: Dict[str, Any]) -> "SampleStore":
+        """
+        从 to_columns() 导出的列数据重建存储
+        列可以是 array、bytes 或 memoryview（例如 mmap 的切片），不会复制数据
+        """
+        store = cls()
+        store._size = meta["size"]
+        store._strings = StringTable(columns["strings_blob"], columns["strings_offsets"])
+        store._prefixes = StringTable(
+            columns["prefixes_blob"], columns["prefixes_offsets"]
+        )
+        store._names = columns["names"]
+        store._optional = {f: columns[f"optional_{f}"] for f in OPTIONAL_FIELDS}
+        store._method_names = [sys.intern(name) for name in meta["method_names"]]
+        store._method_index = {name: mi for mi, name in enumerate(store._method_names)}
+        store._image_prefix = [
+            columns[f"image_prefix_{mi}"] for mi in range(len(store._method_names))
+        ]
+        store._image_base = [
+            columns[f"image_base_{mi}"] for mi in range(len(store._method_names))
+        ]
+        store._extras = {int(idx): extras for idx, extras in meta["extras"].items()}
+        return store
+
+    def to_columns(self) -> Tuple[Dict, Dict[str, Any]]:
+        """
+        导出列数据，用于序列化
+        返回: (元信息字典, {列名: array 或 bytes})
+        """
+        meta = {
+            "size": self._size,
+            "method_names": list(self._method_names),
+            "extras": {str(idx): extras for idx, extras in self._extras.items()},
+        }
+        columns = {
+            "strings_blob": self._strings._blob,
+            "strings_offsets": self._strings._offsets,
+            "prefixes_blob": self._prefixes._blob,
+            "prefixes_offsets": self._prefixes._offsets,
+            "names": self._names,
+        }
+        for field in OPTIONAL_FIELDS:
+            columns[f"optional_{field}"] = self._optional[field]
+        for mi in range(len(self._method_names)):
+            columns[f"image_prefix_{mi}"] = self._image_prefix[mi]
+            columns[f"image_base_{mi}"] = self._image_base[mi]
+        return meta, columns
+
+    def _encode_str(self, value: Any) -> Optional[int]:
+        """字符串返回编号，None 返回 NONE，其他类型返回 None（交给 extras）"""
+        if value is None:
+            return NONE
+        if isinstance(value, str):
+            return self._strings.add(value)
+        return None
+
+    def _add_method(self, method_name: str) -> int:
+        mi = len(self._method_names)
+        self._method_names.append(sys.intern(method_name))
+        self._method_index[self._method_names[-1]] = mi
+        # 当前样本的 name 列已写入，新列长度与其对齐
+        rows = len(self._names)
+        self._image_prefix.append(array("i", [ABSENT]) * rows)
+        self._image_base.append(array("i", [ABSENT]) * rows)
+        return mi
+
+    def _append(self, sample: Dict):
+        idx = self._size
+        extras: Dict[str, Any] = {}
+
+        code = self._encode_str(sample["name"]) if "name" in sample else ABSENT
+        if code is None or code == NONE:
+            extras["name"] = sample["name"]
+            code = ABSENT
+        self._names.append(code)
+
+        for field in OPTIONAL_FIELDS:
+            code = self._encode_str(sample[field]) if field in sample else ABSENT
+            if code is None:
+                extras[field] = sample[field]
+                code = ABSENT
+            self._optional[field].append(code)
+
+        for column in self._image_prefix:
+            column.append(ABSENT)
+        for column in self._image_base:
+            column.append(ABSENT)
+
+        images = sample.get("images")
+        if isinstance(images, Mapping):
+            for method_name, path in images.items():
+                mi = self._method_index.get(method_name)
+                if mi is None:
+                    mi = self._add_method(method_name)
+                if path is None:
+                    self._image_prefix[mi][idx] = NONE
+                    continue
+                prefix, base = split_path(str(path))
+                self._image_prefix[mi][idx] = self._prefixes.add(prefix)
+                self._image_base[mi][idx] = self._strings.add(base)
+        elif "images" in sample:
+            extras["images"] = images
+
+        for key, value in sample.items():
+            if key not in ("name", "images") and key not in OPTIONAL_FIELDS:
+                extras[key] = value
+
+        if extras:
+            self._extras[idx] = extras
+        self._size += 1
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+    def _get_image(self, idx: int, method_name: str) -> Optional[str]:
+        mi = self._method_index.get(method_name)
+        if mi is None:
+            raise KeyError(method_name)
+        prefix = self._image_prefix[mi][idx]
+        if prefix == ABSENT:
+            raise KeyError(method_name)
+        if prefix == NONE:
+            return None
+        return self._prefixes[prefix] + self._strings[self._image_base[mi][idx]]
+
+    def _get_field(self, idx: int, key: str) -> Any:
+        if key == "images":
+            extras = self._extras.get(idx)
+            if extras and "images" in extras:
+                return extras["images"]
+            return ImagesView(self, idx)
+
+        if key == "name":
+            code = self._names[idx]
+        elif key in self._optional:
+            code = self._optional[key][idx]
+        else:
+            code = ABSENT
+
+        if code == ABSENT:
+            extras = self._extras.get(idx)
+            if extras and key in extras:
+                return extras[key]
+            raise KeyError(key)
+        if code == NONE:
+            return None
+        return self._strings[code]
+
+    def _field_names(self, idx: int) -> List[str]:
+        extras = self._extras.get(idx, {})
+        names = []
+        if self._names[idx] != ABSENT or "name" in extras:
+            names.append("name")
+        for field in OPTIONAL_FIELDS:
+            if self._optional[field][idx] != ABSENT or field in extras:
+                names.append(field)
+        names.append("images")
+        names.extend(k for k in extras if k not in names)
+        return names
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [SampleRecord(self, i) for i in range(*idx.indices(self._size))]
+        if idx < 0:
+            idx += self._size
+        if not 0 <= idx < self._size:
+            raise IndexError("sample index out of range")
+        return SampleRecord(self, idx)
+
+    def __iter__(self) -> Iterator[SampleRecord]:
+        for i in range(self._size):
+            yield SampleRecord(self, i)
+
+    @property
+    def method_names(self) -> List[str]:
+        """出现过的所有方法名（按首次出现顺序）"""
+        return list(self._method_names)
+
+    @property
+    def nbytes(self) -> int:
+        """列数据占用的字节数（不含 extras 和 Python 对象头）"""
+        total = self._strings.nbytes + self._prefixes.nbytes
+        total += len(self._names) * self._names.itemsize
+        for column in self._optional.values():
+            total += len(column) * column.itemsize
+        for column in self._image_prefix + self._image_base:
+            total += len(column) * column.itemsize
+        return total
@@ -0,0 +1,158 @@
+"""
+按阶段计时（不依赖界面）
+
+计时只在当前线程启动了收集器时进行：网页在一次运行开始时 start_timings()，
+后台导出任务在任务线程中收集。未启动时 timed() 只做一次线程局部变量查找，
+被装饰的函数几乎没有额外开销。
+启用监控指标时，各阶段的耗时同时记入 image_viewer_stage_duration_seconds 直方图。
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Callable, Dict, Optional, Tuple
+
+from utils.metrics import get_metrics_registry
+
+_local = threading.local()
+_NULL = nullcontext()
+_metrics = get_metrics_registry()
+
+# 阶段耗时直方图
+STAGE_METRIC = "image_viewer_stage_duration_seconds"
+
+
+def _record(collector: Optional["TimingCollector"], stage: str, seconds: float):
+    if collector is not None:
+        collector.add(stage, seconds)
+    if _metrics.enabled:
+        _metrics.observe(STAGE_METRIC, seconds, stage=stage)
+
+
+class TimingCollector:
+    """
+    一次运行的计时结果
+    stages: {阶段: [调用次数, 总耗时(秒)]}
+    items: {(样本, 方法): {阶段: 总耗时(秒)}}
+    counters: {名称: 计数}（如缓存命中/未命中）
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.elapsed: Optional[float] = None
+        self.stages: Dict[str, list] = defaultdict(lambda: [0, 0.0])
+        self.items: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.current_item: Optional[Tuple[str, str]] = None
+
+    def add(self, stage: str, seconds: float):
+        entry = self.stages[stage]
+        entry[0] += 1
+        entry[1] += seconds
+        if self.current_item is not None:
+            self.items[self.current_item][stage] += seconds
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+
+class _Timer:
+    __slots__ = ("collector", "stage", "start")
+
+    def __init__(self, collector: Optional[TimingCollector], stage: str):
+        self.collector = collector
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        _record(self.collector, self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def get_collector() -> Optional[TimingCollector]:
+    """当前线程的收集器（未启动计时时返回 None）"""
+    return getattr(_local, "collector", None)
+
+
+def start_timings() -> TimingCollector:
+    """在当前线程启动新的收集器（替换之前未结束的收集器）"""
+    collector = TimingCollector()
+    _local.collector = collector
+    return collector
+
+
+def stop_timings() -> Optional[TimingCollector]:
+    """结束当前线程的计时，返回收集器"""
+    collector = getattr(_local, "collector", None)
+    _local.collector = None
+    if collector is not None and collector.elapsed is None:
+        collector.finish()
+    return collector
+
+
+@contextmanager
+def collect_timings():
+    """在 with 块内收集当前线程的计时"""
+    previous = getattr(_local, "collector", None)
+    collector = start_timings()
+    try:
+        yield collector
+    finally:
+        collector.finish()
+        _local.collector = previous
+
+
+def timed(stage: str):
+    """为代码块计时：with timed("stage"): ..."""
+    collector = getattr(_local, "collector", None)
+    if collector is None and not _metrics.enabled:
+        return _NULL
+    return _Timer(collector, stage)
+
+
+def timed_stage(stage: str) -> Callable:
+    """为函数计时的装饰器"""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            collector = getattr(_local, "collector", None)
+            if collector is None and not _metrics.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(collector, stage, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def timing_item(sample_name: str, method_name: str):
+    """把 with 块内的计时同时归到 (样本, 方法) 上"""
+    collector = getattr(_local, "collector", None)
+    if collector is None:
+        yield
+        return
+    previous = collector.current_item
+    collector.current_item = (str(sample_name), str(method_name))
+    try:
+        yield
+    finally:
+        collector.current_item = previous
+
+
+def count(name: str, value: int = 1):
+    """计数（如缓存命中），未启动计时时不记录"""
+    collector = getattr(_local, "collector", None)
+    if collector is not None:
+        collector.counters[name] += value